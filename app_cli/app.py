@@ -1,9 +1,9 @@
 import os
+import sys
+import threading
 from pathlib import Path
 import psycopg2
 from psycopg2.extras import RealDictCursor, execute_values
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -17,6 +17,20 @@ DB_PORT = int(os.getenv("DB_PORT"))
 
 ROOT = Path(__file__).resolve().parents[1]
 CATEGORY_FILE = ROOT / "data_extraction" / "resources" / "categories.txt"
+DEFAULT_VIEW_CATEGORIES = 5  # popular categories given to views created without asking
+# Load the embedding model in the background at start instead of on the first
+# view (re-)embedding; off by default, since most sessions never embed
+WARM_UP = os.getenv("WARM_UP", "0") == "1"
+
+# Shared DB helpers (label dictionaries, embeddings) live with the loaders
+sys.path.append(str(ROOT / "database_schemas" / "app"))
+from embed import warm_up
+from labels import category_labels
+from popularity import DEFAULT_VIEW_DESCRIPTION, popular_categories
+from recommender import refresh_view_embedding
+from feed import Feed
+from search import search_pages
+from interactions import InteractionRecorder
 
 # ---------------------
 # DB helpers
@@ -77,7 +91,7 @@ def create_default_view(conn, user_id, ask_categories=True):
                 if 0 <= i < len(remaining_categories):
                     selected_categories.append(remaining_categories[i])
 
-    description = "Default view for your learning preferences" if not ask_categories else input("Enter a brief description of what you want to learn: ").strip()
+    description = DEFAULT_VIEW_DESCRIPTION if not ask_categories else input("Enter a brief description of what you want to learn: ").strip()
     with conn.cursor() as cur:
         cur.execute("""
             INSERT INTO views (user_id, name, description)
@@ -86,32 +100,21 @@ def create_default_view(conn, user_id, ask_categories=True):
         view_id = cur.fetchone()[0]
 
         if selected_categories:
-            values = [(view_id, cat) for cat in selected_categories]
-            execute_values(cur, "INSERT INTO view_categories (view_id, category) VALUES %s", values)
+            ids = category_labels.ids(cur, selected_categories)
+            values = [(view_id, ids[cat]) for cat in selected_categories]
+            execute_values(cur, "INSERT INTO view_categories (view_id, category_id) VALUES %s", values)
+        elif not ask_categories:
+            # Nothing to go on: start from the currently most popular categories
+            values = [(view_id, cat_id) for cat_id in popular_categories(cur, DEFAULT_VIEW_CATEGORIES)]
+            if values:
+                execute_values(cur, "INSERT INTO view_categories (view_id, category_id) VALUES %s", values)
         conn.commit()
+    refresh_view_embedding(conn, view_id, description)
     return view_id, description
 
 # ---------------------
-# Recommendation logic
+# Views
 # ---------------------
-def get_posts_for_view(conn, view_id):
-    with conn.cursor(cursor_factory=RealDictCursor) as cur:
-        cur.execute("""
-            SELECT a.guid,
-                   llm.title AS llm_title,
-                   llm.content AS llm_content,
-                   vc.category
-            FROM view_categories vc
-            JOIN categories c
-              ON vc.category = c.category
-            JOIN articles a
-              ON a.guid = c.article_guid
-            JOIN llm_content llm
-              ON llm.article_guid = a.guid
-            WHERE vc.view_id = %s
-            GROUP BY a.guid, llm.title, llm.content, vc.category
-        """, (view_id,))
-        return cur.fetchall()
 def get_default_view(conn, user_id):
     with conn.cursor(cursor_factory=RealDictCursor) as cur:
         cur.execute("""
@@ -124,63 +127,58 @@ def get_default_view(conn, user_id):
         if row:
             return row['view_id'], row['description']
         return None, None
-def rank_posts(description, posts):
-    if not posts:
-        return []
-    documents = [p['llm_title'] + " " + p['llm_content'] for p in posts]
-    vectorizer = TfidfVectorizer(stop_words='english')
-    tfidf_matrix = vectorizer.fit_transform(documents)
-    user_vector = vectorizer.transform([description])
-    scores = cosine_similarity(user_vector, tfidf_matrix)[0]
-    return [posts[i] for i in scores.argsort()[::-1]]
 
 # ---------------------
 # Display posts one by one
 # ---------------------
 def show_posts(conn, view_id, description):
-    posts = get_posts_for_view(conn, view_id)
-    ranked_posts = rank_posts(description, posts)
-
-    if not ranked_posts:
-        print("\nNo posts found for your selected categories.\n")
-        return
-
-    i = 0
-    while i < len(ranked_posts):
-        post = ranked_posts[i]
-        print(f"\nTitle: {post['llm_title']}\nContent: {post['llm_content']}\n")
-        action = input("Press 'n' for next, 'e' to exit: ").strip().lower()
-        if action == 'e':
-            break
-        elif action == 'n':
+    shown = 0
+    with InteractionRecorder(get_connection) as recorder, \
+            Feed(get_connection, view_id, description) as feed:
+        for post in feed:
+            shown += 1
+            print(f"\nTitle: {post['llm_title']}\nContent: {post['content']}\n")
+            action = input("Press 'n' for next, 'e' to exit: ").strip().lower()
+            while action not in ('n', 'e'):
+                print("Invalid input. Press 'n' or 'e'.")
+                action = input("Press 'n' for next, 'e' to exit: ").strip().lower()
+            if action == 'e':
+                break
             try:
                 seconds = int(input("Seconds viewed: "))
                 liked = int(input("Liked? (1=yes, 0=no): "))
             except ValueError:
                 seconds, liked = 0, 0
+            recorder.record(view_id, post['guid'], post['published'], seconds, liked)
 
-            # Update view_tag_interactions
-            # with conn.cursor() as cur:
-            #     cur.execute("SELECT category FROM view_categories WHERE view_id = %s", (view_id,))
-            #     tags = [r[0] for r in cur.fetchall()]
-            #     for tag in tags:
-            #         cur.execute("""
-            #             INSERT INTO view_tag_interactions (view_id, tag, seconds_viewed, liked)
-            #             VALUES (%s, %s, %s, %s)
-            #             ON CONFLICT (view_id, tag) DO UPDATE
-            #             SET seconds_viewed = view_tag_interactions.seconds_viewed + EXCLUDED.seconds_viewed,
-            #                 liked = view_tag_interactions.liked + EXCLUDED.liked
-            #         """, (view_id, tag, seconds, liked))
-            #     conn.commit()
-            i += 1
-        else:
-            print("Invalid input. Press 'n' or 'e'.")
+    if not shown:
+        print("\nNo posts found for your selected categories.\n")
+
+# ---------------------
+# Search
+# ---------------------
+def search_posts_cli(conn):
+    while True:
+        query = input("\nSearch (empty to go back): ").strip()
+        if not query:
+            return
+        found = False
+        for page in search_pages(conn, query):
+            found = True
+            for post in page:
+                print(f"\nTitle: {post['title']}\n  {post['snippet']}")
+            if input("\nPress 'm' for more results, Enter for a new search: ").strip().lower() != 'm':
+                break
+        if not found:
+            print("\nNo matching posts.")
 
 # ---------------------
 # Main CLI
 # ---------------------
 
 def main():
+    if WARM_UP:
+        threading.Thread(target=warm_up, name="embed-warm-up", daemon=True).start()
     conn = get_connection()
     try:
         username = input("Enter your username: ").strip()
@@ -197,8 +195,16 @@ def main():
                 # Edge case: user exists but no default view
                 view_id, description = create_default_view(conn, user_id, ask_categories=False)
 
-        print(f"\nWelcome {username}! Showing your recommended posts from default view.")
-        show_posts(conn, view_id, description)
+        print(f"\nWelcome {username}!")
+        while True:
+            mode = input("\nPress 'f' for your feed, 's' to search, 'e' to exit: ").strip().lower()
+            if mode == 'f':
+                print("Showing your recommended posts from default view.")
+                show_posts(conn, view_id, description)
+            elif mode == 's':
+                search_posts_cli(conn)
+            elif mode == 'e':
+                break
 
     finally:
         conn.close()
@@ -0,0 +1,206 @@
+import argparse
+import hashlib
+import os
+import re
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+import numpy as np
+import psycopg2
+from psycopg2.extras import RealDictCursor, execute_values
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "database_schemas" / "app"))
+from config import DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, EMBED_MODEL
+from vector_search import configure_vector_search, vector_literal
+
+from popularity import DEFAULT_VIEW_DESCRIPTION
+from preferences import parse_vector
+from recommender import diversify, get_embedding_matrix, recent_cutoff
+
+# Cohort feeds: users with the same (normalized) occupation and industry who
+# follow the same category set get one shared precomputed feed, ranked against
+# the mean of their views' description embeddings. A second, broader cohort
+# per category set ignores occupation and industry. A new view's first page is
+# read from its cohort (exact match first) while its own feed is ranked, so
+# the first screen never waits on ranking. The ingestion loaders refresh the
+# feeds after each run (cohort_refresh.py); only cohorts whose categories'
+# content epoch moved, or whose members or their embeddings changed, are
+# re-ranked:
+#   python app_cli/cohorts.py
+#   python app_cli/cohorts.py --force
+
+COHORT_FEED_SIZE = int(os.getenv("COHORT_FEED_SIZE", "50"))
+
+def get_connection():
+    return psycopg2.connect(
+        dbname=DB_NAME, user=DB_USER, password=DB_PASSWORD, host=DB_HOST, port=DB_PORT
+    )
+
+def normalize_label(value):
+    """'  Software-Engineer ' -> 'software engineer'; None -> ''."""
+    return re.sub(r"[^a-z0-9]+", " ", (value or "").lower()).strip()
+
+def cohort_keys(occupation, industry, category_ids):
+    """(occupation, industry, sorted category ids) keys a view belongs to,
+    most specific first."""
+    categories = tuple(sorted(set(category_ids)))
+    return [(normalize_label(occupation), normalize_label(industry), categories), ("", "", categories)]
+
+# ---------------------
+# Lookup
+# ---------------------
+def cohort_posts(conn, view_id):
+    """The best matching cohort feed for a view as post dicts, or None."""
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute("""
+            SELECT u.occupation, u.industry,
+                   ARRAY(SELECT vc.category_id FROM view_categories vc WHERE vc.view_id = v.view_id) AS category_ids
+            FROM views v
+            JOIN users u ON u.user_id = v.user_id
+            WHERE v.view_id = %s
+        """, (view_id,))
+        view = cur.fetchone()
+        row = None
+        if view and view["category_ids"]:
+            (occupation, industry, categories), broad = cohort_keys(
+                view["occupation"], view["industry"], view["category_ids"])
+            cur.execute("""
+                SELECT guids, published, article_ids, scores
+                FROM cohort_feeds
+                WHERE (occupation, industry, category_ids) IN (
+                    (%s, %s, %s::smallint[]), (%s, %s, %s::smallint[])
+                )
+                ORDER BY occupation = '' AND industry = ''
+                LIMIT 1
+            """, (occupation, industry, list(categories), broad[0], broad[1], list(broad[2])))
+            row = cur.fetchone()
+    conn.commit()
+    if row is None:
+        return None
+    return [{"guid": g, "published": p, "article_id": i, "score": s}
+            for g, p, i, s in zip(row["guids"], row["published"], row["article_ids"], row["scores"])]
+
+# ---------------------
+# Refresh
+# ---------------------
+def load_cohorts(cur):
+    """{cohort key: [(view_id, description embedding) of its members' views]}."""
+    cur.execute("""
+        SELECT v.view_id, u.occupation, u.industry, v.embedding::text,
+               ARRAY(SELECT vc.category_id FROM view_categories vc WHERE vc.view_id = v.view_id)
+        FROM views v
+        JOIN users u ON u.user_id = v.user_id
+        WHERE v.embedding IS NOT NULL AND v.embedding_model = %s
+          AND v.description IS DISTINCT FROM %s
+    """, (EMBED_MODEL, DEFAULT_VIEW_DESCRIPTION))
+    members = defaultdict(list)
+    for view_id, occupation, industry, vec, category_ids in cur.fetchall():
+        if not category_ids:
+            continue
+        vec = parse_vector(vec)
+        for key in cohort_keys(occupation, industry, category_ids):
+            members[key].append((view_id, vec))
+    return members
+
+def cohort_query(views):
+    """(unit mean embedding, fingerprint of the member views and that mean)."""
+    views = sorted(views, key=lambda v: v[0])
+    query = np.mean([vec for _, vec in views], axis=0).astype(np.float32)
+    query /= np.linalg.norm(query) or 1.0
+    digest = hashlib.sha256(",".join(str(view_id) for view_id, _ in views).encode())
+    digest.update(query.tobytes())
+    return query, digest.hexdigest()
+
+def rank_cohort(conn, query, category_ids, k=COHORT_FEED_SIZE):
+    """Top k posts in the categories for a cohort query vector, diversified."""
+    since = recent_cutoff()
+    matrix = get_embedding_matrix()
+    if matrix is not None:
+        posts = [{"guid": guid, "published": published, "article_id": article_id, "score": score}
+                 for guid, article_id, published, score in
+                 matrix.top_k(query, k=k, category_ids=category_ids, since=since)]
+    else:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            configure_vector_search(cur, ef_search=min(max(k, 40), 1000), local=True)
+            cur.execute("""
+                SELECT a.guid, a.published, a.article_id, 1 - (a.embedding <=> %(vec)s::vector) AS score
+                FROM articles a
+                WHERE a.published >= %(since)s
+                  AND a.embedding IS NOT NULL
+                  AND EXISTS (
+                      SELECT 1 FROM categories c
+                      WHERE c.article_guid = a.guid AND c.published = a.published
+                        AND c.published >= %(since)s
+                        AND c.category_id = ANY(%(categories)s::smallint[])
+                  )
+                ORDER BY a.embedding <=> %(vec)s::vector
+                LIMIT %(k)s
+            """, {"vec": vector_literal(query), "since": since,
+                  "categories": list(category_ids), "k": k})
+            posts = cur.fetchall()
+        conn.commit()
+    return diversify(conn, posts)
+
+def refresh_cohorts(conn, force=False):
+    """Re-rank cohorts whose content epoch or members changed (all with force)
+    and drop cohorts that no longer have members. Returns the number re-ranked."""
+    with conn.cursor() as cur:
+        members = load_cohorts(cur)
+        cur.execute("SELECT category_id, epoch FROM category_epochs")
+        epochs = dict(cur.fetchall())
+        cur.execute("SELECT occupation, industry, category_ids, content_epoch, members_hash FROM cohort_feeds")
+        stored = {(o, i, tuple(c)): (epoch, members) for o, i, c, epoch, members in cur.fetchall()}
+        gone = [key for key in stored if key not in members]
+        if gone:
+            execute_values(cur, """
+                DELETE FROM cohort_feeds f
+                USING (VALUES %s) AS d(occupation, industry, category_ids)
+                WHERE f.occupation = d.occupation AND f.industry = d.industry
+                  AND f.category_ids = d.category_ids::smallint[]
+            """, [(o, i, list(c)) for o, i, c in gone])
+    conn.commit()
+
+    refreshed = 0
+    for (occupation, industry, categories), views in members.items():
+        epoch = sum(epochs.get(c, 0) for c in categories)
+        query, fingerprint = cohort_query(views)
+        if not force and stored.get((occupation, industry, categories)) == (epoch, fingerprint):
+            continue
+        posts = rank_cohort(conn, query, categories)
+        with conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO cohort_feeds (occupation, industry, category_ids, content_epoch, members_hash,
+                                          guids, published, article_ids, scores)
+                VALUES (%s, %s, %s::smallint[], %s, %s, %s::text[], %s::timestamptz[], %s::int[], %s::real[])
+                ON CONFLICT (occupation, industry, category_ids) DO UPDATE SET
+                    content_epoch = EXCLUDED.content_epoch,
+                    members_hash = EXCLUDED.members_hash,
+                    guids = EXCLUDED.guids,
+                    published = EXCLUDED.published,
+                    article_ids = EXCLUDED.article_ids,
+                    scores = EXCLUDED.scores,
+                    refreshed_at = now()
+            """, (occupation, industry, list(categories), epoch, fingerprint,
+                  [p["guid"] for p in posts], [p["published"] for p in posts],
+                  [p["article_id"] for p in posts], [float(p["score"]) for p in posts]))
+        conn.commit()
+        refreshed += 1
+    return refreshed
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh precomputed cohort feeds (run after ingestion).")
+    parser.add_argument("--force", action="store_true", help="re-rank every cohort, not only changed ones")
+    args = parser.parse_args()
+
+    start = time.time()
+    conn = get_connection()
+    try:
+        refreshed = refresh_cohorts(conn, force=args.force)
+    finally:
+        conn.close()
+    print(f"Refreshed {refreshed} cohort feeds in {time.time() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
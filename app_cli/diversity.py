@@ -0,0 +1,72 @@
+import os
+import numpy as np
+
+# Maximal marginal relevance re-ranking, so a feed isn't filled with
+# near-identical stories from one news cycle. Each pick maximizes
+#     lam * relevance - (1 - lam) * max similarity to the posts already picked
+# The pairwise similarities of the candidates are computed once (one n x n
+# product) and the max-similarity vector is updated in place after each pick,
+# so re-ranking a few hundred candidates is k vector operations, not k*n
+# Python-level comparisons. Caps of 0 are off; with lam >= 1 the caps still
+# apply (relevance order under the caps).
+
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.7"))  # 1 = relevance only
+MMR_MAX_PER_SOURCE = int(os.getenv("MMR_MAX_PER_SOURCE", "3"))
+MMR_MAX_PER_CATEGORY = int(os.getenv("MMR_MAX_PER_CATEGORY", "5"))
+
+def normalize(scores):
+    """Min-max scale to [0, 1], so lam means the same for any score type."""
+    scores = np.asarray(scores, dtype=np.float32)
+    spread = scores.max() - scores.min() if len(scores) else 0.0
+    if spread <= 0:
+        return np.ones_like(scores)
+    return (scores - scores.min()) / spread
+
+def mmr(relevance, embeddings, k=None, lam=MMR_LAMBDA, caps=()):
+    """Order of the candidates after MMR: indices into relevance/embeddings.
+
+    relevance: (n,) scores, higher is better; embeddings: (n, dim) unit rows.
+    caps: (labels, cap) pairs, labels an (n,) int array (e.g. source or
+    category codes); a label that already has `cap` picks is skipped until
+    every remaining candidate is capped, then the counts start over. The
+    first k picks are diversified, the rest follow in relevance order."""
+    relevance = np.asarray(relevance, dtype=np.float32)
+    n = len(relevance)
+    k = n if k is None else min(k, n)
+    caps = [(np.asarray(labels), cap) for labels, cap in caps if cap > 0]
+    if n < 2 or (lam >= 1.0 and not caps):
+        return np.argsort(-relevance, kind="stable")
+
+    # lam >= 1 with caps: relevance order under the caps, no redundancy term
+    redundancy = lam < 1.0
+    lam = min(lam, 1.0)
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    sims = embeddings @ embeddings.T if redundancy else None
+    max_sim = np.zeros(n, dtype=np.float32)
+    taken = np.zeros(n, dtype=bool)
+    counts = [np.zeros(labels.max() + 1, dtype=np.int32) for labels, _ in caps]
+    order = []
+    for _ in range(k):
+        score = lam * relevance - (1.0 - lam) * max_sim
+        blocked = taken.copy()
+        for (labels, cap), count in zip(caps, counts):
+            blocked |= count[labels] >= cap
+        if blocked.all():
+            for count in counts:
+                count[:] = 0
+            blocked = taken
+        score[blocked] = -np.inf
+        pick = int(np.argmax(score))
+        order.append(pick)
+        taken[pick] = True
+        if redundancy:
+            np.maximum(max_sim, sims[pick], out=max_sim)
+        for (labels, _), count in zip(caps, counts):
+            count[labels[pick]] += 1
+    rest = np.flatnonzero(~taken)
+    return np.concatenate([np.asarray(order, dtype=np.int64), rest[np.argsort(-relevance[rest], kind="stable")]])
+
+def codes(values):
+    """Dense int codes for arbitrary labels (None is its own label)."""
+    _, inverse = np.unique(np.asarray([str(v) for v in values]), return_inverse=True)
+    return inverse
@@ -0,0 +1,163 @@
+import json
+from datetime import timezone
+from pathlib import Path
+import numpy as np
+
+# In-process scoring over the matrix written by
+# database_schemas/scripts/export_embeddings.py. The embeddings file is opened
+# with np.memmap (read-only), so every process on the host shares the same
+# page-cache pages instead of holding its own copy. Scoring a view is one
+# matrix-vector product over the (optionally category-masked) rows and an
+# argpartition top-k; no database round trip.
+
+class Segment:
+    def __init__(self, root: Path, meta: dict, dim: int):
+        seg_dir = root / meta["dir"]
+        self.rows = meta["rows"]
+        if not self.rows:  # empty export (or delta); nothing to map
+            return
+        self.embeddings = np.memmap(seg_dir / meta["embeddings"], dtype=np.float32,
+                                    mode="r", shape=(self.rows, dim))
+        self.guids = np.load(seg_dir / meta["guids"], mmap_mode="r")
+        self.ids = np.load(seg_dir / meta["ids"], mmap_mode="r")
+        self.published = np.load(seg_dir / meta["published"], mmap_mode="r")
+        self.categories = np.load(seg_dir / meta["categories"], mmap_mode="r")
+
+
+class EmbeddingMatrix:
+    def __init__(self, root: Path, manifest: dict):
+        self.root = root
+        self.dim = manifest["dim"]
+        self.model = manifest["model"]
+        self.words = manifest["category_words"]
+        base = Segment(root, manifest["base"], self.dim)
+        self.segments = [base]
+        self._alive = [None]  # per segment: row mask, None = all rows live
+        if manifest.get("delta"):
+            delta = Segment(root, manifest["delta"], self.dim)
+            # Articles re-embedded since the base export: the delta row wins
+            if delta.rows and base.rows:
+                shadowed = np.isin(base.guids, delta.guids)
+                if shadowed.any():
+                    self._alive[0] = ~shadowed
+            self.segments.append(delta)
+            self._alive.append(None)
+
+    @classmethod
+    def load(cls, root):
+        """The exported matrix, or None if no export exists yet."""
+        root = Path(root)
+        manifest_path = root / "manifest.json"
+        if not manifest_path.exists():
+            return None
+        return cls(root, json.loads(manifest_path.read_text()))
+
+    @staticmethod
+    def manifest_version(root):
+        """Identity of the current manifest (inode, mtime), or None. export_embeddings
+        swaps the manifest in with os.replace, so this changes with every export."""
+        try:
+            stat = (Path(root) / "manifest.json").stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def category_mask(self, category_ids):
+        """Bitset (one uint64 per word) selecting any of the given category ids."""
+        mask = np.zeros(self.words, dtype=np.uint64)
+        for cat_id in category_ids:
+            word = (cat_id - 1) // 64
+            if word < self.words:
+                mask[word] |= np.uint64(1) << np.uint64((cat_id - 1) % 64)
+        return mask
+
+    def _rows(self, seg, alive, mask, since, exclude=None):
+        """Indices of a segment's live rows passing the category / window / exclude filters."""
+        keep = np.ones(seg.rows, dtype=bool) if alive is None else alive.copy()
+        if mask is not None:
+            keep &= (seg.categories & mask).any(axis=1)
+        if since is not None:
+            keep &= seg.published >= since
+        if exclude is not None and len(exclude):
+            keep &= ~np.isin(seg.ids, exclude)
+        return np.flatnonzero(keep)
+
+    def category_bonus(self, bitsets, category_boosts):
+        """Per row, the largest boost among the row's categories."""
+        bonus = np.zeros(len(bitsets), dtype=np.float32)
+        for cat_id, boost in category_boosts.items():
+            word, bit = (cat_id - 1) // 64, np.uint64(1) << np.uint64((cat_id - 1) % 64)
+            if word < self.words:
+                has = (bitsets[:, word] & bit) != 0
+                bonus[has] = np.maximum(bonus[has], boost)
+        return bonus
+
+    def candidates(self, category_ids=None, since=None):
+        """All live rows in the given categories and window, gathered once:
+        dict of embeddings (n x dim), ids, guids, published and categories."""
+        mask = self.category_mask(category_ids) if category_ids is not None else None
+        since = _utc64(since)
+        parts = []
+        for seg, alive in zip(self.segments, self._alive):
+            if not seg.rows:
+                continue
+            rows = self._rows(seg, alive, mask, since)
+            if len(rows):
+                parts.append((seg, rows))
+        if not parts:
+            return {"embeddings": np.empty((0, self.dim), dtype=np.float32),
+                    "ids": np.empty(0, dtype=np.uint32), "guids": np.empty(0, dtype="S1"),
+                    "published": np.empty(0, dtype="datetime64[us]"),
+                    "categories": np.empty((0, self.words), dtype=np.uint64)}
+        return {field: np.concatenate([getattr(seg, field)[rows] for seg, rows in parts])
+                for field in ("embeddings", "ids", "guids", "published", "categories")}
+
+    def top_k(self, query, k=100, category_ids=None, since=None, category_boosts=None, exclude=None):
+        """Best k articles by cosine similarity to `query` (embeddings are unit
+        length), plus the largest of `category_boosts` (category_id -> bonus)
+        among each article's categories, skipping article ids in `exclude`
+        (sorted uint32 array). Returns a list of (guid, article_id, published,
+        score), best first."""
+        query = np.asarray(query, dtype=np.float32)
+        mask = self.category_mask(category_ids) if category_ids is not None else None
+        since = _utc64(since)
+
+        guids, ids, published, scores = [], [], [], []
+        for seg, alive in zip(self.segments, self._alive):
+            if not seg.rows:
+                continue
+            rows = self._rows(seg, alive, mask, since, exclude)
+            if not len(rows):
+                continue
+            # Contiguous scan when nothing is filtered; otherwise gather the slice
+            matrix = seg.embeddings if len(rows) == seg.rows else seg.embeddings[rows]
+            seg_scores = matrix @ query
+            if category_boosts:
+                seg_scores = seg_scores + self.category_bonus(seg.categories[rows], category_boosts)
+            n = min(k, len(rows))
+            best = np.argpartition(-seg_scores, n - 1)[:n]
+            guids.append(seg.guids[rows[best]])
+            ids.append(seg.ids[rows[best]])
+            published.append(seg.published[rows[best]])
+            scores.append(seg_scores[best])
+
+        if not scores:
+            return []
+        guids, ids, published, scores = (np.concatenate(x) for x in (guids, ids, published, scores))
+        order = np.argsort(-scores)[:k]
+        return [(guids[i].decode("utf-8"),
+                 int(ids[i]),
+                 to_datetime(published[i]),
+                 float(scores[i]))
+                for i in order]
+
+
+def _utc64(ts):
+    """Aware datetime -> naive-UTC datetime64[us] (the exported published format)."""
+    if ts is None:
+        return None
+    return np.datetime64(ts.astimezone(timezone.utc).replace(tzinfo=None), "us")
+
+def to_datetime(value):
+    """Exported datetime64[us] -> aware UTC datetime."""
+    return value.astype("datetime64[us]").item().replace(tzinfo=timezone.utc)
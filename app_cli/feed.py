@@ -0,0 +1,44 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from feed_cache import cached_ranked_pages
+from recommender import FEED_PAGE_SIZE, fetch_posts
+
+# A view's feed, read one post at a time. Ranked ids and post bodies are
+# loaded a page at a time on a background thread with its own connection, so
+# the next page is fetched while the user reads the current one and neither
+# time-to-first-post nor memory grows with the number of matching articles.
+
+class Feed:
+    def __init__(self, connect, view_id, description, page_size=FEED_PAGE_SIZE):
+        self._conn = connect()  # used only by the prefetch thread
+        self._pages = cached_ranked_pages(self._conn, view_id, description, page_size)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="feed-prefetch")
+        self._next = self._executor.submit(self._load_page)
+
+    def _load_page(self):
+        # Skip pages whose posts all lack LLM content rather than ending the feed
+        for ids in self._pages:
+            posts = fetch_posts(self._conn, ids)
+            if posts:
+                return posts
+        return None
+
+    def __iter__(self):
+        while True:
+            page = self._next.result()
+            if page is None:
+                return
+            self._next = self._executor.submit(self._load_page)
+            yield from page
+
+    def close(self):
+        self._next.cancel()
+        self._executor.shutdown(wait=True)
+        self._pages.close()
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
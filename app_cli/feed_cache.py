@@ -0,0 +1,114 @@
+import os
+from psycopg2.extras import RealDictCursor
+
+from cohorts import cohort_posts
+from recommender import FEED_PAGE_SIZE, ranked_pages, recent_cutoff
+from seen import seen_cache
+
+# Ranked-result cache per view. The top FEED_CACHE_SIZE ids and scores are
+# stored in feed_cache under the key (views.version, content epoch), where the
+# content epoch is the sum of category_epochs over the view's categories.
+# upsert_articles bumps the epochs of categories that gain or lose articles or
+# whose articles are re-embedded or get new LLM content, and view changes bump
+# views.version, so an entry is reused until something that can change its
+# ranking happens. Seen posts and posts that aged out of the window
+# are filtered when the entry is read, so they never invalidate it. The least
+# recently used entries beyond FEED_CACHE_MAX_VIEWS are evicted on write.
+
+FEED_CACHE_SIZE = int(os.getenv("FEED_CACHE_SIZE", "200"))
+FEED_CACHE_MAX_VIEWS = int(os.getenv("FEED_CACHE_MAX_VIEWS", "10000"))
+
+def cache_key(conn, view_id):
+    """(view version, content epoch) for a view, or None if the view is gone."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT v.version,
+                   (SELECT COALESCE(sum(ce.epoch), 0)
+                    FROM view_categories vc
+                    JOIN category_epochs ce ON ce.category_id = vc.category_id
+                    WHERE vc.view_id = v.view_id)
+            FROM views v WHERE v.view_id = %s
+        """, (view_id,))
+        row = cur.fetchone()
+    return (row[0], int(row[1])) if row else None
+
+def load_cached(conn, view_id, key):
+    """Cached ranking for the key as a list of post dicts, or None on a miss."""
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute("""
+            UPDATE feed_cache SET last_used_at = now()
+            WHERE view_id = %s AND view_version = %s AND content_epoch = %s
+            RETURNING guids, published, article_ids, scores
+        """, (view_id, key[0], key[1]))
+        row = cur.fetchone()
+    conn.commit()
+    if row is None:
+        return None
+    return [{"guid": g, "published": p, "article_id": i, "score": s}
+            for g, p, i, s in zip(row["guids"], row["published"], row["article_ids"], row["scores"])]
+
+def store_cached(conn, view_id, key, posts):
+    scores = [p.get("score", -p["distance"] if "distance" in p else -rank)
+              for rank, p in enumerate(posts)]
+    with conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO feed_cache (view_id, view_version, content_epoch, guids, published, article_ids, scores)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT (view_id) DO UPDATE SET
+                view_version = EXCLUDED.view_version,
+                content_epoch = EXCLUDED.content_epoch,
+                guids = EXCLUDED.guids,
+                published = EXCLUDED.published,
+                article_ids = EXCLUDED.article_ids,
+                scores = EXCLUDED.scores,
+                created_at = now(),
+                last_used_at = now()
+        """, (view_id, key[0], key[1], [p["guid"] for p in posts], [p["published"] for p in posts],
+              [p["article_id"] for p in posts], scores))
+        cur.execute("""
+            DELETE FROM feed_cache
+            WHERE view_id IN (
+                SELECT view_id FROM feed_cache ORDER BY last_used_at DESC OFFSET %s
+            )
+        """, (FEED_CACHE_MAX_VIEWS,))
+    conn.commit()
+
+def cached_ranked_pages(conn, view_id, description, page_size=FEED_PAGE_SIZE):
+    """ranked_pages with the first FEED_CACHE_SIZE results served from feed_cache.
+    On a miss the top FEED_CACHE_SIZE ids are ranked in one step and stored
+    (after a cohort first page for new views); readers that go past them
+    continue with live ranking."""
+    key = cache_key(conn, view_id)
+    seen = seen_cache.get(conn, view_id)
+    since = recent_cutoff()
+    live = None
+    served = set()
+    posts = load_cached(conn, view_id, key) if key else None
+    if posts is None:
+        if not seen:
+            # New view: its first page comes from its cohort's precomputed feed
+            # (cohorts.py); its own ranking runs when the next page is asked
+            # for, which Feed prefetches while this one is read
+            first = [p for p in cohort_posts(conn, view_id) or [] if p["published"] >= since][:page_size]
+            if first:
+                yield first
+                served = {p["guid"] for p in first}
+        live = ranked_pages(conn, view_id, description, page_size=FEED_CACHE_SIZE)
+        posts = next(live, [])
+        if key:
+            store_cached(conn, view_id, key, posts)
+
+    fresh = [p for p in posts
+             if p["article_id"] not in seen and p["published"] >= since and p["guid"] not in served]
+    for i in range(0, len(fresh), page_size):
+        yield fresh[i:i + page_size]
+
+    # Only reached by readers who get past the cached prefix
+    if live is None:
+        live = ranked_pages(conn, view_id, description, page_size=FEED_CACHE_SIZE)
+        next(live, None)  # the prefix just served from the cache
+    served |= {p["guid"] for p in posts}
+    for page in live:
+        page = [p for p in page if p["guid"] not in served]
+        for i in range(0, len(page), page_size):
+            yield page[i:i + page_size]
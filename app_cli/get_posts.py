@@ -1,9 +1,9 @@
 import os
+import sys
+from datetime import datetime, timedelta, timezone
 import psycopg2
 from psycopg2.extras import RealDictCursor
 from pathlib import Path
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 
 # ---------------------
 # Database config
@@ -13,9 +13,14 @@ DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_HOST = os.getenv("DB_HOST")
 DB_PORT = int(os.getenv("DB_PORT"))
+RECENT_WINDOW_DAYS = int(os.getenv("RECENT_WINDOW_DAYS", "90"))
 
-ROOT = Path(__file__).resolve().parents[2]
-CATEGORY_FILE = ROOT / "data_extraction" / "resources" / "category.txt"
+ROOT = Path(__file__).resolve().parents[1]
+CATEGORY_FILE = ROOT / "data_extraction" / "resources" / "categories.txt"
+
+sys.path.append(str(ROOT / "database_schemas" / "app"))
+from labels import category_labels
+from ranking_index import RankingIndex
 
 # ---------------------
 # DB helpers
@@ -75,11 +80,13 @@ def create_default_view(user_id):
     """, (user_id, description))
     view_id = cur.fetchone()['view_id']
 
+    category_ids = category_labels.ids(cur, selected_categories)
     for cat in selected_categories:
         cur.execute("""
-            INSERT INTO view_categories (view_id, category)
-            VALUES (%s, %s);
-        """, (view_id, cat))
+            INSERT INTO view_categories (view_id, category_id)
+            VALUES (%s, %s)
+            ON CONFLICT (view_id, category_id) DO NOTHING;
+        """, (view_id, category_ids[cat]))
     
     conn.commit()
     cur.close()
@@ -94,7 +101,7 @@ def get_user_view(user_id):
     conn = get_db_connection()
     cur = conn.cursor()
     cur.execute("""
-        SELECT v.description, array_agg(vc.category) AS categories
+        SELECT v.description, array_agg(vc.category_id) AS category_ids
         FROM views v
         JOIN view_categories vc ON v.view_id = vc.view_id
         WHERE v.user_id = %s AND v.name = 'default'
@@ -105,30 +112,42 @@ def get_user_view(user_id):
     conn.close()
     return view
 
-def get_candidate_posts(categories):
+def get_candidate_posts(category_ids):
+    since = datetime.now(timezone.utc) - timedelta(days=RECENT_WINDOW_DAYS)
     conn = get_db_connection()
     cur = conn.cursor()
     cur.execute("""
-        SELECT a.guid, a.title, a.content, a.link
+        SELECT a.guid, a.title, a.link, llm.title AS llm_title
         FROM articles a
-        JOIN categories c ON a.guid = c.article_guid
-        WHERE c.category = ANY(%s)
-        GROUP BY a.guid;
-    """, (categories,))
+        JOIN llm_content llm ON llm.article_guid = a.guid AND llm.published = a.published
+        WHERE a.published >= %s AND llm.published >= %s
+          AND EXISTS (
+              SELECT 1 FROM categories c
+              WHERE c.article_guid = a.guid AND c.published = a.published
+                AND c.category_id = ANY(%s::smallint[]) AND c.published >= %s
+          );
+    """, (since, since, category_ids, since))
     posts = cur.fetchall()
     cur.close()
     conn.close()
     return posts
 
 def rank_posts_by_relevance(user_description, posts):
-    documents = [p['title'] + " " + p['content'] for p in posts]
-    if not documents:
+    if not posts:
         return []
 
-    vectorizer = TfidfVectorizer(stop_words='english')
-    tfidf_matrix = vectorizer.fit_transform(documents)
-    user_vector = vectorizer.transform([user_description])
-    scores = cosine_similarity(user_vector, tfidf_matrix)[0]
+    index = RankingIndex.load()
+    if index is not None:
+        scores = index.score(user_description, [p['guid'] for p in posts])
+    else:
+        # Titles only: article bodies live in the cold article_bodies table
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.metrics.pairwise import cosine_similarity
+        documents = [(p['title'] or "") + " " + (p['llm_title'] or "") for p in posts]
+        vectorizer = TfidfVectorizer(stop_words='english')
+        tfidf_matrix = vectorizer.fit_transform(documents)
+        user_vector = vectorizer.transform([user_description])
+        scores = cosine_similarity(user_vector, tfidf_matrix)[0]
 
     top_indices = scores.argsort()[::-1]
     ranked_posts = [posts[i] for i in top_indices]
@@ -139,9 +158,9 @@ def get_recommended_posts(user_id, top_n=10):
     if not view:
         return []
 
-    categories = view['categories']
+    category_ids = view['category_ids']
     description = view['description']
-    posts = get_candidate_posts(categories)
+    posts = get_candidate_posts(category_ids)
     ranked_posts = rank_posts_by_relevance(description, posts)
     return ranked_posts[:top_n]
 
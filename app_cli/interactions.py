@@ -0,0 +1,171 @@
+import atexit
+import os
+import sys
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone
+import psycopg2
+from psycopg2.extras import execute_values
+
+from preferences import update_preferences
+from seen import add_seen
+
+# Write-behind interaction logging. record() only appends to an in-memory
+# buffer; a background thread flushes the buffer in one transaction every
+# INTERACTION_FLUSH_SECONDS, as soon as INTERACTION_FLUSH_EVENTS are pending,
+# and at exit. Each flush writes the raw events, then counters aggregated per
+# article (articles.views / likes) and per (view, tag) (view_tag_interactions),
+# and folds the batch into the views' preference state (preferences.py), so
+# the browsing loop never waits on the database. A batch the database rejects
+# (e.g. an event for a deleted view) is retried one event at a time under
+# savepoints and the events that still fail are dropped; connection errors
+# keep the whole batch for the next flush.
+
+FLUSH_SECONDS = float(os.getenv("INTERACTION_FLUSH_SECONDS", "5"))
+FLUSH_EVENTS = int(os.getenv("INTERACTION_FLUSH_EVENTS", "50"))
+# Events kept for retry while the database is unreachable; older ones are dropped
+MAX_PENDING = 10_000
+
+
+class InteractionRecorder:
+    def __init__(self, connect, flush_seconds=FLUSH_SECONDS, flush_events=FLUSH_EVENTS):
+        self._connect = connect
+        self._conn = None
+        self.flush_seconds = flush_seconds
+        self.flush_events = flush_events
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="interaction-flush", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def record(self, view_id, guid, published, seconds=0, liked=False):
+        event = (view_id, guid, published, max(int(seconds or 0), 0), bool(liked),
+                 datetime.now(timezone.utc))
+        with self._lock:
+            self._buffer.append(event)
+            full = len(self._buffer) >= self.flush_events
+        if full:
+            self._wake.set()
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            events, self._buffer = self._buffer, []
+        if not events:
+            return
+        try:
+            if self._conn is None or self._conn.closed:
+                self._conn = self._connect()
+            try:
+                with self._conn.cursor() as cur:
+                    write_events(cur, events)
+            except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                raise
+            except psycopg2.Error as e:
+                self._conn.rollback()
+                failed = self._write_each(events)
+                print(f"Interaction flush rejected ({e}); dropped {len(failed)} of {len(events)} events",
+                      file=sys.stderr)
+            self._conn.commit()
+        except Exception as e:
+            if self._conn is not None and not self._conn.closed:
+                self._conn.rollback()
+            with self._lock:
+                self._buffer = (events + self._buffer)[-MAX_PENDING:]
+            print(f"Interaction flush failed ({len(events)} events kept for retry): {e}", file=sys.stderr)
+
+    def _write_each(self, events):
+        """Write events one at a time, each under a savepoint; returns the rejected ones."""
+        failed = []
+        with self._conn.cursor() as cur:
+            for event in events:
+                cur.execute("SAVEPOINT interaction_event")
+                try:
+                    write_events(cur, [event])
+                except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                    raise
+                except psycopg2.Error:
+                    cur.execute("ROLLBACK TO SAVEPOINT interaction_event")
+                    failed.append(event)
+                else:
+                    cur.execute("RELEASE SAVEPOINT interaction_event")
+        return failed
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join()
+        self.flush()
+        if self._conn is not None:
+            self._conn.close()
+        atexit.unregister(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_events(cur, events):
+    """Write one batch: the raw log, counters aggregated per article and per
+    (view, tag), the views' seen sets, and their preference vectors / category
+    weights."""
+    execute_values(cur, """
+        INSERT INTO interaction_events (view_id, article_guid, published, seconds_viewed, liked, created_at)
+        VALUES %s
+    """, events)
+
+    per_article = defaultdict(lambda: [0, 0])   # (guid, published) -> [views, likes]
+    per_view_article = defaultdict(lambda: [0, 0, 0])  # (view, guid, published) -> [impressions, seconds, likes]
+    for view_id, guid, published, seconds, liked, _ in events:
+        counts = per_article[(guid, published)]
+        counts[0] += 1
+        counts[1] += liked
+        counts = per_view_article[(view_id, guid, published)]
+        counts[0] += 1
+        counts[1] += seconds
+        counts[2] += liked
+
+    updated = execute_values(cur, """
+        UPDATE articles a
+        SET views = COALESCE(a.views, 0) + d.views,
+            likes = COALESCE(a.likes, 0) + d.likes
+        FROM (VALUES %s) AS d(guid, published, views, likes)
+        WHERE a.guid = d.guid AND a.published = d.published::timestamptz
+        RETURNING a.guid, a.article_id
+    """, [(g, p, views, likes) for (g, p), (views, likes) in per_article.items()], fetch=True)
+
+    # Shown articles join the views' seen sets
+    article_ids = dict(updated)
+    seen_by_view = defaultdict(set)
+    for view_id, guid, *_ in events:
+        if guid in article_ids:
+            seen_by_view[view_id].add(article_ids[guid])
+    add_seen(cur, seen_by_view)
+
+    # Expand each (view, article) aggregate to the article's tags and add it
+    # to the (view, tag) counters in one statement.
+    execute_values(cur, """
+        INSERT INTO view_tag_interactions (view_id, tag_id, impressions, seconds_viewed, liked)
+        SELECT d.view_id, t.tag_id, sum(d.impressions), sum(d.seconds), sum(d.likes)
+        FROM (VALUES %s) AS d(view_id, guid, published, impressions, seconds, likes)
+        JOIN tags t ON t.article_guid = d.guid AND t.published = d.published::timestamptz
+        GROUP BY d.view_id, t.tag_id
+        ON CONFLICT (view_id, tag_id) DO UPDATE SET
+            impressions = view_tag_interactions.impressions + EXCLUDED.impressions,
+            seconds_viewed = view_tag_interactions.seconds_viewed + EXCLUDED.seconds_viewed,
+            liked = view_tag_interactions.liked + EXCLUDED.liked
+    """, [(v, g, p, n, s, l) for (v, g, p), (n, s, l) in per_view_article.items()])
+
+    update_preferences(cur, events)
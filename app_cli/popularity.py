@@ -0,0 +1,195 @@
+import argparse
+import math
+import os
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+import psycopg2
+from psycopg2.extras import RealDictCursor, execute_values
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "database_schemas" / "app"))
+from config import DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT
+
+from preferences import signal
+
+# Time-decayed popularity per article and per category, for cold-start feeds
+# and as a ranking signal. Scores use forward decay: an interaction of weight w
+# at time t adds w * 2^((t - REFERENCE) / half-life), kept as a log
+# (log_score) so it never overflows. Growing the weight of new events instead
+# of shrinking old scores means stored scores never need rewriting: ordering
+# by log_score is ordering by decayed popularity, and an update only adds the
+# new events in (log-sum-exp).
+#
+# The aggregator folds interaction_events in by event_id, past the watermark
+# in popularity_watermark, so each run reads only new events:
+#   python app_cli/popularity.py              (every 30 s)
+#   python app_cli/popularity.py --once
+
+HALF_LIFE_HOURS = float(os.getenv("POPULARITY_HALF_LIFE_HOURS", "48"))
+IMPRESSION_WEIGHT = 0.1  # shown but neither liked nor read; added to preferences.signal
+# Events are folded in only once their transaction has had this long to
+# commit, so a slow insert with a lower event_id is never skipped
+COMMIT_MARGIN_SECONDS = 60
+BATCH_EVENTS = 10_000
+REFERENCE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+RATE = math.log(2) / (HALF_LIFE_HOURS * 3600)
+# Description of views created without asking the user: such views have
+# nothing to rank against until they collect interactions (cold start)
+DEFAULT_VIEW_DESCRIPTION = "Default view for your learning preferences"
+
+def get_connection():
+    return psycopg2.connect(
+        dbname=DB_NAME, user=DB_USER, password=DB_PASSWORD, host=DB_HOST, port=DB_PORT
+    )
+
+def log_weight(weight, at):
+    return math.log(weight) + RATE * (at - REFERENCE).total_seconds()
+
+def log_add(a, b):
+    """log(exp(a) + exp(b)) without overflow; None is log(0)."""
+    if a is None:
+        return b
+    hi, lo = max(a, b), min(a, b)
+    return hi + math.log1p(math.exp(lo - hi))
+
+def current_score(log_score, now=None):
+    """Decayed popularity now, in interaction-weight units."""
+    now = now or datetime.now(timezone.utc)
+    return math.exp(log_score - RATE * (now - REFERENCE).total_seconds())
+
+# ---------------------
+# Aggregator
+# ---------------------
+def aggregate(cur, limit=BATCH_EVENTS):
+    """Fold the next batch of events into article_popularity / category_popularity
+    and advance the watermark. Returns the number of events read; the caller
+    commits."""
+    cur.execute("SELECT last_event_id FROM popularity_watermark FOR UPDATE")
+    (last,) = cur.fetchone()
+    # Stop before the first event that may still have an open neighbour
+    cur.execute("""
+        SELECT e.event_id, e.article_guid, e.published, e.seconds_viewed, e.liked, e.created_at
+        FROM interaction_events e
+        WHERE e.event_id > %(last)s
+          AND e.event_id < COALESCE((
+              SELECT min(r.event_id) FROM interaction_events r
+              WHERE r.event_id > %(last)s AND r.recorded_at >= now() - make_interval(secs => %(margin)s)
+          ), 9223372036854775807)
+        ORDER BY e.event_id
+        LIMIT %(limit)s
+    """, {"last": last, "margin": COMMIT_MARGIN_SECONDS, "limit": limit})
+    events = cur.fetchall()
+    if not events:
+        return 0
+
+    per_article = {}
+    for _, guid, published, seconds, liked, at in events:
+        key = (guid, published)
+        per_article[key] = log_add(per_article.get(key), log_weight(signal(seconds, liked) + IMPRESSION_WEIGHT, at))
+    rows = [(guid, published, score) for (guid, published), score in per_article.items()]
+
+    execute_values(cur, """
+        INSERT INTO article_popularity AS p (article_id, article_guid, published, log_score)
+        SELECT a.article_id, a.guid, a.published, d.log_score
+        FROM (VALUES %s) AS d(guid, published, log_score)
+        JOIN articles a ON a.guid = d.guid AND a.published = d.published::timestamptz
+        ON CONFLICT (article_id) DO UPDATE SET
+            log_score = GREATEST(p.log_score, EXCLUDED.log_score)
+                      + ln(1 + exp(-abs(p.log_score - EXCLUDED.log_score)))
+    """, rows)
+
+    # Each article's batch score counts toward every one of its categories
+    category_rows = execute_values(cur, """
+        SELECT c.category_id, d.log_score
+        FROM (VALUES %s) AS d(guid, published, log_score)
+        JOIN categories c ON c.article_guid = d.guid AND c.published = d.published::timestamptz
+    """, rows, fetch=True)
+    per_category = defaultdict(lambda: None)
+    for category_id, score in category_rows:
+        per_category[category_id] = log_add(per_category[category_id], score)
+    if per_category:
+        execute_values(cur, """
+            INSERT INTO category_popularity AS p (category_id, log_score) VALUES %s
+            ON CONFLICT (category_id) DO UPDATE SET
+                log_score = GREATEST(p.log_score, EXCLUDED.log_score)
+                          + ln(1 + exp(-abs(p.log_score - EXCLUDED.log_score)))
+        """, sorted(per_category.items()))
+
+    cur.execute("UPDATE popularity_watermark SET last_event_id = %s", (events[-1][0],))
+    return len(events)
+
+def prune(cur, since):
+    """Drop scores of articles that left the feed window."""
+    cur.execute("DELETE FROM article_popularity WHERE published < %s", (since,))
+
+# ---------------------
+# Lookups
+# ---------------------
+def popular_posts(conn, view_id, k, since, after=None):
+    """Most popular recent posts in the view's categories (any category if the
+    view has none), best first. `after` is the (score, article_id) of the last
+    post already shown."""
+    keyset = "AND (p.log_score, p.article_id) < (%(after_score)s, %(after_id)s)" if after else ""
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute(f"""
+            SELECT a.guid, a.published, a.article_id, p.log_score AS score
+            FROM article_popularity p
+            JOIN articles a ON a.guid = p.article_guid AND a.published = p.published
+            WHERE p.published >= %(since)s AND a.published >= %(since)s
+              AND (NOT EXISTS (SELECT 1 FROM view_categories WHERE view_id = %(view_id)s)
+                   OR EXISTS (
+                       SELECT 1
+                       FROM categories c
+                       JOIN view_categories vc ON vc.category_id = c.category_id
+                       WHERE vc.view_id = %(view_id)s
+                         AND c.article_guid = a.guid AND c.published = a.published
+                         AND c.published >= %(since)s
+                   ))
+              {keyset}
+            ORDER BY p.log_score DESC, p.article_id DESC
+            LIMIT %(k)s
+        """, {"since": since, "view_id": view_id, "k": k,
+              "after_score": after[0] if after else None, "after_id": after[1] if after else None})
+        rows = cur.fetchall()
+    conn.commit()
+    return rows
+
+def popular_categories(cur, n):
+    """Ids of the n most popular categories."""
+    cur.execute("SELECT category_id FROM category_popularity ORDER BY log_score DESC LIMIT %s", (n,))
+    return [r[0] for r in cur.fetchall()]
+
+def main():
+    parser = argparse.ArgumentParser(description="Fold new interaction events into the popularity tables.")
+    parser.add_argument("--interval", type=float, default=30.0, help="seconds between runs")
+    parser.add_argument("--once", action="store_true", help="catch up once and exit")
+    args = parser.parse_args()
+
+    # Same window as the feeds (recommender.RECENT_WINDOW_DAYS)
+    window_days = int(os.getenv("RECENT_WINDOW_DAYS", "90"))
+    conn = get_connection()
+    try:
+        while True:
+            total = 0
+            with conn.cursor() as cur:
+                while True:
+                    count = aggregate(cur)
+                    conn.commit()
+                    total += count
+                    if count < BATCH_EVENTS:
+                        break
+                prune(cur, datetime.fromtimestamp(time.time() - window_days * 86400, timezone.utc))
+            conn.commit()
+            if total:
+                print(f"Folded in {total} events.")
+            if args.once:
+                break
+            time.sleep(args.interval)
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import numpy as np
+import psycopg2
+from psycopg2.extras import execute_values
+from pyroaring import BitMap
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "database_schemas" / "app"))
+from config import DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, EMBED_MODEL, EMBEDDING_MATRIX_DIR
+
+from diversity import mmr, normalize
+from embedding_matrix import EmbeddingMatrix, to_datetime
+from popularity import DEFAULT_VIEW_DESCRIPTION
+from preferences import blend, boosts_from_weights, decay, parse_vector
+from seen import seen_array
+
+# Batch job: rank every view ahead of time and write the top N into
+# feed_cache under the view's current key, so opening a feed is one indexed
+# read (see feed_cache.py). Views are grouped by category set; each group's
+# candidate rows are gathered from the memory-mapped embedding matrix once and
+# all of its views are scored with one matrix-matrix product. Groups are
+# spread over a process pool whose workers map the matrix once each.
+#
+#   python scripts/export_embeddings.py      (from database_schemas/, first)
+#   python app_cli/precompute_feeds.py --workers 8
+
+# Same defaults as the CLI (recommender.py / feed_cache.py)
+RECENT_WINDOW_DAYS = int(os.getenv("RECENT_WINDOW_DAYS", "90"))
+FEED_CACHE_SIZE = int(os.getenv("FEED_CACHE_SIZE", "200"))
+CHUNK_VIEWS = 256  # views per task; bounds the (candidates x views) score matrix
+
+def get_connection():
+    return psycopg2.connect(
+        dbname=DB_NAME, user=DB_USER, password=DB_PASSWORD, host=DB_HOST, port=DB_PORT
+    )
+
+# ---------------------
+# Worker side
+# ---------------------
+_matrix = None
+
+def _init_worker(root):
+    """Runs once per pool process: map the exported matrix."""
+    global _matrix
+    _matrix = EmbeddingMatrix.load(root)
+
+def _score_task(task):
+    """Score one chunk: [(category_ids, [(view_id, query, boosts, seen_bytes)])]."""
+    since, size, groups = task
+    results = []
+    for category_ids, views in groups:
+        cand = _matrix.candidates(category_ids, since)
+        if not len(cand["ids"]):
+            results.extend((view_id, [], [], [], []) for view_id, _, _, _ in views)
+            continue
+        queries = np.stack([query for _, query, _, _ in views]).astype(np.float32)
+        scores = cand["embeddings"] @ queries.T  # candidates x views
+        guids = np.char.decode(cand["guids"], "utf-8")
+        for j, (view_id, _, boosts, seen_bytes) in enumerate(views):
+            col = scores[:, j]
+            if boosts:
+                col = col + _matrix.category_bonus(cand["categories"], boosts)
+            if seen_bytes:
+                col = np.where(np.isin(cand["ids"], seen_array(BitMap.deserialize(seen_bytes))), -np.inf, col)
+            n = min(size, len(col))
+            best = np.argpartition(-col, n - 1)[:n]
+            best = best[np.argsort(-col[best])]
+            best = best[np.isfinite(col[best])]
+            # Same diversity re-ranking as the CLI; the export has no sources, so no caps
+            best = best[mmr(normalize(col[best]), cand["embeddings"][best])]
+            results.append((view_id, guids[best].tolist(), [to_datetime(p) for p in cand["published"][best]],
+                            cand["ids"][best].astype(int).tolist(), col[best].astype(float).tolist()))
+    return results
+
+# ---------------------
+# Main side
+# ---------------------
+def load_views(cur):
+    """Every view with a description embedding, its query vector, cache key and categories."""
+    cur.execute("""
+        SELECT v.view_id, v.version, v.embedding::text, v.pref_vector::text, v.pref_weight, v.pref_updated_at,
+               (SELECT COALESCE(sum(ce.epoch), 0)
+                FROM view_categories vc
+                JOIN category_epochs ce ON ce.category_id = vc.category_id
+                WHERE vc.view_id = v.view_id),
+               (SELECT array_agg(vc.category_id ORDER BY vc.category_id)
+                FROM view_categories vc WHERE vc.view_id = v.view_id),
+               v.description
+        FROM views v
+        WHERE v.embedding IS NOT NULL AND v.embedding_model = %s
+    """, (EMBED_MODEL,))
+    views = []
+    for view_id, version, vec, pref_vec, pref_weight, pref_updated_at, epoch, category_ids, description in cur.fetchall():
+        if not category_ids:
+            continue  # feeds are restricted to the view's categories
+        if (not description or description == DEFAULT_VIEW_DESCRIPTION) and not pref_weight:
+            continue  # cold start: served by popularity (recommender.ranked_pages)
+        query = parse_vector(vec)
+        if pref_vec is not None:
+            query = blend(query, parse_vector(pref_vec), pref_weight, pref_updated_at)
+        views.append((view_id, (version, int(epoch)), tuple(category_ids), query))
+    return views
+
+def load_boosts(cur):
+    now = datetime.now(timezone.utc)
+    cur.execute("SELECT view_id, category_id, weight, updated_at FROM view_category_weights")
+    weights = defaultdict(dict)
+    for view_id, cat_id, weight, updated_at in cur.fetchall():
+        weights[view_id][cat_id] = weight * decay((now - updated_at).total_seconds())
+    return {view_id: boosts_from_weights(w) for view_id, w in weights.items()}
+
+def load_seen(cur):
+    cur.execute("SELECT view_id, bitmap FROM view_seen")
+    return {view_id: bytes(data) for view_id, data in cur.fetchall()}
+
+def make_tasks(views, boosts, seen, since, size):
+    """Group views by category set and cut the groups into tasks of ~CHUNK_VIEWS views."""
+    groups = defaultdict(list)
+    for view_id, _, category_ids, query in views:
+        groups[category_ids].append((view_id, query, boosts.get(view_id), seen.get(view_id)))
+    tasks, current, count = [], [], 0
+    for category_ids, members in sorted(groups.items(), key=lambda g: -len(g[1])):
+        for i in range(0, len(members), CHUNK_VIEWS):
+            part = members[i:i + CHUNK_VIEWS]
+            current.append((list(category_ids), part))
+            count += len(part)
+            if count >= CHUNK_VIEWS:
+                tasks.append((since, size, current))
+                current, count = [], 0
+    if current:
+        tasks.append((since, size, current))
+    return tasks
+
+def write_feeds(conn, keys, results):
+    with conn.cursor() as cur:
+        execute_values(cur, """
+            INSERT INTO feed_cache (view_id, view_version, content_epoch, guids, published, article_ids, scores)
+            VALUES %s
+            ON CONFLICT (view_id) DO UPDATE SET
+                view_version = EXCLUDED.view_version,
+                content_epoch = EXCLUDED.content_epoch,
+                guids = EXCLUDED.guids,
+                published = EXCLUDED.published,
+                article_ids = EXCLUDED.article_ids,
+                scores = EXCLUDED.scores,
+                created_at = now(),
+                last_used_at = now()
+        """, [(view_id, keys[view_id][0], keys[view_id][1], guids, published, ids, scores)
+              for view_id, guids, published, ids, scores in results],
+            template="(%s, %s, %s, %s::text[], %s::timestamptz[], %s::int[], %s::real[])")
+    conn.commit()
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute top-N feeds for every view into feed_cache.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--size", type=int, default=FEED_CACHE_SIZE, help="posts per view")
+    parser.add_argument("--matrix", type=Path, default=EMBEDDING_MATRIX_DIR)
+    args = parser.parse_args()
+
+    matrix = EmbeddingMatrix.load(args.matrix)
+    if matrix is None or matrix.model != EMBED_MODEL:
+        print("No embedding export for the current model; run database_schemas/scripts/export_embeddings.py first.")
+        sys.exit(1)
+
+    start = time.time()
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            views = load_views(cur)
+            boosts = load_boosts(cur)
+            seen = load_seen(cur)
+        conn.commit()
+        keys = {view_id: key for view_id, key, _, _ in views}
+        since = datetime.now(timezone.utc) - timedelta(days=RECENT_WINDOW_DAYS)
+        tasks = make_tasks(views, boosts, seen, since, args.size)
+        print(f"{len(views)} views in {len(tasks)} tasks across {args.workers} workers")
+
+        written = 0
+        with ProcessPoolExecutor(
+            max_workers=args.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(str(args.matrix),),
+        ) as pool:
+            for future in as_completed([pool.submit(_score_task, task) for task in tasks]):
+                results = future.result()
+                write_feeds(conn, keys, results)
+                written += len(results)
+    finally:
+        conn.close()
+    print(f"Wrote {written} feeds in {time.time() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import json
+import os
+import sys
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+import numpy as np
+from psycopg2.extras import execute_values
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "database_schemas" / "app"))
+from vector_search import vector_literal
+
+# Online view personalization. Every liked or long-dwell post moves the view's
+# preference vector toward the article embedding with an exponentially decayed
+# average:
+#     d = 0.5 ** (elapsed / half-life)
+#     W' = W*d + s          v' = (v*W*d + s*e) / W'
+# where s is the interaction's signal and e the article embedding. Categories
+# get the same decayed weight W per (view, category). Each update only reads
+# and writes the current state, never the history, so personalization costs the
+# same however many interactions a view has.
+
+HALF_LIFE_DAYS = float(os.getenv("PREF_HALF_LIFE_DAYS", "14"))
+DWELL_SECONDS = int(os.getenv("PREF_DWELL_SECONDS", "30"))
+# How far the preference vector may pull a view away from its description,
+# and how much decayed weight it needs to get halfway there
+PREF_MIX = float(os.getenv("PREF_MIX", "0.7"))
+PREF_PRIOR_WEIGHT = float(os.getenv("PREF_PRIOR_WEIGHT", "3"))
+# Score bonus for the view's most-engaged category (others scale linearly)
+CATEGORY_BOOST = float(os.getenv("PREF_CATEGORY_BOOST", "0.05"))
+
+HALF_LIFE_SECONDS = HALF_LIFE_DAYS * 86400
+
+def signal(seconds, liked):
+    """Interaction strength: a like counts fully, a long read half."""
+    if liked:
+        return 1.0
+    if seconds >= DWELL_SECONDS:
+        return 0.5
+    return 0.0
+
+def decay(elapsed_seconds):
+    return 0.5 ** (max(elapsed_seconds, 0.0) / HALF_LIFE_SECONDS)
+
+def parse_vector(text):
+    return np.asarray(json.loads(text), dtype=np.float32) if text else None
+
+def blend(description_vec, pref_vec, pref_weight, pref_updated_at, now=None):
+    """Query vector for a view: its description embedding pulled toward the
+    preference vector in proportion to the (decayed) evidence behind it."""
+    if pref_vec is None or pref_weight <= 0:
+        return description_vec
+    now = now or datetime.now(timezone.utc)
+    weight = pref_weight * decay((now - pref_updated_at).total_seconds())
+    mix = PREF_MIX * weight / (weight + PREF_PRIOR_WEIGHT)
+    pref_unit = pref_vec / (np.linalg.norm(pref_vec) or 1.0)
+    query = (1 - mix) * description_vec + mix * pref_unit
+    return query / (np.linalg.norm(query) or 1.0)
+
+def category_weights(conn, view_id, now=None):
+    """category_id -> current decayed weight for a view."""
+    now = now or datetime.now(timezone.utc)
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT category_id, weight, updated_at FROM view_category_weights WHERE view_id = %s
+        """, (view_id,))
+        return {cat_id: weight * decay((now - updated_at).total_seconds())
+                for cat_id, weight, updated_at in cur.fetchall()}
+
+def category_boosts(conn, view_id):
+    """category_id -> additive score bonus, CATEGORY_BOOST for the top category."""
+    return boosts_from_weights(category_weights(conn, view_id))
+
+def boosts_from_weights(weights):
+    top = max(weights.values(), default=0.0)
+    if top <= 0:
+        return {}
+    return {cat_id: CATEGORY_BOOST * w / top for cat_id, w in weights.items() if w > 0}
+
+def update_preferences(cur, events):
+    """Fold one batch of (view_id, guid, published, seconds, liked, at) events
+    into the views' preference vectors and category weights."""
+    events = [e for e in events if signal(e[3], e[4]) > 0]
+    if not events:
+        return
+    events.sort(key=lambda e: e[5])
+    articles = list({(guid, published) for _, guid, published, _, _, _ in events})
+
+    cur.execute("""
+        SELECT a.guid, a.embedding::text
+        FROM articles a
+        JOIN unnest(%s::text[], %s::timestamptz[]) AS e(guid, published)
+          ON a.guid = e.guid AND a.published = e.published
+        WHERE a.embedding IS NOT NULL
+    """, ([g for g, _ in articles], [p for _, p in articles]))
+    embeddings = {guid: parse_vector(vec) for guid, vec in cur.fetchall()}
+
+    cur.execute("""
+        SELECT c.article_guid, c.category_id
+        FROM categories c
+        JOIN unnest(%s::text[], %s::timestamptz[]) AS e(guid, published)
+          ON c.article_guid = e.guid AND c.published = e.published
+    """, ([g for g, _ in articles], [p for _, p in articles]))
+    article_categories = defaultdict(list)
+    for guid, cat_id in cur.fetchall():
+        article_categories[guid].append(cat_id)
+
+    # Lock the views being updated so concurrent flushes don't lose updates
+    view_ids = sorted({e[0] for e in events})
+    cur.execute("""
+        SELECT view_id, pref_vector::text, pref_weight, pref_updated_at
+        FROM views WHERE view_id = ANY(%s) ORDER BY view_id FOR UPDATE
+    """, (view_ids,))
+    state = {view_id: [parse_vector(vec), weight, updated_at]
+             for view_id, vec, weight, updated_at in cur.fetchall()}
+
+    latest = {}  # view_id -> time of its newest event in the batch
+    changed = set()
+    for view_id, guid, _, seconds, liked, at in events:
+        latest[view_id] = at
+        if view_id not in state or guid not in embeddings:
+            continue
+        s = signal(seconds, liked)
+        vec, weight, updated_at = state[view_id]
+        d = decay((at - updated_at).total_seconds()) if updated_at else 0.0
+        new_weight = weight * d + s
+        if vec is None:
+            vec = embeddings[guid].copy()
+        else:
+            vec = (vec * (weight * d) + s * embeddings[guid]) / new_weight
+        state[view_id] = [vec, new_weight, at]
+        changed.add(view_id)
+
+    rows = [(view_id, vector_literal(state[view_id][0]), state[view_id][1], state[view_id][2])
+            for view_id in changed]
+    if rows:
+        execute_values(cur, """
+            UPDATE views v
+            SET pref_vector = d.vec::vector, pref_weight = d.weight, pref_updated_at = d.updated_at::timestamptz,
+                version = v.version + 1
+            FROM (VALUES %s) AS d(view_id, vec, weight, updated_at)
+            WHERE v.view_id = d.view_id
+        """, rows)
+
+    # Category weights: decay each event to the batch's newest event per view,
+    # sum per (view, category), then decay-and-add onto the stored weight.
+    increments = defaultdict(float)
+    for view_id, guid, _, seconds, liked, at in events:
+        s = signal(seconds, liked) * decay((latest[view_id] - at).total_seconds())
+        for cat_id in article_categories.get(guid, []):
+            increments[(view_id, cat_id)] += s
+    if increments:
+        execute_values(cur, f"""
+            INSERT INTO view_category_weights (view_id, category_id, weight, updated_at) VALUES %s
+            ON CONFLICT (view_id, category_id) DO UPDATE SET
+                weight = view_category_weights.weight * power(0.5, GREATEST(
+                    extract(epoch FROM EXCLUDED.updated_at - view_category_weights.updated_at), 0
+                ) / {HALF_LIFE_SECONDS}) + EXCLUDED.weight,
+                updated_at = GREATEST(EXCLUDED.updated_at, view_category_weights.updated_at)
+        """, [(v, c, w, latest[v]) for (v, c), w in increments.items()])
@@ -0,0 +1,366 @@
+import json
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import numpy as np
+from psycopg2.extras import RealDictCursor
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Shared DB helpers (embeddings, ranking index, vector search) live with the loaders
+sys.path.append(str(ROOT / "database_schemas" / "app"))
+from config import EMBED_DIM, EMBED_MODEL, EMBEDDING_MATRIX_DIR, HNSW_ITERATIVE_SCAN
+from embed import embed_text
+from ranking_index import RankingIndex
+from vector_search import configure_vector_search, vector_literal
+
+from diversity import MMR_LAMBDA, MMR_MAX_PER_CATEGORY, MMR_MAX_PER_SOURCE, codes, mmr, normalize
+from embedding_matrix import EmbeddingMatrix
+from popularity import DEFAULT_VIEW_DESCRIPTION, popular_posts
+from preferences import blend, category_boosts, parse_vector
+from seen import seen_array, seen_cache
+
+# Feeds only look at recent articles; older monthly partitions are pruned
+RECENT_WINDOW_DAYS = int(os.getenv("RECENT_WINDOW_DAYS", "90"))
+FEED_SIZE = int(os.getenv("FEED_SIZE", "100"))
+FEED_PAGE_SIZE = int(os.getenv("FEED_PAGE_SIZE", "10"))
+# Without an embedding matrix export, rank in the database with hybrid_candidates
+# (vector + full-text + category score); 0 falls back to pure vector search
+HYBRID_RETRIEVAL = os.getenv("HYBRID_RETRIEVAL", "1") == "1"
+HYBRID_POOL = int(os.getenv("HYBRID_POOL", "100"))  # rows each ranked list contributes
+# Weight of decayed popularity (popularity.py) next to relevance when re-ranking
+POPULARITY_BLEND = float(os.getenv("POPULARITY_BLEND", "0.2"))
+
+def recent_cutoff():
+    return datetime.now(timezone.utc) - timedelta(days=RECENT_WINDOW_DAYS)
+
+# ---------------------
+# View embeddings
+# ---------------------
+def refresh_view_embedding(conn, view_id, description):
+    """Embed the view description once and store it on the view."""
+    vec = vector_literal(embed_text(description or "", EMBED_MODEL))
+    with conn.cursor() as cur:
+        cur.execute("""
+            UPDATE views SET embedding = %s::vector, embedding_model = %s, version = version + 1
+            WHERE view_id = %s
+        """, (vec, EMBED_MODEL, view_id))
+    conn.commit()
+    return vec
+
+def update_view(conn, view_id, description=None, category_ids=None):
+    """Change a view's description and/or categories, keeping its embedding in sync."""
+    with conn.cursor() as cur:
+        cur.execute("UPDATE views SET version = version + 1 WHERE view_id = %s", (view_id,))
+        if description is not None:
+            cur.execute("UPDATE views SET description = %s WHERE view_id = %s", (description, view_id))
+        if category_ids is not None:
+            cur.execute("DELETE FROM view_categories WHERE view_id = %s", (view_id,))
+            for category_id in category_ids:
+                cur.execute("""
+                    INSERT INTO view_categories (view_id, category_id) VALUES (%s, %s)
+                    ON CONFLICT (view_id, category_id) DO NOTHING
+                """, (view_id, category_id))
+    conn.commit()
+    if description is not None:
+        refresh_view_embedding(conn, view_id, description)
+
+def get_view_vector(conn, view_id):
+    """Query vector for a view (pgvector text form): the description embedding
+    blended with the view's learned preference vector. Views from before
+    embeddings, or from another model, are embedded on first use."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT embedding::text, embedding_model, description,
+                   pref_vector::text, pref_weight, pref_updated_at
+            FROM views WHERE view_id = %s
+        """, (view_id,))
+        row = cur.fetchone()
+    if row is None:
+        return None
+    vec, model, description, pref_vec, pref_weight, pref_updated_at = row
+    if vec is None or model != EMBED_MODEL:
+        vec = refresh_view_embedding(conn, view_id, description)
+    if pref_vec is None:
+        return vec
+    return vector_literal(blend(parse_vector(vec), parse_vector(pref_vec), pref_weight, pref_updated_at))
+
+# ---------------------
+# Candidate retrieval
+# ---------------------
+def recommend_by_vector(conn, view_id, view_vec, k=FEED_SIZE, since=None, exclude=None):
+    """Next k posts in the view's categories by cosine distance to the view vector,
+    served by the ANN index on articles.embedding. `exclude` holds the guids
+    already shown: the query orders by distance alone (a keyset predicate or a
+    second sort key would turn the index scan into an exact sort), reads
+    len(exclude) + k rows and the shown ones are skipped here. Iterative scan
+    lets deep pages reach past ef_search."""
+    since = since or recent_cutoff()
+    exclude = exclude or set()
+    limit = len(exclude) + k
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        configure_vector_search(cur, ef_search=min(max(limit, 40), 1000), local=True,
+                                iterative_scan=HNSW_ITERATIVE_SCAN or "relaxed_order")
+        cur.execute("""
+            SELECT a.guid, a.published, a.article_id, a.embedding <=> %(vec)s::vector AS distance
+            FROM articles a
+            WHERE a.published >= %(since)s
+              AND a.embedding IS NOT NULL
+              AND EXISTS (
+                  SELECT 1
+                  FROM categories c
+                  JOIN view_categories vc ON vc.category_id = c.category_id
+                  WHERE vc.view_id = %(view_id)s
+                    AND c.article_guid = a.guid AND c.published = a.published
+                    AND c.published >= %(since)s
+              )
+            ORDER BY a.embedding <=> %(vec)s::vector
+            LIMIT %(limit)s
+        """, {"vec": view_vec, "since": since, "view_id": view_id, "limit": limit})
+        rows = cur.fetchall()
+    conn.commit()  # end the transaction holding the SET LOCAL knobs
+    # relaxed_order may return rows slightly out of order
+    rows.sort(key=lambda r: r['distance'])
+    return [r for r in rows if r['guid'] not in exclude][:k]
+
+def recommend_hybrid(conn, view_id, view_vec, description, k=FEED_SIZE, since=None, pool=None,
+                     exclude=None):
+    """Next k posts by hybrid_candidates (schema.sql): reciprocal-rank fusion
+    of vector distance, full-text rank of the view description and classifier
+    category score, computed in one query next to the indexes. Each list
+    contributes `pool` rows; keep it fixed while paging, since a larger pool
+    changes the fused scores of posts already served. `exclude` holds the
+    guids already shown; they are skipped here."""
+    since = since or recent_cutoff()
+    pool = pool or max(HYBRID_POOL, k)
+    exclude = exclude or set()
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        configure_vector_search(cur, ef_search=min(max(pool, 40), 1000), local=True)
+        cur.execute("""
+            SELECT guid, published, article_id, score
+            FROM hybrid_candidates(%s, %s::vector, %s, %s, %s, %s)
+        """, (view_id, view_vec, description or "", since, len(exclude) + k, pool))
+        rows = cur.fetchall()
+    conn.commit()  # end the transaction holding the SET LOCAL knobs
+    return [r for r in rows if r['guid'] not in exclude][:k]
+
+def recommend_from_matrix(conn, view_id, view_vec, matrix, k=FEED_SIZE, since=None, served=0, exclude=None):
+    """Same ranking as recommend_by_vector, scored in process against the exported
+    embedding matrix, plus the view's learned category boosts; the database is
+    only asked for the view's categories and weights. Returns the k posts after
+    the first `served`, skipping article ids in `exclude`."""
+    since = since or recent_cutoff()
+    with conn.cursor() as cur:
+        cur.execute("SELECT category_id FROM view_categories WHERE view_id = %s", (view_id,))
+        category_ids = [r[0] for r in cur.fetchall()]
+    hits = matrix.top_k(json.loads(view_vec), k=served + k, category_ids=category_ids, since=since,
+                        category_boosts=category_boosts(conn, view_id), exclude=exclude)
+    return [{"guid": guid, "published": published, "article_id": article_id, "distance": 1.0 - score}
+            for guid, article_id, published, score in hits[served:]]
+
+def get_posts_for_view(conn, view_id, since=None):
+    """Candidate posts for a view: ids and LLM title only. Bodies are fetched a
+    page at a time with fetch_posts."""
+    since = since or recent_cutoff()
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        # published is repeated on every table so each one prunes to the window
+        cur.execute("""
+            SELECT a.guid,
+                   a.published,
+                   a.article_id,
+                   llm.title AS llm_title
+            FROM articles a
+            JOIN llm_content llm
+              ON llm.article_guid = a.guid AND llm.published = a.published
+            WHERE a.published >= %s AND llm.published >= %s
+              AND EXISTS (
+                  SELECT 1
+                  FROM view_categories vc
+                  JOIN categories c ON c.category_id = vc.category_id
+                  WHERE vc.view_id = %s
+                    AND c.article_guid = a.guid AND c.published = a.published
+                    AND c.published >= %s
+              )
+        """, (since, since, view_id, since))
+        return cur.fetchall()
+
+def fetch_posts(conn, posts):
+    """Fill in LLM title and content for one page of ranked posts, in one query.
+    Posts without LLM content are dropped."""
+    if not posts:
+        return []
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT llm.article_guid, llm.title, llm.content
+            FROM llm_content llm
+            JOIN unnest(%s::text[], %s::timestamptz[]) AS page(guid, published)
+              ON llm.article_guid = page.guid AND llm.published = page.published
+            WHERE llm.published >= %s
+        """, ([p['guid'] for p in posts], [p['published'] for p in posts],
+              min(p['published'] for p in posts)))
+        bodies = {guid: (title, content) for guid, title, content in cur.fetchall()}
+    conn.commit()
+    return [dict(p, llm_title=bodies[p['guid']][0], content=bodies[p['guid']][1])
+            for p in posts if p['guid'] in bodies]
+
+# ---------------------
+# Ranking
+# ---------------------
+_ranking_index = None
+
+def get_ranking_index():
+    global _ranking_index
+    if _ranking_index is None:
+        _ranking_index = RankingIndex.load()
+    return _ranking_index
+
+_embedding_matrix = None
+_embedding_matrix_version = None
+
+def get_embedding_matrix():
+    """The exported embedding matrix, if there is one for the current model.
+    Remapped when scripts/export_embeddings.py publishes a new export or
+    delta, so long-running processes (server, CLI sessions) pick it up."""
+    global _embedding_matrix, _embedding_matrix_version
+    version = EmbeddingMatrix.manifest_version(EMBEDDING_MATRIX_DIR)
+    if version != _embedding_matrix_version:
+        try:
+            matrix = EmbeddingMatrix.load(EMBEDDING_MATRIX_DIR)
+        except FileNotFoundError:
+            return _embedding_matrix  # segments swapped mid-load; retry on the next call
+        _embedding_matrix = matrix if matrix is not None and matrix.model == EMBED_MODEL else None
+        _embedding_matrix_version = version
+    return _embedding_matrix
+
+def rank_posts(description, posts):
+    if not posts:
+        return []
+    index = get_ranking_index()
+    if index is not None:
+        # Persisted index: transform the description, one sparse dot product
+        scores = index.score(description, [p['guid'] for p in posts])
+    else:
+        # Index not built yet (python database_schemas/app/ranking_index.py build)
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.metrics.pairwise import cosine_similarity
+        documents = [p['llm_title'] or "" for p in posts]
+        vectorizer = TfidfVectorizer(stop_words='english')
+        tfidf_matrix = vectorizer.fit_transform(documents)
+        user_vector = vectorizer.transform([description])
+        scores = cosine_similarity(user_vector, tfidf_matrix)[0]
+    return [posts[i] for i in scores.argsort()[::-1]]
+
+def diversify(conn, posts):
+    """Re-rank one batch of ranked posts: relevance blended with decayed
+    popularity, then MMR, capping posts per source and per top category.
+    Embeddings, labels and popularity for the batch come from one query."""
+    if len(posts) < 2 or (MMR_LAMBDA >= 1.0 and not POPULARITY_BLEND
+                          and MMR_MAX_PER_SOURCE <= 0 and MMR_MAX_PER_CATEGORY <= 0):
+        return posts
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT a.guid, a.embedding::text, a.source,
+                   (SELECT c.category_id FROM categories c
+                    WHERE c.article_guid = a.guid AND c.published = a.published
+                    ORDER BY c.score DESC NULLS LAST LIMIT 1),
+                   pop.log_score
+            FROM articles a
+            JOIN unnest(%s::text[], %s::timestamptz[]) AS page(guid, published)
+              ON a.guid = page.guid AND a.published = page.published
+            LEFT JOIN article_popularity pop ON pop.article_id = a.article_id
+            WHERE a.published >= %s
+        """, ([p['guid'] for p in posts], [p['published'] for p in posts],
+              min(p['published'] for p in posts)))
+        meta = {guid: rest for guid, *rest in cur.fetchall()}
+    conn.commit()
+    rows = [meta.get(p['guid'], (None, None, None, None)) for p in posts]
+    # Articles without an embedding are similar to nothing
+    embeddings = np.stack([parse_vector(vec) if vec else np.zeros(EMBED_DIM, dtype=np.float32)
+                           for vec, _, _, _ in rows])
+    relevance = normalize([p['score'] if 'score' in p else -p['distance'] if 'distance' in p else -rank
+                           for rank, p in enumerate(posts)])
+    scored = [pop for _, _, _, pop in rows if pop is not None]
+    if POPULARITY_BLEND and scored:
+        # Never-interacted posts rank as the least popular in the batch
+        relevance += POPULARITY_BLEND * normalize([min(scored) if pop is None else pop for _, _, _, pop in rows])
+    caps = [(codes([source for _, source, _, _ in rows]), MMR_MAX_PER_SOURCE),
+            (codes([category_id for _, _, category_id, _ in rows]), MMR_MAX_PER_CATEGORY)]
+    return [posts[i] for i in mmr(relevance, embeddings, caps=caps)]
+
+def is_cold_start(conn, view_id, description):
+    """Nothing to personalize on yet: no real description and no interactions."""
+    if description and description.strip() and description != DEFAULT_VIEW_DESCRIPTION:
+        return False
+    with conn.cursor() as cur:
+        cur.execute("SELECT pref_weight FROM views WHERE view_id = %s", (view_id,))
+        row = cur.fetchone()
+    return row is None or not row[0]
+
+def ranked_pages(conn, view_id, description, page_size=FEED_PAGE_SIZE):
+    """Yield a view's ranked, not yet seen posts as pages of ids (guid,
+    published, article_id), best first. Only one page of ids is produced per
+    step. Cold-start views get the most popular posts; with a view vector each
+    page is a matrix slice, a hybrid_candidates query or a vector query;
+    otherwise the category candidates are ranked once with the TF-IDF index
+    and sliced. Seen posts are subtracted in process with the view's bitmap,
+    and each page is re-ranked (diversify)."""
+    seen = seen_cache.get(conn, view_id)
+    yielded = 0
+    if is_cold_start(conn, view_id, description):
+        after = None
+        while True:
+            rows = popular_posts(conn, view_id, k=page_size, since=recent_cutoff(), after=after)
+            if not rows:
+                break
+            after = (rows[-1]['score'], rows[-1]['article_id'])
+            page = [r for r in rows if r['article_id'] not in seen]
+            if page:
+                yield diversify(conn, page)
+                yielded += len(page)
+        if yielded:
+            return
+    view_vec = get_view_vector(conn, view_id)
+    if view_vec is not None:
+        matrix = get_embedding_matrix()
+        if matrix is not None:
+            exclude = seen_array(seen)
+            while True:
+                page = recommend_from_matrix(conn, view_id, view_vec, matrix, k=page_size,
+                                             served=yielded, exclude=exclude)
+                if not page:
+                    break
+                yield diversify(conn, page)
+                yielded += len(page)
+        elif HYBRID_RETRIEVAL:
+            # One pool for the whole session so the fused order stays put between pages
+            fetched, pool = set(), max(HYBRID_POOL, page_size)
+            while True:
+                rows = recommend_hybrid(conn, view_id, view_vec, description, k=page_size,
+                                        pool=pool, exclude=fetched)
+                if not rows:
+                    break
+                fetched.update(r['guid'] for r in rows)
+                page = [r for r in rows if r['article_id'] not in seen]
+                if page:
+                    yield diversify(conn, page)
+                    yielded += len(page)
+        else:
+            fetched = set()
+            while True:
+                rows = recommend_by_vector(conn, view_id, view_vec, k=page_size, exclude=fetched)
+                if not rows:
+                    break
+                fetched.update(r['guid'] for r in rows)
+                page = [r for r in rows if r['article_id'] not in seen]
+                if page:
+                    yield diversify(conn, page)
+                    yielded += len(page)
+        if yielded:
+            return
+    # No view vector or no embedded articles in range
+    posts = [p for p in get_posts_for_view(conn, view_id) if p['article_id'] not in seen]
+    ranked = rank_posts(description, posts)
+    conn.commit()
+    for i in range(0, len(ranked), page_size):
+        yield diversify(conn, ranked[i:i + page_size])
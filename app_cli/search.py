@@ -0,0 +1,58 @@
+from psycopg2.extras import RealDictCursor
+
+from recommender import FEED_PAGE_SIZE, recent_cutoff
+
+# Free-text search over the weighted article_bodies.search_tsv document
+# (title A, LLM title B, content C; GIN indexed). Queries use web-search
+# syntax ("quoted phrases", or, -exclusions), results are ordered by
+# ts_rank_cd and paged by keyset on (rank, guid). Snippets are built with
+# ts_headline only for the rows of the page being returned.
+
+HEADLINE_OPTIONS = "MaxFragments=2, MaxWords=25, MinWords=10, StartSel=[, StopSel=]"
+
+def search_posts(conn, query, limit=FEED_PAGE_SIZE, after=None, since=None):
+    """One page of matches for `query`, best first. `after` is the (rank, guid)
+    of the last result already shown."""
+    since = since or recent_cutoff()
+    keyset = "AND (ts_rank_cd(b.search_tsv, q.query), b.article_guid) < (%(after_rank)s::real, %(after_guid)s)" if after else ""
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute(f"""
+            WITH q AS (SELECT websearch_to_tsquery('english', %(query)s) AS query),
+            hits AS (
+                SELECT b.article_guid, b.published, ts_rank_cd(b.search_tsv, q.query) AS rank
+                FROM article_bodies b, q
+                WHERE b.published >= %(since)s
+                  AND b.search_tsv @@ q.query
+                  {keyset}
+                ORDER BY rank DESC, b.article_guid DESC
+                LIMIT %(limit)s
+            )
+            SELECT h.article_guid AS guid, h.published, a.article_id, h.rank,
+                   coalesce(llm.title, a.title) AS title,
+                   ts_headline('english', coalesce(b.content, ''), q.query, %(headline)s) AS snippet
+            FROM hits h
+            CROSS JOIN q
+            JOIN articles a ON a.guid = h.article_guid AND a.published = h.published
+            JOIN article_bodies b ON b.article_guid = h.article_guid AND b.published = h.published
+            LEFT JOIN llm_content llm
+              ON llm.article_guid = h.article_guid AND llm.published = h.published
+             AND llm.published >= %(since)s
+            WHERE a.published >= %(since)s AND b.published >= %(since)s
+            ORDER BY h.rank DESC, h.article_guid DESC
+        """, {"query": query, "since": since, "limit": limit, "headline": HEADLINE_OPTIONS,
+              "after_rank": after[0] if after else None, "after_guid": after[1] if after else None})
+        rows = cur.fetchall()
+    conn.commit()
+    return rows
+
+def search_pages(conn, query, page_size=FEED_PAGE_SIZE):
+    """Yield pages of search results until the matches run out."""
+    after = None
+    while True:
+        page = search_posts(conn, query, limit=page_size, after=after)
+        if not page:
+            return
+        yield page
+        if len(page) < page_size:
+            return
+        after = (page[-1]['rank'], page[-1]['guid'])
@@ -0,0 +1,75 @@
+import threading
+import numpy as np
+from psycopg2 import Binary
+from psycopg2.extras import execute_values
+from pyroaring import BitMap
+
+# Per-view sets of already-shown articles, as roaring bitmaps over the dense
+# articles.article_id. They are persisted in view_seen (one row per view),
+# loaded once per process and kept current by the interaction flush, so
+# candidate generation excludes seen posts with an in-memory set operation
+# instead of a growing join in every query.
+
+class SeenCache:
+    def __init__(self):
+        self._bitmaps = {}
+        self._lock = threading.Lock()
+
+    def get(self, conn, view_id) -> BitMap:
+        bitmap = self._bitmaps.get(view_id)
+        if bitmap is None:
+            with conn.cursor() as cur:
+                cur.execute("SELECT bitmap FROM view_seen WHERE view_id = %s", (view_id,))
+                row = cur.fetchone()
+            bitmap = BitMap.deserialize(bytes(row[0])) if row else BitMap()
+            with self._lock:
+                bitmap = self._bitmaps.setdefault(view_id, bitmap)
+        return bitmap
+
+    def peek(self, view_id):
+        """The cached bitmap, or None if this process hasn't loaded it."""
+        return self._bitmaps.get(view_id)
+
+    def put(self, view_id, bitmap: BitMap):
+        # Replace rather than mutate: readers may be iterating the old bitmap
+        with self._lock:
+            self._bitmaps[view_id] = bitmap
+
+    def clear(self):
+        with self._lock:
+            self._bitmaps.clear()
+
+
+seen_cache = SeenCache()
+
+def seen_array(bitmap: BitMap) -> np.ndarray:
+    """Sorted uint32 ids, for vectorized exclusion (np.isin) over many rows."""
+    return np.asarray(bitmap.to_array(), dtype=np.uint32)
+
+def add_seen(cur, seen_by_view: dict):
+    """Merge {view_id: article ids} into the stored bitmaps (and the process cache)."""
+    seen_by_view = {v: ids for v, ids in seen_by_view.items() if ids}
+    if not seen_by_view:
+        return
+    view_ids = sorted(seen_by_view)
+    # Create missing rows first so every view's row can be locked
+    execute_values(cur, """
+        INSERT INTO view_seen (view_id, bitmap) VALUES %s ON CONFLICT (view_id) DO NOTHING
+    """, [(v, Binary(BitMap().serialize())) for v in view_ids])
+    cur.execute("""
+        SELECT view_id, bitmap FROM view_seen WHERE view_id = ANY(%s) ORDER BY view_id FOR UPDATE
+    """, (view_ids,))
+    merged = {}
+    for view_id, data in cur.fetchall():
+        bitmap = BitMap.deserialize(bytes(data))
+        bitmap.update(seen_by_view[view_id])
+        merged[view_id] = bitmap
+    execute_values(cur, """
+        UPDATE view_seen s SET bitmap = d.bitmap, updated_at = now()
+        FROM (VALUES %s) AS d(view_id, bitmap)
+        WHERE s.view_id = d.view_id
+    """, [(v, Binary(b.serialize())) for v, b in merged.items()])
+    # Cached before commit: a failed flush is retried with the same events,
+    # so the cache is at most briefly ahead of the table.
+    for view_id, bitmap in merged.items():
+        seen_cache.put(view_id, bitmap)
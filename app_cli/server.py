@@ -0,0 +1,341 @@
+import asyncio
+import math
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+import asyncpg
+import psycopg2
+from aiohttp import web
+from psycopg2.pool import ThreadedConnectionPool
+from pyroaring import BitMap
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "database_schemas" / "app"))
+from config import DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT
+
+from cohorts import cohort_keys
+from feed_cache import FEED_CACHE_SIZE, cache_key, store_cached
+from interactions import InteractionRecorder
+from recommender import FEED_PAGE_SIZE, get_view_vector, ranked_pages, recent_cutoff
+from seen import seen_cache
+
+# Async HTTP service over the same recommendation logic as the CLI.
+#
+# Request handlers run on asyncpg with a connection pool and a per-request
+# timeout. A feed page is read from feed_cache (one indexed row), minus the
+# view's seen set, plus one query for the page's bodies. A cache miss starts
+# the ranking code (recommender.ranked_pages, psycopg2) in the background on a
+# bounded thread pool, one job per view, and never holds a pooled connection
+# while it runs. A new view's miss is answered from its cohort feed
+# (cohorts.py) at once; other misses wait up to MISS_WAIT_SECONDS for the
+# ranking and fall back to the view's most popular posts (popularity.py).
+# Views are created without their embedding; the description is embedded by
+# the background ranking job, never inside a request. Interaction events go
+# to the write-behind InteractionRecorder. SIGINT/SIGTERM stop accepting
+# requests, let in-flight ones finish, flush pending interactions and close
+# the pools.
+#
+#   python app_cli/server.py
+#   POST /users                      {"username", "name", "sex", "occupation", "industry"}
+#   POST /users/{user_id}/views      {"name", "description", "categories": [labels]}
+#   GET  /views/{view_id}/feed       ?limit=10&after=<guid>
+#   POST /views/{view_id}/events     {"guid", "published", "seconds", "liked"}
+
+SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8080"))
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "2"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "20"))
+REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT_SECONDS", "5"))
+# Cache misses (ranking and description embeddings) run on this many threads
+RANK_WORKERS = int(os.getenv("RANK_WORKERS", "4"))
+# How long a miss waits for its ranking before serving popular posts; keep
+# well under REQUEST_TIMEOUT
+MISS_WAIT_SECONDS = float(os.getenv("MISS_WAIT_SECONDS", "2"))
+MAX_PAGE_SIZE = 50
+
+DSN = dict(database=DB_NAME, user=DB_USER, password=DB_PASSWORD, host=DB_HOST, port=DB_PORT)
+
+# ---------------------
+# Sync side (thread pool)
+# ---------------------
+def connect():
+    return psycopg2.connect(dbname=DB_NAME, user=DB_USER, password=DB_PASSWORD, host=DB_HOST, port=DB_PORT)
+
+@contextmanager
+def pooled(app):
+    conn = app["pg_pool"].getconn()
+    try:
+        yield conn
+    finally:
+        conn.rollback()
+        app["pg_pool"].putconn(conn)
+
+def rank_and_cache(app, view_id, description):
+    """Cache miss: rank the view's top FEED_CACHE_SIZE ids and store them."""
+    with pooled(app) as conn:
+        # Embed a new view first: that bumps views.version, which the key must include
+        if get_view_vector(conn, view_id) is None:
+            return
+        key = cache_key(conn, view_id)
+        if key is None:
+            return
+        pages = ranked_pages(conn, view_id, description, page_size=FEED_CACHE_SIZE)
+        store_cached(conn, view_id, key, next(pages, []))
+        pages.close()
+
+def schedule_ranking(app, view_id, description):
+    """Start rank_and_cache for a view on the thread pool, or return the job
+    already running for it."""
+    job = app["ranking"].get(view_id)
+    if job is None:
+        job = asyncio.get_running_loop().run_in_executor(
+            app["executor"], rank_and_cache, app, view_id, description)
+        app["ranking"][view_id] = job
+        job.add_done_callback(lambda done: ranking_done(app, view_id, done))
+    return job
+
+def ranking_done(app, view_id, job):
+    app["ranking"].pop(view_id, None)
+    if not job.cancelled() and job.exception() is not None:
+        print(f"Ranking view {view_id} failed: {job.exception()!r}")
+
+# ---------------------
+# Handlers
+# ---------------------
+async def create_user(request):
+    body = await request.json()
+    if not body.get("username") or not body.get("name"):
+        raise web.HTTPBadRequest(text="username and name are required")
+    async with request.app["db"].acquire() as conn:
+        try:
+            user_id = await conn.fetchval("""
+                INSERT INTO users (username, name, sex, occupation, industry)
+                VALUES ($1, $2, $3, $4, $5) RETURNING user_id
+            """, body["username"], body["name"], body.get("sex"), body.get("occupation"),
+                body.get("industry"), timeout=REQUEST_TIMEOUT)
+        except asyncpg.UniqueViolationError:
+            raise web.HTTPConflict(text="username already exists")
+    return web.json_response({"user_id": user_id}, status=201)
+
+async def create_view(request):
+    user_id = int(request.match_info["user_id"])
+    body = await request.json()
+    description = body.get("description") or ""
+    labels = body.get("categories") or []
+    async with request.app["db"].acquire() as conn:
+        if not await conn.fetchval("SELECT EXISTS (SELECT 1 FROM users WHERE user_id = $1)", user_id,
+                                   timeout=REQUEST_TIMEOUT):
+            raise web.HTTPNotFound(text="no such user")
+        ids = await conn.fetch(
+            "SELECT label, category_id FROM category_labels WHERE label = ANY($1::text[])",
+            labels, timeout=REQUEST_TIMEOUT)
+        unknown = set(labels) - {r["label"] for r in ids}
+        if unknown:
+            raise web.HTTPBadRequest(text=f"unknown categories: {sorted(unknown)}")
+        async with conn.transaction():
+            view_id = await conn.fetchval("""
+                INSERT INTO views (user_id, name, description) VALUES ($1, $2, $3) RETURNING view_id
+            """, user_id, body.get("name") or "default", description, timeout=REQUEST_TIMEOUT)
+            await conn.executemany(
+                "INSERT INTO view_categories (view_id, category_id) VALUES ($1, $2) ON CONFLICT DO NOTHING",
+                [(view_id, r["category_id"]) for r in ids], timeout=REQUEST_TIMEOUT)
+    # Embeds the description and ranks the first feed off the request path
+    schedule_ranking(request.app, view_id, description)
+    return web.json_response({"view_id": view_id}, status=201)
+
+async def load_seen(conn, view_id):
+    data = await conn.fetchval("SELECT bitmap FROM view_seen WHERE view_id = $1", view_id,
+                               timeout=REQUEST_TIMEOUT)
+    bitmap = BitMap.deserialize(data) if data else BitMap()
+    seen_cache.put(view_id, bitmap)
+    return bitmap
+
+async def get_feed(request):
+    view_id = int(request.match_info["view_id"])
+    limit = min(int(request.query.get("limit", FEED_PAGE_SIZE)), MAX_PAGE_SIZE)
+    after = request.query.get("after")
+
+    async with request.app["db"].acquire() as conn:
+        view = await conn.fetchrow("SELECT description FROM views WHERE view_id = $1", view_id,
+                                   timeout=REQUEST_TIMEOUT)
+        if view is None:
+            raise web.HTTPNotFound(text="no such view")
+        seen = seen_cache.peek(view_id)
+        if seen is None:
+            seen = await load_seen(conn, view_id)
+        cached = await read_cache(conn, view_id)
+        # New view: answer from its cohort feed while its own is ranked
+        fallback = await read_cohort(conn, view_id) if cached is None and not seen else None
+
+    since = recent_cutoff()
+    if cached is None:
+        # Rank in the background; the connection is back in the pool meanwhile
+        job = schedule_ranking(request.app, view_id, view["description"])
+        if fallback is None:
+            try:
+                await asyncio.wait_for(asyncio.shield(job), MISS_WAIT_SECONDS)
+            except Exception:
+                pass  # still running, or failed (logged by ranking_done): serve popular posts
+            async with request.app["db"].acquire() as conn:
+                if job.done():
+                    cached = await read_cache(conn, view_id)
+                if cached is None:
+                    fallback = await read_popular(conn, view_id, since)
+        cached = cached or fallback or {"guids": [], "published": [], "article_ids": [], "scores": []}
+
+    ranked = [(g, p, s) for g, p, i, s in zip(cached["guids"], cached["published"],
+                                               cached["article_ids"], cached["scores"])
+              if i not in seen and p >= since]
+    # Keyset: continue after the last guid the client has (position in the ranking)
+    start = next((n + 1 for n, (g, _, _) in enumerate(ranked) if g == after), 0) if after else 0
+    page = ranked[start:start + limit]
+
+    async with request.app["db"].acquire() as conn:
+        bodies = await conn.fetch("""
+            SELECT llm.article_guid, llm.title, llm.content
+            FROM llm_content llm
+            JOIN unnest($1::text[], $2::timestamptz[]) AS page(guid, published)
+              ON llm.article_guid = page.guid AND llm.published = page.published
+            WHERE llm.published >= $3
+        """, [g for g, _, _ in page], [p for _, p, _ in page], since, timeout=REQUEST_TIMEOUT)
+    by_guid = {r["article_guid"]: r for r in bodies}
+    posts = [{"guid": g, "published": p.isoformat(), "score": s,
+              "title": by_guid[g]["title"], "content": by_guid[g]["content"]}
+             for g, p, s in page if g in by_guid]
+    more = start + limit < len(ranked)
+    return web.json_response({"posts": posts, "next": page[-1][0] if page and more else None})
+
+async def read_cache(conn, view_id):
+    """The view's feed_cache entry if it matches the current key (see feed_cache.py)."""
+    return await conn.fetchrow("""
+        UPDATE feed_cache f SET last_used_at = now()
+        FROM views v
+        WHERE f.view_id = $1 AND v.view_id = f.view_id
+          AND f.view_version = v.version
+          AND f.content_epoch = (
+              SELECT COALESCE(sum(ce.epoch), 0)
+              FROM view_categories vc
+              JOIN category_epochs ce ON ce.category_id = vc.category_id
+              WHERE vc.view_id = v.view_id
+          )
+        RETURNING f.guids, f.published, f.article_ids, f.scores
+    """, view_id, timeout=REQUEST_TIMEOUT)
+
+async def read_cohort(conn, view_id):
+    """The best matching cohort_feeds entry for the view (see cohorts.py)."""
+    view = await conn.fetchrow("""
+        SELECT u.occupation, u.industry,
+               ARRAY(SELECT vc.category_id FROM view_categories vc WHERE vc.view_id = v.view_id) AS category_ids
+        FROM views v JOIN users u ON u.user_id = v.user_id
+        WHERE v.view_id = $1
+    """, view_id, timeout=REQUEST_TIMEOUT)
+    if view is None or not view["category_ids"]:
+        return None
+    (occupation, industry, categories), broad = cohort_keys(view["occupation"], view["industry"],
+                                                            view["category_ids"])
+    return await conn.fetchrow("""
+        SELECT guids, published, article_ids, scores
+        FROM cohort_feeds
+        WHERE (occupation, industry, category_ids) IN (($1, $2, $3::smallint[]), ($4, $5, $6::smallint[]))
+        ORDER BY occupation = '' AND industry = ''
+        LIMIT 1
+    """, occupation, industry, list(categories), broad[0], broad[1], list(broad[2]), timeout=REQUEST_TIMEOUT)
+
+async def read_popular(conn, view_id, since):
+    """The view's most popular recent posts as a feed entry, or None
+    (popularity.popular_posts on asyncpg)."""
+    rows = await conn.fetch("""
+        SELECT a.guid, a.published, a.article_id, p.log_score
+        FROM article_popularity p
+        JOIN articles a ON a.guid = p.article_guid AND a.published = p.published
+        WHERE p.published >= $2 AND a.published >= $2
+          AND (NOT EXISTS (SELECT 1 FROM view_categories WHERE view_id = $1)
+               OR EXISTS (
+                   SELECT 1
+                   FROM categories c
+                   JOIN view_categories vc ON vc.category_id = c.category_id
+                   WHERE vc.view_id = $1
+                     AND c.article_guid = a.guid AND c.published = a.published
+                     AND c.published >= $2
+               ))
+        ORDER BY p.log_score DESC, p.article_id DESC
+        LIMIT $3
+    """, view_id, since, FEED_CACHE_SIZE, timeout=REQUEST_TIMEOUT)
+    if not rows:
+        return None
+    return {"guids": [r["guid"] for r in rows], "published": [r["published"] for r in rows],
+            "article_ids": [r["article_id"] for r in rows], "scores": [r["log_score"] for r in rows]}
+
+async def record_event(request):
+    try:
+        view_id = int(request.match_info["view_id"])
+        body = await request.json()
+        guid, published = body["guid"], datetime.fromisoformat(body["published"])
+        seconds, liked = body.get("seconds", 0), body.get("liked", False)
+        if (not isinstance(guid, str) or not guid or not isinstance(liked, bool)
+                or isinstance(seconds, bool) or not isinstance(seconds, (int, float))
+                or not math.isfinite(seconds)):
+            raise ValueError
+    except (AttributeError, KeyError, TypeError, ValueError):
+        raise web.HTTPBadRequest(
+            text="guid, ISO published, numeric seconds and boolean liked are required")
+    if published.tzinfo is None:
+        published = published.replace(tzinfo=timezone.utc)  # naive timestamps are UTC
+    async with request.app["db"].acquire() as conn:
+        # An unknown view would fail the whole write-behind batch on its foreign key
+        if not await conn.fetchval("SELECT EXISTS (SELECT 1 FROM views WHERE view_id = $1)", view_id,
+                                   timeout=REQUEST_TIMEOUT):
+            raise web.HTTPNotFound(text="no such view")
+    request.app["recorder"].record(view_id, guid, published, seconds, liked)
+    return web.json_response({"queued": True}, status=202)
+
+async def health(request):
+    async with request.app["db"].acquire() as conn:
+        await conn.fetchval("SELECT 1", timeout=REQUEST_TIMEOUT)
+    return web.json_response({"ok": True})
+
+# ---------------------
+# App lifecycle
+# ---------------------
+@web.middleware
+async def request_timeout(request, handler):
+    try:
+        return await asyncio.wait_for(handler(request), REQUEST_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise web.HTTPServiceUnavailable(text="request timed out")
+
+async def on_startup(app):
+    app["db"] = await asyncpg.create_pool(min_size=DB_POOL_MIN, max_size=DB_POOL_MAX, **DSN)
+    app["pg_pool"] = ThreadedConnectionPool(1, RANK_WORKERS, dbname=DB_NAME, user=DB_USER,
+                                            password=DB_PASSWORD, host=DB_HOST, port=DB_PORT)
+    app["executor"] = ThreadPoolExecutor(max_workers=RANK_WORKERS, thread_name_prefix="rank")
+    app["recorder"] = InteractionRecorder(connect)
+    app["ranking"] = {}  # view_id -> running rank_and_cache job
+
+
+async def on_cleanup(app):
+    if app["ranking"]:
+        await asyncio.gather(*app["ranking"].values(), return_exceptions=True)
+    app["recorder"].close()
+    app["executor"].shutdown(wait=True)
+    await app["db"].close()
+    app["pg_pool"].closeall()
+
+def make_app():
+    app = web.Application(middlewares=[request_timeout])
+    app.add_routes([
+        web.get("/health", health),
+        web.post("/users", create_user),
+        web.post("/users/{user_id}/views", create_view),
+        web.get("/views/{view_id}/feed", get_feed),
+        web.post("/views/{view_id}/events", record_event),
+    ])
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+if __name__ == "__main__":
+    web.run_app(make_app(), host=SERVER_HOST, port=SERVER_PORT, shutdown_timeout=REQUEST_TIMEOUT)
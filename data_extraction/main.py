@@ -1,14 +1,23 @@
+import sys
+import threading
 import time
+from pathlib import Path
 from preprocessing.rss_fetcher import load_rss_urls, fetch_rss_entries
 from preprocessing.content_extractor import extract_content_from_link
 from preprocessing.category_loader import load_categories
-from preprocessing.nlp_classifier import classify_content
+from preprocessing.nlp_classifier import classify_content, warm_up
 from preprocessing.article_store import load_existing_articles, save_articles_to_file
 from preprocessing.createLLMContent import send_to_gemini 
 from preprocessing.push_to_db import push_to_db, get_existing_guids_from_db
 import json
 import re
 
+# Shared embedding service lives with the database loaders
+sys.path.append(str(Path(__file__).resolve().parents[1] / "database_schemas" / "app"))
+from config import EMBED_MODEL
+from article import Article, Category
+from embed import EmbeddingService, text_for_embedding, content_hash
+
 def extract_image_url(entry):
     import re
 
@@ -76,6 +85,8 @@ def extract_image_url(entry):
 
 if __name__ == "__main__":
     start_time = time.time()
+    # Load the classifier while the first feeds are fetched
+    threading.Thread(target=warm_up, name="classifier-warm-up", daemon=True).start()
     RSS_URLS = load_rss_urls()
     CATEGORIES = load_categories()
     # all_existing_articles = load_existing_articles()  # Remove this line
@@ -86,86 +97,91 @@ if __name__ == "__main__":
 
     total_new_articles = []
     articles_to_push = []
-
-    ind = 2
-    for url in RSS_URLS:
-        print(f"Fetching data from {url}...")
-        entries = fetch_rss_entries(url)
-        for entry in entries:
-            guid = entry.get("id") or entry.get("guid") or entry.get("link")
-            link = entry.get("link")
-            source = url
-            if not guid or not link or not source or guid in existing_guids:
-                print("HHHHHHHHHHHHHHHHHHH")
-                continue
-            if ind > 10:
-                break
-            ind += 1
-            print(f"Processing article: {guid}\n")
-            description = entry.get("description", "")
-            image_url = extract_image_url(entry)
-            content = extract_content_from_link(link) if link else ""
-            if not content or len(content) < 200:
-                continue
-            rss_categories = [tag.get("term", "").strip() for tag in entry.tags if tag.get("term")] if "tags" in entry else []
-            title = entry.get("title", "")
-            rss_cat_str = ", ".join(rss_categories) if rss_categories else title
-            category_query = f"{rss_cat_str}"
-            raw_categories = classify_content(category_query, CATEGORIES)
-            categories = [
-                {"category": cat["category"], "score": cat["score"]}
-                for cat in raw_categories if cat["score"] >= 0.2
-            ]
-            article = {
-                "guid": guid,
-                "title": title,
-                "link": link,
-                "published": entry.get("published"),
-                "summary": entry.get("summary"),
-                "description": description,
-                "image_url": image_url,
-                "author": entry.get("author"),
-                "source": source,
-                "content": content,
-                "rss_categories": rss_categories,
-                "categories": categories,
-                "likes": 0,
-                "views": 0,
-            }
-            try:
-                llm_content_str = send_to_gemini(article)
-                match = re.search(r'```json\s*(\{.*\})\s*```', llm_content_str, re.DOTALL)
-                if match:
-                    llm_content_json = match.group(1)
+    # Embeddings are batched in the background while the loop waits on feeds/LLM calls
+    pending_embeddings = []
+    with EmbeddingService(EMBED_MODEL) as embedder:  # worker pool closed even if the loop raises
+        ind = 2
+        for url in RSS_URLS:
+            print(f"Fetching data from {url}...")
+            entries = fetch_rss_entries(url)
+            for entry in entries:
+                guid = entry.get("id") or entry.get("guid") or entry.get("link")
+                link = entry.get("link")
+                source = url
+                if not guid or not link or not source or guid in existing_guids:
+                    print("HHHHHHHHHHHHHHHHHHH")
+                    continue
+                if ind > 10:
+                    break
+                ind += 1
+                print(f"Processing article: {guid}\n")
+                description = entry.get("description", "")
+                image_url = extract_image_url(entry)
+                content = extract_content_from_link(link) if link else ""
+                if not content or len(content) < 200:
+                    continue
+                rss_categories = [tag.get("term", "").strip() for tag in entry.tags if tag.get("term")] if "tags" in entry else []
+                title = entry.get("title", "")
+                rss_cat_str = ", ".join(rss_categories) if rss_categories else title
+                category_query = f"{rss_cat_str}"
+                raw_categories = classify_content(category_query, CATEGORIES)
+                categories = tuple(
+                    Category(cat["category"], cat["score"])
+                    for cat in raw_categories if cat["score"] >= 0.2
+                )
+                article = Article(
+                    guid=guid,
+                    title=title,
+                    link=link,
+                    published=entry.get("published"),
+                    summary=entry.get("summary"),
+                    description=description,
+                    image_url=image_url,
+                    author=entry.get("author"),
+                    source=source,
+                    content=content,
+                    rss_categories=tuple(rss_categories),
+                    categories=categories,
+                )
+                try:
+                    llm_content_str = send_to_gemini(article.to_dict())
+                    match = re.search(r'```json\s*(\{.*\})\s*```', llm_content_str, re.DOTALL)
+                    if match:
+                        llm_content_json = match.group(1)
+                    else:
+                        match = re.search(r'(\{.*\})', llm_content_str, re.DOTALL)
+                        llm_content_json = match.group(1) if match else '{}'
+                    llm_content_dict = json.loads(llm_content_json)
+
+                    article.rating = llm_content_dict.get("rating")
+                    article.difficulty = llm_content_dict.get("difficulty")
+                    article.tags = tuple(tag for tag in llm_content_dict.get("tags") or () if tag)
+                    article.llm_title = llm_content_dict.get("title")
+                    article.llm_content = llm_content_dict.get("content")
+                except (json.JSONDecodeError, Exception) as e:
+                    print(f"Error generating or parsing LLM content: {e}")
+
+                if article.has_llm_content:
+                    total_new_articles.append(article)
+                    articles_to_push.append(article)
+                    text = text_for_embedding(article)
+                    article.content_hash = content_hash(text)
+                    pending_embeddings.append((article, embedder.submit(text)))
+                    existing_guids.add(guid)
+                    # Optionally, you can still save to JSON for backup or transition
+                    # all_articles = all_existing_articles + total_new_articles
+                    # save_articles_to_file(all_articles)
                 else:
-                    match = re.search(r'(\{.*\})', llm_content_str, re.DOTALL)
-                    llm_content_json = match.group(1) if match else '{}'
-                llm_content_dict = json.loads(llm_content_json)
-
-                for field in ["rating", "difficulty", "tags"]:
-                    if field in llm_content_dict:
-                        article[field] = llm_content_dict.pop(field)
-                article["LLM_CONTENT"] = {
-                    k: v for k, v in llm_content_dict.items() if k in ["title", "content"]
-                }
-            except (json.JSONDecodeError, Exception) as e:
-                print(f"Error generating or parsing LLM content: {e}")
-                article["LLM_CONTENT"] = {}
-
-            if article.get("LLM_CONTENT"):
-                total_new_articles.append(article)
-                articles_to_push.append(article)
-                existing_guids.add(guid)
-                # Optionally, you can still save to JSON for backup or transition
-                # all_articles = all_existing_articles + total_new_articles
-                # save_articles_to_file(all_articles)
+                    print("LLM_CONTENT is empty. Stopping execution.")
+                    break  # Exit the inner loop for entries
+
             else:
-                print("LLM_CONTENT is empty. Stopping execution.")
-                break  # Exit the inner loop for entries
+                continue  # Only reached if inner loop wasn't broken
+            break  # Exit the outer loop for RSS_URLS if LLM_CONTENT was empty
 
-        else:
-            continue  # Only reached if inner loop wasn't broken
-        break  # Exit the outer loop for RSS_URLS if LLM_CONTENT was empty
+        for article, future in pending_embeddings:
+            article.embedding = future.result()
+            article.embedding_model = EMBED_MODEL
 
     # Push all new articles to DB in one batch
     if articles_to_push:
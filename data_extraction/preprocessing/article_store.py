@@ -1,14 +1,17 @@
-import json
 import os
+import sys
+from pathlib import Path
+
+# Article records and their file formats live with the database loaders
+sys.path.append(str(Path(__file__).resolve().parents[2] / "database_schemas" / "app"))
+from article import read_articles, write_articles
 
 DATA_FILE = "content/content.json"
 
 def load_existing_articles():
     if os.path.exists(DATA_FILE):
-        with open(DATA_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return read_articles(DATA_FILE)
     return []
 
 def save_articles_to_file(articles):
-    with open(DATA_FILE, "w", encoding="utf-8") as f:
-        json.dump(articles, f, indent=2, ensure_ascii=False)
\ No newline at end of file
+    write_articles(DATA_FILE, articles)
\ No newline at end of file
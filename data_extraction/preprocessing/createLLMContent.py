@@ -1,6 +1,6 @@
 import os
 import json
-import google.generativeai as genai
+from functools import lru_cache
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -68,7 +68,10 @@ class APIKeyManager:
         else:
             raise RuntimeError("All API keys are exhausted!")
 
-api_manager = APIKeyManager()
+@lru_cache(maxsize=1)
+def get_api_manager():
+    """Built on first use, so importing this module needs no keys."""
+    return APIKeyManager()
 
 # ---------------- Gemini Function ----------------
 def send_to_gemini(article, prompt_template=None):
@@ -80,6 +83,8 @@ def send_to_gemini(article, prompt_template=None):
         )
     article_str = json.dumps(article, indent=2)
     prompt = prompt_template.format(data=article_str)
+    import google.generativeai as genai
+    api_manager = get_api_manager()
 
     while True:
         try:
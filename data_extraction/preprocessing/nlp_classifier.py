@@ -1,8 +1,23 @@
-from transformers import pipeline
+import threading
 
-classifier = pipeline("zero-shot-classification", model="facebook/bart-large-mnli")
+# The bart-large-mnli pipeline takes seconds and over a GB to load, so it is
+# built on first use (or by warm_up, e.g. on a background thread) rather than
+# at import.
+_classifier = None
+_lock = threading.Lock()
+
+def get_classifier():
+    global _classifier
+    with _lock:
+        if _classifier is None:
+            from transformers import pipeline
+            _classifier = pipeline("zero-shot-classification", model="facebook/bart-large-mnli")
+        return _classifier
+
+def warm_up():
+    get_classifier()
 
 def classify_content(text, categories):
-    result = classifier(text, candidate_labels=categories, multi_label=True)
+    result = get_classifier()(text, candidate_labels=categories, multi_label=True)
     top5 = sorted(zip(result["labels"], result["scores"]), key=lambda x: x[1], reverse=True)[:5]
-    return [{"category": label, "score": float(score)} for label, score in top5]
\ No newline at end of file
+    return [{"category": label, "score": float(score)} for label, score in top5]
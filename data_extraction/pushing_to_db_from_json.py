@@ -1,97 +1,69 @@
-import json
+import sys
+from pathlib import Path
 import psycopg2
-from psycopg2.extras import execute_values
-from sentence_transformers import SentenceTransformer
 
-# -------------------------------
-# DB connection
-# -------------------------------
-conn = psycopg2.connect(
-    dbname="mindscroll",
-    user="postgres",
-    password="asdfghjkl",
-    host="localhost",
-    port="5432"
-)
-cur = conn.cursor()
+# Shared embedding service lives with the database loaders
+sys.path.append(str(Path(__file__).resolve().parents[1] / "database_schemas" / "app"))
+from config import EMBED_MODEL
+from article import read_articles
+from article_writer import upsert_articles
+from ranking_index import index_articles
+from cohort_refresh import refresh_cohort_feeds
+from embed import EmbeddingService, text_for_embedding, content_hash, fetch_embedding_hashes, needs_embedding
 
-# -------------------------------
-# Load embedding model
-# -------------------------------
-model = SentenceTransformer("all-MiniLM-L6-v2")  # 384-dim (fast)
 
-# -------------------------------
-# Load JSON data
-# -------------------------------
-with open("content/content.json", "r", encoding="utf-8") as f:
-    data = json.load(f)
-
-for article in data:
-    guid = article.get("guid")
-    title = article.get("title")
-    link = article.get("link")
-    published = article.get("published")
-    summary = article.get("summary")
-    description = article.get("description")
-    image_url = article.get("image_url")
-    author = article.get("author")
-    source = article.get("source")
-    content_text = article.get("content")
-
-    # Create embedding (title + content)
-    text_for_embedding = (title + " " + content_text)[:2000]
-    embedding = model.encode(text_for_embedding).tolist()
+def main():
+    # -------------------------------
+    # DB connection
+    # -------------------------------
+    conn = psycopg2.connect(
+        dbname="mindscroll",
+        user="postgres",
+        password="asdfghjkl",
+        host="localhost",
+        port="5432"
+    )
+    cur = conn.cursor()
 
     # -------------------------------
-    # Insert into articles table
+    # Load JSON data
     # -------------------------------
-    cur.execute("""
-        INSERT INTO articles
-        (guid, title, link, published, summary, description, image_url, author, source, content, embedding)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        ON CONFLICT (guid) DO NOTHING;
-    """, (
-        guid, title, link, published, summary, description, image_url, author, source, content_text, embedding
-    ))
+    data = read_articles("content/content.json")
 
     # -------------------------------
-    # Insert RSS categories
+    # Embed only new/changed articles, in batches across the worker pool
     # -------------------------------
-    rss_categories = article.get("rss_categories", [])
-    if rss_categories:
-        values = [(guid, cat) for cat in rss_categories]
-        execute_values(cur,
-            "INSERT INTO rss_categories (article_guid, category) VALUES %s ON CONFLICT DO NOTHING",
-            values
-        )
+    existing_hashes = fetch_embedding_hashes(cur, [a.guid for a in data])
+    stale = []
+    for article in data:
+        text = text_for_embedding(article)
+        article.content_hash = content_hash(text)
+        if needs_embedding(existing_hashes, article.guid, article.content_hash, EMBED_MODEL):
+            stale.append((article, text))
+
+    if stale:
+        with EmbeddingService(EMBED_MODEL) as embedder:
+            vectors = embedder.encode([text for _, text in stale])
+        for (article, _), vec in zip(stale, vectors):
+            article.embedding, article.embedding_model = vec, EMBED_MODEL
+    print(f"Embedding {len(stale)} of {len(data)} articles (rest unchanged).")
 
     # -------------------------------
-    # Insert categories with score
+    # Upsert articles + child tables (idempotent)
     # -------------------------------
-    categories = article.get("categories", [])
-    if categories:
-        values = [(guid, cat.get("category"), cat.get("score")) for cat in categories]
-        execute_values(cur,
-            "INSERT INTO categories (article_guid, category, score) VALUES %s ON CONFLICT DO NOTHING",
-            values
-        )
+    upsert_articles(cur, data)
 
     # -------------------------------
-    # Insert LLM content
+    # Commit and close
     # -------------------------------
-    llm_content = article.get("LLM_CONTENT")
-    if llm_content:
-        cur.execute("""
-            INSERT INTO llm_content (article_guid, title, content)
-            VALUES (%s, %s, %s)
-            ON CONFLICT (article_guid) DO NOTHING;
-        """, (guid, llm_content.get("title"), llm_content.get("content")))
+    conn.commit()
+    cur.close()
+    conn.close()
+    index_articles(data)  # keep the TF-IDF ranking index current
+    refresh_cohort_feeds()
+
+    print("All articles inserted successfully!")
 
-# -------------------------------
-# Commit and close
-# -------------------------------
-conn.commit()
-cur.close()
-conn.close()
 
-print("All articles inserted successfully!")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+import argparse
+import json
+import sys
+import time
+from dataclasses import dataclass, fields
+from datetime import datetime
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+
+# The one article record every stage passes around: the extractor builds it,
+# the loaders read it from the JSON store, upsert_articles writes it and the
+# ranking index reads it. Slots and tuples instead of a ~20-key dict per
+# article; repeated labels (categories, RSS categories, tags, source) are
+# interned and the embedding is a float32 array, not a list of Python floats.
+#
+# Formats, chosen by file suffix in read_articles / write_articles:
+#   .json            list of dicts, the historical content.json layout
+#                    (LLM text under "LLM_CONTENT")
+#   .ndjson, .jsonl  one such dict per line, streamable
+#   .msgpack         a header, then one positional array per article, the
+#                    embedding as raw little-endian float32 bytes
+#                    (needs the msgpack package)
+# Convert between them:
+#   python app/article.py ../data_extraction/content/content.json content.msgpack
+
+MSGPACK_FORMAT = ("article", 1)
+
+class Category(NamedTuple):
+    name: str
+    score: float | None = None
+
+@dataclass(slots=True)
+class Article:
+    guid: str
+    title: str | None = None
+    link: str | None = None
+    published: str | datetime | None = None  # raw feed string until written (article_writer.parse_published)
+    summary: str | None = None
+    description: str | None = None
+    image_url: str | None = None
+    author: str | None = None
+    source: str | None = None
+    content: str | None = None
+    rss_categories: tuple[str, ...] = ()
+    categories: tuple[Category, ...] = ()
+    tags: tuple[str, ...] = ()
+    llm_title: str | None = None
+    llm_content: str | None = None
+    rating: str | None = None
+    difficulty: str | None = None
+    likes: int = 0
+    views: int = 0
+    embedding: np.ndarray | None = None  # float32
+    content_hash: str | None = None
+    embedding_model: str | None = None
+
+    @property
+    def has_llm_content(self) -> bool:
+        return bool(self.llm_title or self.llm_content)
+
+    # ---------------------
+    # Dict form (JSON / NDJSON)
+    # ---------------------
+    @classmethod
+    def from_dict(cls, d: dict) -> "Article":
+        """Accepts every historical shape: "LLM_CONTENT" or "llm_content",
+        rating/difficulty/tags at the top level or inside the LLM content,
+        rss_categories as a list or a JSON string, categories as
+        {"category", "score"} dicts, pairs or bare names."""
+        llm = d.get("LLM_CONTENT") or d.get("llm_content") or {}
+        if isinstance(llm, str):
+            llm = {"content": llm}
+        embedding = d.get("embedding")
+        return cls(
+            guid=d["guid"],
+            title=d.get("title"),
+            link=d.get("link"),
+            published=d.get("published"),
+            summary=d.get("summary"),
+            description=d.get("description"),
+            image_url=d.get("image_url"),
+            author=d.get("author"),
+            source=_intern(d.get("source")),
+            content=d.get("content"),
+            rss_categories=_labels(d.get("rss_categories")),
+            categories=tuple(_category(c) for c in d.get("categories") or ()),
+            tags=_labels(d.get("tags") or llm.get("tags")),
+            llm_title=llm.get("title"),
+            llm_content=llm.get("content"),
+            rating=d.get("rating") or llm.get("rating"),
+            difficulty=d.get("difficulty") or llm.get("difficulty"),
+            likes=d.get("likes") or 0,
+            views=d.get("views") or 0,
+            embedding=None if embedding is None else np.asarray(embedding, dtype=np.float32),
+            content_hash=d.get("content_hash"),
+            embedding_model=d.get("embedding_model"),
+        )
+
+    def to_dict(self) -> dict:
+        """content.json layout; unset LLM and embedding keys are left out."""
+        d = {
+            "guid": self.guid,
+            "title": self.title,
+            "link": self.link,
+            "published": _published_text(self.published),
+            "summary": self.summary,
+            "description": self.description,
+            "image_url": self.image_url,
+            "author": self.author,
+            "source": self.source,
+            "content": self.content,
+            "rss_categories": list(self.rss_categories),
+            "categories": [{"category": c.name, "score": c.score} for c in self.categories],
+            "likes": self.likes,
+            "views": self.views,
+        }
+        for key in ("rating", "difficulty"):
+            if getattr(self, key) is not None:
+                d[key] = getattr(self, key)
+        if self.tags:
+            d["tags"] = list(self.tags)
+        if self.has_llm_content:
+            d["LLM_CONTENT"] = {"title": self.llm_title, "content": self.llm_content}
+        if self.embedding is not None:
+            d["embedding"] = self.embedding.tolist()
+            d["embedding_model"] = self.embedding_model
+        if self.content_hash is not None:
+            d["content_hash"] = self.content_hash
+        return d
+
+    # ---------------------
+    # Positional form (msgpack)
+    # ---------------------
+    def to_row(self) -> list:
+        row = [getattr(self, name) for name in FIELDS]
+        row[_PUBLISHED] = _published_text(self.published)
+        row[_CATEGORIES] = [list(c) for c in self.categories]
+        if self.embedding is not None:
+            row[_EMBEDDING] = self.embedding.astype("<f4", copy=False).tobytes()
+        return row
+
+    @classmethod
+    def from_row(cls, row: list) -> "Article":
+        article = cls(*row)
+        article.source = _intern(article.source)
+        article.rss_categories = _labels(article.rss_categories)
+        article.categories = tuple(Category(_intern(name), score) for name, score in article.categories)
+        article.tags = _labels(article.tags)
+        if article.embedding is not None:
+            article.embedding = np.frombuffer(article.embedding, dtype="<f4")
+        return article
+
+FIELDS = tuple(f.name for f in fields(Article))
+_PUBLISHED, _CATEGORIES, _EMBEDDING = (FIELDS.index(n) for n in ("published", "categories", "embedding"))
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+def _labels(values) -> tuple:
+    if isinstance(values, str):
+        values = json.loads(values)  # JSONB text from older exports
+    return tuple(sys.intern(v.strip()) for v in values or () if v and v.strip())
+
+def _category(value) -> Category:
+    if isinstance(value, dict):
+        return Category(sys.intern(value["category"]), value.get("score"))
+    if isinstance(value, str):
+        return Category(sys.intern(value))
+    name, score = value
+    return Category(sys.intern(name), score)
+
+def _published_text(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+# ---------------------
+# Serializers
+# ---------------------
+def dump_ndjson(articles, fp):
+    for article in articles:
+        fp.write(json.dumps(article.to_dict(), ensure_ascii=False, separators=(",", ":")))
+        fp.write("\n")
+
+def load_ndjson(fp):
+    for line in fp:
+        if line.strip():
+            yield Article.from_dict(json.loads(line))
+
+def dump_msgpack(articles, fp):
+    import msgpack
+    packer = msgpack.Packer(use_bin_type=True)
+    fp.write(packer.pack([*MSGPACK_FORMAT, list(FIELDS)]))
+    for article in articles:
+        fp.write(packer.pack(article.to_row()))
+
+def load_msgpack(fp):
+    import msgpack
+    unpacker = msgpack.Unpacker(fp, raw=False, use_list=True)
+    header = next(unpacker, None)
+    if header is None:
+        return
+    if tuple(header[:2]) != MSGPACK_FORMAT or tuple(header[2]) != FIELDS:
+        raise ValueError(f"Unsupported article msgpack format: {header[:2]}")
+    for row in unpacker:
+        yield Article.from_row(row)
+
+def read_articles(path) -> list:
+    path = Path(path)
+    if path.suffix == ".msgpack":
+        with open(path, "rb") as f:
+            return list(load_msgpack(f))
+    with open(path, "r", encoding="utf-8") as f:
+        if path.suffix in (".ndjson", ".jsonl"):
+            return list(load_ndjson(f))
+        data = json.load(f)
+    if not isinstance(data, list):
+        raise ValueError("JSON must be a list of article dicts.")
+    return [Article.from_dict(d) for d in data]
+
+def write_articles(path, articles):
+    path = Path(path)
+    if path.suffix == ".msgpack":
+        with open(path, "wb") as f:
+            dump_msgpack(articles, f)
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        if path.suffix in (".ndjson", ".jsonl"):
+            dump_ndjson(articles, f)
+        else:
+            json.dump([a.to_dict() for a in articles], f, indent=2, ensure_ascii=False)
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert an article file between .json, .ndjson and .msgpack.")
+    parser.add_argument("source", type=Path)
+    parser.add_argument("target", type=Path)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    articles = read_articles(args.source)
+    read_s = time.perf_counter() - start
+    start = time.perf_counter()
+    write_articles(args.target, articles)
+    write_s = time.perf_counter() - start
+    print(f"{len(articles)} articles: read {read_s * 1000:.0f} ms, wrote {write_s * 1000:.0f} ms "
+          f"({args.target.stat().st_size / 1e6:.1f} MB)")
+
+if __name__ == "__main__":
+    main()
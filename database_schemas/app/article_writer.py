@@ -0,0 +1,232 @@
+from datetime import datetime, timezone
+from dateutil import parser as dateparser
+from psycopg2.extras import execute_values
+
+from labels import category_labels, rss_category_labels, tag_labels
+
+# Every loader (load_content, push_jsonToDB, data_extraction's push_to_db and
+# pushing_to_db_from_json) writes Article records (article.py) through
+# upsert_articles so that re-pushing the same content is idempotent: child
+# rows are keyed on (article, label) and refreshed in place instead of appended.
+
+def parse_published(value):
+    if not value:
+        return None
+    if not isinstance(value, str):
+        return value
+    try:
+        dt = dateparser.parse(value)
+    except Exception:
+        return None
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt
+
+def _resolve_published(cur, articles: list) -> tuple:
+    """(guid -> partition key, guid -> stored (content_hash, embedding_model) or
+    None without an embedding). A stored article keeps its published timestamp
+    so a re-push with a changed (or missing) date updates the same row instead
+    of creating a copy in another partition; new articles without a date get
+    the ingestion time."""
+    cur.execute("""
+        SELECT guid, published,
+               CASE WHEN embedding IS NOT NULL THEN ARRAY[content_hash, embedding_model] END
+        FROM articles WHERE guid = ANY(%s);
+    """, ([a.guid for a in articles],))
+    stored, embedded = {}, {}
+    for guid, stored_published, fingerprint in cur.fetchall():
+        stored[guid] = stored_published
+        embedded[guid] = tuple(fingerprint) if fingerprint else None
+    now = datetime.now(timezone.utc)
+    published = {}
+    for a in articles:
+        published[a.guid] = stored.get(a.guid) or parse_published(a.published) or now
+    return published, embedded
+
+def ensure_partitions(cur, timestamps):
+    """Create the monthly partitions (articles + child tables) the timestamps fall into."""
+    months = {(ts.astimezone(timezone.utc).year, ts.astimezone(timezone.utc).month) for ts in timestamps}
+    for year, month in sorted(months):
+        cur.execute("SELECT ensure_month_partition(%s);",
+                    (datetime(year, month, 1, tzinfo=timezone.utc),))
+
+def _dedupe(articles: list) -> list:
+    """Last occurrence of a guid wins; ON CONFLICT DO UPDATE rejects duplicate keys in one statement."""
+    by_guid = {}
+    for article in articles:
+        if article.guid:
+            by_guid[article.guid] = article
+    return list(by_guid.values())
+
+def _delete_stale_links(cur, table: str, label_column: str, owners: list, rows: list) -> set:
+    """Delete the `table` rows of the owner articles ((guid, published) pairs)
+    whose label is not in `rows` ((guid, published, label_id, ...)). Returns the
+    deleted label ids. Filtering on the batch's published values lets the
+    planner prune to the partitions the batch touches."""
+    cur.execute(f"""
+        DELETE FROM {table} t
+        USING unnest(%s::text[], %s::timestamptz[]) AS k(guid, published)
+        WHERE t.article_guid = k.guid AND t.published = k.published
+          AND t.published = ANY(%s::timestamptz[])
+          AND (t.article_guid, t.{label_column}) NOT IN (
+              SELECT * FROM unnest(%s::text[], %s::int[])
+          )
+        RETURNING t.{label_column};
+    """, ([g for g, _ in owners], [p for _, p in owners], sorted({p for _, p in owners}),
+          [r[0] for r in rows], [r[2] for r in rows]))
+    return {row[0] for row in cur.fetchall()}
+
+def upsert_articles(cur, articles: list) -> int:
+    """Insert or refresh Articles and their child rows. Returns the number of articles written.
+
+    An article without an embedding keeps the stored vector, hash and model.
+    Likes/views counters are never overwritten by a re-push.
+    """
+    articles = _dedupe(articles)
+    if not articles:
+        return 0
+    published, embedded = _resolve_published(cur, articles)
+    ensure_partitions(cur, published.values())
+    now = datetime.now(timezone.utc)
+
+    # 1. Articles
+    article_values = [(
+        a.guid,
+        a.title,
+        a.link,
+        published[a.guid],
+        a.image_url,
+        a.author,
+        a.source,
+        a.likes,
+        a.views,
+        a.rating,
+        a.difficulty,
+        None if a.embedding is None else a.embedding.tolist(),
+        a.content_hash,
+        a.embedding_model,
+        now if a.embedding is not None else None,
+    ) for a in articles]
+    execute_values(cur, """
+        INSERT INTO articles (
+            guid, title, link, published, image_url,
+            author, source, likes, views, rating, difficulty,
+            embedding, content_hash, embedding_model, embedded_at
+        ) VALUES %s
+        ON CONFLICT (guid, published) DO UPDATE SET
+            title = EXCLUDED.title,
+            link = EXCLUDED.link,
+            image_url = EXCLUDED.image_url,
+            author = EXCLUDED.author,
+            source = EXCLUDED.source,
+            rating = COALESCE(EXCLUDED.rating, articles.rating),
+            difficulty = COALESCE(EXCLUDED.difficulty, articles.difficulty),
+            embedding = COALESCE(EXCLUDED.embedding, articles.embedding),
+            content_hash = CASE WHEN EXCLUDED.embedding IS NULL
+                                THEN articles.content_hash ELSE EXCLUDED.content_hash END,
+            embedding_model = CASE WHEN EXCLUDED.embedding IS NULL
+                                   THEN articles.embedding_model ELSE EXCLUDED.embedding_model END,
+            embedded_at = CASE WHEN EXCLUDED.embedding IS NULL
+                               THEN articles.embedded_at ELSE EXCLUDED.embedded_at END;
+    """, article_values)
+
+    # 2. Bodies (cold side table) and the weighted full-text document
+    execute_values(cur, """
+        INSERT INTO article_bodies (article_guid, published, summary, description, content, search_tsv)
+        SELECT d.guid, d.published, d.summary, d.description, d.content,
+               article_search_tsv(d.title, d.llm_title, d.content)
+        FROM (VALUES %s) AS d(guid, published, summary, description, content, title, llm_title)
+        ON CONFLICT (article_guid, published) DO UPDATE SET
+            summary = EXCLUDED.summary,
+            description = EXCLUDED.description,
+            content = EXCLUDED.content,
+            search_tsv = EXCLUDED.search_tsv;
+    """, [(a.guid, published[a.guid], a.summary, a.description, a.content, a.title, a.llm_title)
+          for a in articles], template="(%s, %s::timestamptz, %s, %s, %s, %s, %s)")
+
+    # 3-5. Link tables: each article that carries a set gets exactly that set
+    # (an article without one keeps what is stored)
+    # 3. RSS categories
+    rss_pairs = {(a.guid, cat) for a in articles for cat in a.rss_categories}
+    if rss_pairs:
+        ids = rss_category_labels.ids(cur, [cat for _, cat in rss_pairs])
+        rss_rows = [(g, published[g], ids[cat]) for g, cat in rss_pairs]
+        _delete_stale_links(cur, "rss_categories", "rss_category_id",
+                            [(a.guid, published[a.guid]) for a in articles if a.rss_categories], rss_rows)
+        execute_values(cur, """
+            INSERT INTO rss_categories (article_guid, published, rss_category_id) VALUES %s
+            ON CONFLICT (article_guid, rss_category_id, published) DO NOTHING;
+        """, rss_rows)
+
+    # Stored articles whose ranking inputs change: a new or backfilled
+    # embedding, or (step 6) new LLM content
+    reranked = {a.guid for a in articles if a.guid in embedded and a.embedding is not None
+                and embedded[a.guid] != (a.content_hash, a.embedding_model)}
+
+    # 4. Categories (with score): replace each article's set, refreshing scores
+    touched = set()
+    cat_scores = {}
+    for a in articles:
+        for cat in a.categories:
+            cat_scores[(a.guid, cat.name)] = cat.score
+    classified = [(a.guid, published[a.guid]) for a in articles if a.categories]
+    if classified:
+        ids = category_labels.ids(cur, [c for _, c in cat_scores])
+        cat_rows = [(g, published[g], ids[c], score) for (g, c), score in cat_scores.items()]
+        deleted = _delete_stale_links(cur, "categories", "category_id", classified, cat_rows)
+        # Unchanged scores are not rewritten; xmax = 0 marks a freshly inserted row
+        written = execute_values(cur, """
+            INSERT INTO categories AS c (article_guid, published, category_id, score) VALUES %s
+            ON CONFLICT (article_guid, category_id, published) DO UPDATE SET score = EXCLUDED.score
+            WHERE c.score IS DISTINCT FROM EXCLUDED.score
+            RETURNING c.category_id, (c.xmax = 0);
+        """, cat_rows, fetch=True)
+        touched = deleted | {category_id for category_id, inserted in written if inserted}
+
+    # 5. Tags (regenerated LLM tags replace the previous ones)
+    tag_pairs = {(a.guid, tag) for a in articles for tag in a.tags}
+    if tag_pairs:
+        ids = tag_labels.ids(cur, [tag for _, tag in tag_pairs])
+        tag_rows = [(g, published[g], ids[tag]) for g, tag in tag_pairs]
+        _delete_stale_links(cur, "tags", "tag_id",
+                            [(a.guid, published[a.guid]) for a in articles if a.tags], tag_rows)
+        execute_values(cur, """
+            INSERT INTO tags (article_guid, published, tag_id) VALUES %s
+            ON CONFLICT (article_guid, tag_id, published) DO NOTHING;
+        """, tag_rows)
+
+    # 6. LLM content
+    llm_values = [(a.guid, published[a.guid], a.llm_title, a.llm_content)
+                  for a in articles if a.has_llm_content]
+    if llm_values:
+        # Unchanged text is not rewritten, so only new or changed content is returned
+        changed = execute_values(cur, """
+            INSERT INTO llm_content AS llm (article_guid, published, title, content) VALUES %s
+            ON CONFLICT (article_guid, published) DO UPDATE SET
+                title = EXCLUDED.title,
+                content = EXCLUDED.content
+            WHERE (llm.title, llm.content) IS DISTINCT FROM (EXCLUDED.title, EXCLUDED.content)
+            RETURNING llm.article_guid;
+        """, llm_values, fetch=True)
+        reranked.update(guid for guid, in changed if guid in embedded)
+
+    # 7. Invalidate cached feeds (feed_cache, cohort_feeds) of views over
+    # categories that gained or lost articles, or whose articles were
+    # re-embedded or got new LLM content. Score-only updates do not
+    # invalidate: cached entries pick the new scores up when next rebuilt.
+    if touched or reranked:
+        owners = [(g, published[g]) for g in sorted(reranked)]
+        cur.execute("""
+            INSERT INTO category_epochs (category_id, epoch)
+            SELECT category_id, 1 FROM (
+                SELECT unnest(%s::smallint[]) AS category_id
+                UNION
+                SELECT c.category_id
+                FROM categories c
+                JOIN unnest(%s::text[], %s::timestamptz[]) AS k(guid, published)
+                  ON c.article_guid = k.guid AND c.published = k.published
+                WHERE c.published = ANY(%s::timestamptz[])
+            ) ids
+            ON CONFLICT (category_id) DO UPDATE SET epoch = category_epochs.epoch + 1;
+        """, (sorted(touched), [g for g, _ in owners], [p for _, p in owners],
+              sorted({p for _, p in owners})))
+
+    return len(articles)
@@ -0,0 +1,16 @@
+import subprocess
+import sys
+from pathlib import Path
+
+# Ingestion hook: re-rank the cohort feeds (app_cli/cohorts.py) once a load has
+# committed. It runs as its own process so the loaders never import the
+# recommender stack. A failed refresh is reported, not raised: the articles
+# are already written and the next run (or the script by hand) catches up.
+
+COHORTS_SCRIPT = Path(__file__).resolve().parents[2] / "app_cli" / "cohorts.py"
+
+def refresh_cohort_feeds():
+    result = subprocess.run([sys.executable, str(COHORTS_SCRIPT)], cwd=COHORTS_SCRIPT.parent)
+    if result.returncode != 0:
+        print(f"Cohort feed refresh failed (exit code {result.returncode}); "
+              f"run python app_cli/cohorts.py")
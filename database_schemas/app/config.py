@@ -1,4 +1,5 @@
 import os
+from pathlib import Path
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -11,3 +12,31 @@ DB_PORT = int(os.getenv("DB_PORT", "5432"))
 
 EMBED_MODEL = os.getenv("EMBED_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
 EMBED_DIM = int(os.getenv("EMBED_DIM", "384"))
+
+# Embedding service (process pool + batching queue)
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "64"))
+EMBED_MAX_WAIT_MS = int(os.getenv("EMBED_MAX_WAIT_MS", "50"))
+
+# ANN vector index (built by scripts/build_vector_index.py after bulk loads)
+VECTOR_INDEX_METHOD = os.getenv("VECTOR_INDEX_METHOD", "hnsw")  # hnsw | ivfflat; --method default
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "40"))
+IVFFLAT_PROBES = int(os.getenv("IVFFLAT_PROBES", "10"))
+# pgvector >= 0.8: keep scanning the HNSW graph until filtered queries fill their LIMIT
+# (off | relaxed_order | strict_order); leave empty on older pgvector
+HNSW_ITERATIVE_SCAN = os.getenv("HNSW_ITERATIVE_SCAN", "")
+
+# Persisted TF-IDF ranking index (built by app/ranking_index.py build)
+RANKING_INDEX_PATH = Path(os.getenv(
+    "RANKING_INDEX_PATH", Path(__file__).resolve().parents[1] / "data" / "ranking_index.npz"
+))
+
+# Memory-mapped embedding matrix for in-process scoring (scripts/export_embeddings.py)
+EMBEDDING_MATRIX_DIR = Path(os.getenv(
+    "EMBEDDING_MATRIX_DIR", Path(__file__).resolve().parents[1] / "data" / "embeddings"
+))
+
+# Columnar Parquet snapshot for offline analysis (scripts/export_snapshot.py)
+SNAPSHOT_DIR = Path(os.getenv(
+    "SNAPSHOT_DIR", Path(__file__).resolve().parents[1] / "data" / "snapshot"
+))
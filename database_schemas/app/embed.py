@@ -1,11 +1,172 @@
-from sentence_transformers import SentenceTransformer
+import hashlib
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
 from functools import lru_cache
 
+import numpy as np
+
+from config import EMBED_MODEL, EMBED_WORKERS, EMBED_MAX_BATCH, EMBED_MAX_WAIT_MS
+
+# sentence_transformers (and torch) are imported on first use: importing this
+# module for hashing or the service class must not cost seconds of startup.
+# The lock keeps a background warm_up and a first embed_text from loading the
+# model twice.
+_model_lock = threading.Lock()
+
 @lru_cache(maxsize=1)
-def get_model(model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
+def _load_model(model_name: str):
+    from sentence_transformers import SentenceTransformer
     return SentenceTransformer(model_name)
 
+def get_model(model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
+    with _model_lock:
+        return _load_model(model_name)
+
+def warm_up(model_name: str = EMBED_MODEL):
+    """Load the in-process model ahead of the first embed_text call."""
+    get_model(model_name)
+
 def embed_text(text: str, model_name: str) -> list:
     model = get_model(model_name)
     vec = model.encode(text or "", normalize_embeddings=True)
     return vec.tolist()
+
+def text_for_embedding(article) -> str:
+    title = article.title or ""
+    content = article.content or article.summary or ""
+    # Truncate excessively long content to keep embedding fast
+    blob = f"{title} \n\n {content}"
+    return blob[:5000]
+
+def content_hash(text: str) -> str:
+    """Fingerprint of the exact text an embedding is computed from."""
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+def fetch_embedding_hashes(cur, guids: list) -> dict:
+    """Map guid -> (content_hash, embedding_model) for articles that already have an embedding."""
+    if not guids:
+        return {}
+    cur.execute(
+        """
+        SELECT guid, content_hash, embedding_model
+        FROM articles
+        WHERE guid = ANY(%s) AND embedding IS NOT NULL
+        """,
+        (list(guids),)
+    )
+    return {guid: (h, model) for guid, h, model in cur.fetchall()}
+
+def needs_embedding(existing: dict, guid: str, text_hash: str, model_name: str) -> bool:
+    return existing.get(guid) != (text_hash, model_name)
+
+# ---------------------
+# Embedding service
+# ---------------------
+_worker_model = None
+
+def _init_worker(model_name: str, threads: int):
+    """Runs once per pool process: pin torch threads and load the model."""
+    global _worker_model
+    import torch
+    from sentence_transformers import SentenceTransformer
+    torch.set_num_threads(threads)
+    _worker_model = SentenceTransformer(model_name)
+
+def _encode_batch(texts: list) -> np.ndarray:
+    vecs = _worker_model.encode(
+        [t or "" for t in texts],
+        batch_size=len(texts),
+        normalize_embeddings=True,
+        convert_to_numpy=True,
+    )
+    return vecs.astype(np.float32, copy=False)
+
+_STOP = object()
+
+class EmbeddingService:
+    """Process pool that loads the model once per worker, fed by a batching queue.
+
+    submit() queues one text and returns a Future; queued texts are grouped into
+    batches of up to max_batch, waiting at most max_wait_ms for a batch to fill.
+    encode() embeds a whole list directly in max_batch chunks across the pool.
+    Results are L2-normalized float32 vectors.
+    """
+
+    def __init__(self, model_name: str = EMBED_MODEL, workers: int = EMBED_WORKERS,
+                 max_batch: int = EMBED_MAX_BATCH, max_wait_ms: int = EMBED_MAX_WAIT_MS):
+        self.model_name = model_name
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        self._pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_name, threads),
+        )
+        self._queue = queue.Queue()
+        self._batcher = threading.Thread(target=self._run_batcher, daemon=True)
+        self._batcher.start()
+
+    def submit(self, text: str) -> Future:
+        future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def encode(self, texts: list) -> np.ndarray:
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        chunks = [texts[i:i + self.max_batch] for i in range(0, len(texts), self.max_batch)]
+        return np.vstack(list(self._pool.map(_encode_batch, chunks)))
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._batcher.join()
+        self._pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _run_batcher(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: list):
+        futures = [future for _, future in batch]
+        result = self._pool.submit(_encode_batch, [text for text, _ in batch])
+
+        def _resolve(done):
+            error = done.exception()
+            if error is not None:
+                for future in futures:
+                    future.set_exception(error)
+                return
+            for future, vec in zip(futures, done.result()):
+                future.set_result(vec)
+
+        result.add_done_callback(_resolve)
@@ -0,0 +1,65 @@
+from psycopg2.extensions import cursor as tuple_cursor
+from psycopg2.extras import execute_values
+
+# Category, RSS category and tag strings are stored once in *_labels
+# dictionary tables; link tables hold the small integer ids. LabelCache
+# resolves strings <-> ids and keeps them in process, so steady-state
+# lookups never touch the database.
+
+class LabelCache:
+    def __init__(self, table: str, id_column: str):
+        self.table = table
+        self.id_column = id_column
+        self._ids = {}      # label -> id
+        self._labels = {}   # id -> label
+
+    def ids(self, cur, labels, create: bool = True) -> dict:
+        """Map each label to its id, inserting unknown labels when create=True."""
+        labels = [l for l in labels if l]
+        missing = sorted({l for l in labels if l not in self._ids})
+        if missing:
+            # Plain tuple cursor on the caller's connection/transaction,
+            # whatever cursor_factory the connection defaults to.
+            with cur.connection.cursor(cursor_factory=tuple_cursor) as c:
+                if create:
+                    execute_values(c, f"""
+                        INSERT INTO {self.table} (label) VALUES %s
+                        ON CONFLICT (label) DO NOTHING;
+                    """, [(l,) for l in missing])
+                c.execute(
+                    f"SELECT label, {self.id_column} FROM {self.table} WHERE label = ANY(%s);",
+                    (missing,)
+                )
+                self._remember(c.fetchall())
+        return {l: self._ids[l] for l in labels if l in self._ids}
+
+    def labels(self, cur, ids) -> dict:
+        """Map each id back to its label."""
+        missing = sorted({i for i in ids if i not in self._labels})
+        if missing:
+            with cur.connection.cursor(cursor_factory=tuple_cursor) as c:
+                c.execute(
+                    f"SELECT label, {self.id_column} FROM {self.table} WHERE {self.id_column} = ANY(%s);",
+                    (missing,)
+                )
+                self._remember(c.fetchall())
+        return {i: self._labels[i] for i in ids if i in self._labels}
+
+    def clear(self):
+        """Forget cached ids, e.g. after a rollback discarded newly inserted labels."""
+        self._ids.clear()
+        self._labels.clear()
+
+    def _remember(self, rows):
+        for label, label_id in rows:
+            self._ids[label] = label_id
+            self._labels[label_id] = label
+
+
+category_labels = LabelCache("category_labels", "category_id")
+rss_category_labels = LabelCache("rss_category_labels", "rss_category_id")
+tag_labels = LabelCache("tag_labels", "tag_id")
+
+def clear_label_caches():
+    for cache in (category_labels, rss_category_labels, tag_labels):
+        cache.clear()
@@ -0,0 +1,245 @@
+import fcntl
+import hashlib
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import psycopg2
+
+from config import DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, RANKING_INDEX_PATH
+
+# Persisted TF-IDF index used to rank feed candidates. The vocabulary and IDF
+# weights are fitted offline over llm_content; each article is one
+# L2-normalized sparse row. At request time only the query is tokenized and
+# scored with one sparse product against the candidate rows.
+#
+# New articles are appended with the existing vocabulary/IDF (terms unseen at
+# build time are ignored), so rebuild periodically to pick up new vocabulary.
+# An ingestion batch only reads the vocabulary and writes its rows as a small
+# delta shard next to the base file (<name>.delta-<ns>-<pid>.npz), so appends
+# cost O(batch) and concurrent loaders never overwrite each other. load()
+# stacks the shards onto the base; past MAX_DELTA_SHARDS they are merged into
+# the base, and a rebuild drops the shards it covers. Merges and rebuilds hold
+# an exclusive flock on <name>.lock; readers and shard writers a shared one,
+# writers from reading the vocabulary until the shard is on disk. Each shard
+# records the fingerprint of the vocabulary/IDF it was transformed with, and
+# load() skips shards that do not match the base.
+#
+# scipy and scikit-learn are imported where they are used, so importing this
+# module (every loader and the CLI do) stays cheap until an index is touched.
+
+MAX_DELTA_SHARDS = 64
+
+def document_text(title, llm_title, llm_content) -> str:
+    return " ".join(part for part in (llm_title, title, llm_content) if part)
+
+class RankingIndex:
+    def __init__(self, terms, idf, matrix, guids):
+        self.terms = terms
+        self.idf = idf.astype(np.float32)
+        self.matrix = matrix.tocsr().astype(np.float32)
+        self.guids = list(guids)
+        # Later rows win: re-indexed articles shadow their old row until rebuild
+        self.rows = {guid: i for i, guid in enumerate(self.guids)}
+        self.fingerprint = _fingerprint(terms, self.idf)
+        from sklearn.feature_extraction.text import CountVectorizer
+        self._counter = CountVectorizer(
+            stop_words="english", vocabulary={t: i for i, t in enumerate(terms)}
+        )
+
+    @classmethod
+    def build(cls, guids, documents):
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        vectorizer = TfidfVectorizer(stop_words="english", dtype=np.float32)
+        matrix = vectorizer.fit_transform(documents)
+        terms = vectorizer.get_feature_names_out()
+        return cls(terms, vectorizer.idf_, matrix, guids)
+
+    def transform(self, documents):
+        """TF-IDF rows for new text, using the stored vocabulary and IDF (l2-normalized)."""
+        from scipy import sparse
+        counts = self._counter.transform(documents).astype(np.float32)
+        weighted = counts.multiply(self.idf).tocsr()
+        norms = np.sqrt(weighted.multiply(weighted).sum(axis=1)).A1
+        norms[norms == 0] = 1.0
+        return sparse.diags(1.0 / norms).dot(weighted).tocsr().astype(np.float32)
+
+    def score(self, query, guids) -> np.ndarray:
+        """Cosine similarity of the query to each guid (0 for guids not in the index)."""
+        scores = np.zeros(len(guids), dtype=np.float32)
+        positions = [(i, self.rows[g]) for i, g in enumerate(guids) if g in self.rows]
+        if not positions:
+            return scores
+        query_vec = self.transform([query or ""])
+        if query_vec.nnz == 0:
+            return scores
+        rows = self.matrix[[r for _, r in positions]]
+        scores[[i for i, _ in positions]] = rows.dot(query_vec.T).toarray().ravel()
+        return scores
+
+    def save(self, path=RANKING_INDEX_PATH):
+        """Write the base file (vocabulary, IDF and every row) atomically."""
+        _write_npz(Path(path), Path(path), terms=np.asarray(self.terms, dtype=str), idf=self.idf,
+                   **_rows(self.matrix, self.guids))
+
+    @classmethod
+    def load(cls, path=RANKING_INDEX_PATH):
+        """The stored index with its delta shards, or None if it has not been built yet."""
+        with _locked(path, exclusive=False):
+            return cls._load(path, delta_paths(path))
+
+    @classmethod
+    def _load(cls, path, shards):
+        if not Path(path).exists():
+            return None
+        from scipy import sparse
+        with np.load(path, allow_pickle=False) as f:
+            terms, idf = f["terms"].tolist(), f["idf"]
+            matrices, guids = [_matrix(f)], f["guids"].tolist()
+        fingerprint = _fingerprint(terms, idf)
+        for shard in shards:
+            with np.load(shard, allow_pickle=False) as f:
+                if "vocab" not in f.files or str(f["vocab"]) != fingerprint:
+                    continue  # transformed with another vocabulary; build_from_db replaces it
+                matrices.append(_matrix(f))
+                guids.extend(f["guids"].tolist())
+        return cls(terms, idf, sparse.vstack(matrices, format="csr"), guids)
+
+    @classmethod
+    def load_vocabulary(cls, path=RANKING_INDEX_PATH):
+        """The stored vocabulary and IDF without any rows (enough for transform),
+        or None; reads two small arrays, not the matrix."""
+        if not Path(path).exists():
+            return None
+        from scipy import sparse
+        with np.load(path, allow_pickle=False) as f:
+            terms, idf = f["terms"].tolist(), f["idf"]
+        return cls(terms, idf, sparse.csr_matrix((0, len(terms)), dtype=np.float32), [])
+
+def _rows(matrix, guids) -> dict:
+    return dict(data=matrix.data, indices=matrix.indices, indptr=matrix.indptr,
+                shape=np.asarray(matrix.shape), guids=np.asarray(guids, dtype=str))
+
+def _fingerprint(terms, idf) -> str:
+    digest = hashlib.sha256("\n".join(terms).encode())
+    digest.update(np.asarray(idf, dtype=np.float32).tobytes())
+    return digest.hexdigest()
+
+def _write_shard(path, index, guids, documents):
+    shard = path.with_name(f"{path.stem}.delta-{time.time_ns()}-{os.getpid()}.npz")
+    _write_npz(path, shard, vocab=np.asarray(index.fingerprint),
+               **_rows(index.transform(documents), guids))
+
+def _matrix(f):
+    from scipy import sparse
+    return sparse.csr_matrix((f["data"], f["indices"], f["indptr"]), shape=tuple(f["shape"]))
+
+def _write_npz(path, target, **arrays):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp, target)
+
+def delta_paths(path=RANKING_INDEX_PATH) -> list:
+    """Delta shards of the index at `path`, oldest first."""
+    path = Path(path)
+    return sorted(path.parent.glob(f"{path.stem}.delta-*.npz"))
+
+@contextmanager
+def _locked(path, exclusive):
+    lock = Path(path).with_name(Path(path).name + ".lock")
+    lock.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def compact(path=RANKING_INDEX_PATH):
+    """Merge the delta shards into the base file."""
+    with _locked(path, exclusive=True):
+        shards = delta_paths(path)
+        index = RankingIndex._load(path, shards)
+        if index is None or not shards:
+            return
+        index.save(path)
+        for shard in shards:
+            shard.unlink()
+
+def index_articles(articles, path=RANKING_INDEX_PATH):
+    """Ingestion hook: append Articles (with LLM content) to the stored index."""
+    articles = [a for a in articles if a.guid and a.has_llm_content]
+    if not articles:
+        return
+    path = Path(path)
+    guids = [a.guid for a in articles]
+    documents = [document_text(a.title, a.llm_title, a.llm_content) for a in articles]
+    if not path.exists():
+        with _locked(path, exclusive=True):
+            if not path.exists():
+                RankingIndex.build(guids, documents).save(path)
+                return
+    # A rebuild cannot swap the vocabulary between the read and the shard write
+    with _locked(path, exclusive=False):
+        _write_shard(path, RankingIndex.load_vocabulary(path), guids, documents)
+    if len(delta_paths(path)) > MAX_DELTA_SHARDS:
+        compact(path)
+
+DOCUMENTS_QUERY = """
+    SELECT a.guid, a.title, llm.title, llm.content
+    FROM articles a
+    JOIN llm_content llm ON llm.article_guid = a.guid AND llm.published = a.published
+"""
+
+def build_from_db(path=RANKING_INDEX_PATH):
+    path = Path(path)
+    conn = psycopg2.connect(
+        dbname=DB_NAME, user=DB_USER, password=DB_PASSWORD, host=DB_HOST, port=DB_PORT
+    )
+    # Shards written before the snapshot are covered by it (loaders index after commit)
+    covered = set(delta_paths(path))
+    guids, documents = [], []
+    with conn.cursor(name="ranking_index_build") as cur:  # server-side, streamed
+        cur.itersize = 5000
+        cur.execute(DOCUMENTS_QUERY)
+        for guid, title, llm_title, llm_content in cur:
+            guids.append(guid)
+            documents.append(document_text(title, llm_title, llm_content))
+
+    if not documents:
+        conn.close()
+        print("No articles with LLM content; nothing to index.")
+        return
+    index = RankingIndex.build(guids, documents)
+    with _locked(path, exclusive=True):
+        # Shards written during the scan use the old vocabulary and may hold
+        # articles the snapshot missed: re-transform their articles with the new one
+        shards = delta_paths(path)
+        late = []
+        for shard in shards:
+            if shard not in covered:
+                with np.load(shard, allow_pickle=False) as f:
+                    late.extend(f["guids"].tolist())
+        index.save(path)
+        if late:
+            with conn.cursor() as cur:
+                cur.execute(DOCUMENTS_QUERY + " WHERE a.guid = ANY(%s)", (late,))
+                rows = cur.fetchall()
+            if rows:
+                _write_shard(path, index, [r[0] for r in rows], [document_text(*r[1:]) for r in rows])
+        for shard in shards:
+            shard.unlink(missing_ok=True)
+    conn.close()
+    print(f"Indexed {len(guids)} articles, {len(index.terms)} terms -> {path}")
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "build":
+        print("Usage: python app/ranking_index.py build")
+        sys.exit(1)
+    build_from_db()
@@ -0,0 +1,26 @@
+from config import HNSW_EF_SEARCH, HNSW_ITERATIVE_SCAN, IVFFLAT_PROBES
+
+# Query-time recall/latency knobs for the ANN index on articles.embedding.
+# Articles are embedded with normalize_embeddings=True, so the index uses
+# cosine ops and queries must order by the matching operator (<=>).
+
+DISTANCE_OPERATOR = "<=>"
+
+def configure_vector_search(cur, ef_search: int = None, probes: int = None, local: bool = False,
+                            iterative_scan: str = None):
+    """Set hnsw.ef_search / ivfflat.probes / hnsw.iterative_scan for this session
+    (or transaction if local=True). iterative_scan is skipped on pgvector < 0.8."""
+    cur.execute(
+        "SELECT set_config('hnsw.ef_search', %s, %s), set_config('ivfflat.probes', %s, %s);",
+        (str(ef_search or HNSW_EF_SEARCH), local, str(probes or IVFFLAT_PROBES), local)
+    )
+    iterative_scan = iterative_scan or HNSW_ITERATIVE_SCAN
+    if iterative_scan:
+        cur.execute("""
+            SELECT set_config('hnsw.iterative_scan', %s, %s)
+            WHERE current_setting('hnsw.iterative_scan', true) IS NOT NULL;
+        """, (iterative_scan, local))
+
+def vector_literal(vec) -> str:
+    """pgvector text form, for passing a query vector as a %s::vector parameter."""
+    return "[" + ",".join(f"{float(x):.7g}" for x in vec) + "]"
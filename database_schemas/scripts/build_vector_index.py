@@ -0,0 +1,165 @@
+import argparse
+import math
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+import psycopg2
+from dotenv import load_dotenv
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "app"))
+from config import VECTOR_INDEX_METHOD
+from vector_search import DISTANCE_OPERATOR, configure_vector_search
+
+load_dotenv()
+
+DB_NAME = os.getenv("DB_NAME")
+DB_USER = os.getenv("DB_USER")
+DB_PASSWORD = os.getenv("DB_PASSWORD")
+DB_HOST = os.getenv("DB_HOST")
+DB_PORT = int(os.getenv("DB_PORT"))
+
+INDEX_NAME = "idx_articles_embedding"
+# Every query orders by <=> (vector_search.DISTANCE_OPERATOR); an index built
+# with another opclass would never be used
+OPCLASS = "vector_cosine_ops"
+
+
+def count_embedded(cur):
+    cur.execute("SELECT count(*) FROM articles WHERE embedding IS NOT NULL;")
+    return cur.fetchone()[0]
+
+
+def choose_params(method, rows):
+    """Index parameters sized from the number of embedded rows (pgvector guidance)."""
+    if method == "hnsw":
+        if rows < 1_000_000:
+            return {"m": 16, "ef_construction": 64}
+        return {"m": 24, "ef_construction": 128}
+    # ivfflat: rows/1000 lists up to 1M rows, sqrt(rows) beyond; probes ~ sqrt(lists)
+    lists = max(1, rows // 1000) if rows <= 1_000_000 else int(math.sqrt(rows))
+    return {"lists": lists, "probes": max(1, int(math.sqrt(lists)))}
+
+
+def build_index(cur, method, params, maintenance_work_mem):
+    cur.execute("SELECT set_config('maintenance_work_mem', %s, false);", (maintenance_work_mem,))
+    cur.execute(f"DROP INDEX IF EXISTS {INDEX_NAME};")
+    if method == "hnsw":
+        with_clause = f"m = {params['m']}, ef_construction = {params['ef_construction']}"
+    else:
+        with_clause = f"lists = {params['lists']}"
+    sql = (
+        f"CREATE INDEX {INDEX_NAME} ON articles "
+        f"USING {method} (embedding {OPCLASS}) WITH ({with_clause});"
+    )
+    print(sql)
+    start = time.time()
+    cur.execute(sql)
+    cur.execute("ANALYZE articles;")
+    print(f"Index built in {time.time() - start:.1f}s")
+
+
+def sample_queries(cur, n):
+    cur.execute("""
+        SELECT embedding::text FROM articles
+        WHERE embedding IS NOT NULL
+        ORDER BY random() LIMIT %s;
+    """, (n,))
+    return [row[0] for row in cur.fetchall()]
+
+
+def top_k(cur, query, k):
+    cur.execute(
+        f"SELECT guid FROM articles WHERE embedding IS NOT NULL "
+        f"ORDER BY embedding {DISTANCE_OPERATOR} %s::vector LIMIT %s;",
+        (query, k)
+    )
+    return [row[0] for row in cur.fetchall()]
+
+
+def recall_check(cur, method, k, n_queries, knob_values):
+    """Compare ANN results against exact (sequential scan) search for each knob value."""
+    queries = sample_queries(cur, n_queries)
+    if not queries:
+        print("No embedded articles to check.")
+        return
+
+    exact = []
+    exact_ms = []
+    cur.execute("SET enable_indexscan = off;")
+    for q in queries:
+        start = time.perf_counter()
+        exact.append(set(top_k(cur, q, k)))
+        exact_ms.append((time.perf_counter() - start) * 1000)
+    cur.execute("RESET enable_indexscan;")
+    print(f"exact: p50 {statistics.median(exact_ms):.2f} ms")
+
+    knob = "ef_search" if method == "hnsw" else "probes"
+    print(f"{knob:>10} {'recall@' + str(k):>10} {'p50 ms':>8} {'p95 ms':>8}")
+    for value in knob_values:
+        configure_vector_search(cur, **{knob: value})
+        recalls, latencies = [], []
+        for q, truth in zip(queries, exact):
+            start = time.perf_counter()
+            found = top_k(cur, q, k)
+            latencies.append((time.perf_counter() - start) * 1000)
+            recalls.append(len(truth.intersection(found)) / max(1, len(truth)))
+        latencies.sort()
+        p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+        print(f"{value:>10} {statistics.mean(recalls):>10.3f} "
+              f"{statistics.median(latencies):>8.2f} {p95:>8.2f}")
+    configure_vector_search(cur)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build or rebuild the ANN index on articles.embedding (run after bulk loads)."
+    )
+    parser.add_argument("--method", choices=["hnsw", "ivfflat"], default=VECTOR_INDEX_METHOD,
+                        help="default: VECTOR_INDEX_METHOD")
+    parser.add_argument("--maintenance-work-mem", default="1GB")
+    parser.add_argument("--check", action="store_true", help="run the recall-vs-latency check")
+    parser.add_argument("--check-only", action="store_true", help="skip the build, only check")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--values", default=None,
+                        help="comma-separated ef_search (hnsw) or probes (ivfflat) values to test")
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(
+        dbname=DB_NAME, user=DB_USER, password=DB_PASSWORD, host=DB_HOST, port=DB_PORT
+    )
+    conn.autocommit = True
+    cur = conn.cursor()
+
+    rows = count_embedded(cur)
+    params = choose_params(args.method, rows)
+    print(f"{rows} embedded articles -> {args.method} {params}")
+
+    if not args.check_only:
+        if args.method == "ivfflat" and rows == 0:
+            print("Refusing to build IVFFlat on an empty table (centroids would be untrained).")
+            sys.exit(1)
+        build_index(cur, args.method, params, args.maintenance_work_mem)
+
+    if args.check or args.check_only:
+        if args.values:
+            values = [int(v) for v in args.values.split(",")]
+        elif args.method == "hnsw":
+            values = [max(args.k, v) for v in (20, 40, 80, 160)]
+        else:
+            values = sorted({1, max(1, params["probes"] // 2), params["probes"], params["probes"] * 2})
+        recall_check(cur, args.method, args.k, args.queries, values)
+
+    if args.method == "hnsw":
+        print("Query-time knob: HNSW_EF_SEARCH (hnsw.ef_search), must be >= LIMIT.")
+    else:
+        print(f"Query-time knob: IVFFLAT_PROBES (ivfflat.probes), suggested {params['probes']}.")
+
+    cur.close()
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import argparse
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import numpy as np
+import psycopg2
+from dotenv import load_dotenv
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "app"))
+from config import EMBED_DIM, EMBED_MODEL, EMBEDDING_MATRIX_DIR
+
+load_dotenv()
+
+DB_NAME = os.getenv("DB_NAME")
+DB_USER = os.getenv("DB_USER")
+DB_PASSWORD = os.getenv("DB_PASSWORD")
+DB_HOST = os.getenv("DB_HOST")
+DB_PORT = int(os.getenv("DB_PORT"))
+
+# Export layout (read by app_cli/embedding_matrix.py):
+#   manifest.json                 dim, model, bitset width, current base/delta segments
+#   base-<stamp>/embeddings.f32   contiguous float32 rows, C order, opened with np.memmap
+#   base-<stamp>/guids.npy        utf-8 guids (fixed-width bytes), row-aligned
+#   base-<stamp>/ids.npy          uint32 articles.article_id, row-aligned
+#   base-<stamp>/published.npy    datetime64[us] UTC, row-aligned
+#   base-<stamp>/categories.npy   uint64 bitsets, bit (category_id - 1), row-aligned
+#   delta-<stamp>/...             same files, articles embedded since the base export
+# Segments are written under new names and the manifest is swapped last, so
+# processes that already mapped the old files keep reading them until they reload
+# (app_cli/recommender.get_embedding_matrix remaps when the manifest changes).
+
+MANIFEST = "manifest.json"
+# Rows from writers that started before the export snapshot but committed after
+# it carry an embedded_at older than the snapshot; re-export a margin to cover them.
+DELTA_OVERLAP = timedelta(hours=1)
+
+
+def connect():
+    conn = psycopg2.connect(
+        dbname=DB_NAME, user=DB_USER, password=DB_PASSWORD, host=DB_HOST, port=DB_PORT
+    )
+    # One consistent snapshot for the count and the streamed rows
+    conn.set_session(isolation_level="REPEATABLE READ", readonly=True)
+    return conn
+
+
+def read_manifest(out_dir):
+    path = out_dir / MANIFEST
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def write_manifest(out_dir, manifest):
+    fd, tmp = tempfile.mkstemp(dir=out_dir, suffix=".json")
+    with os.fdopen(fd, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, out_dir / MANIFEST)
+
+
+def category_words(cur):
+    cur.execute("SELECT COALESCE(max(category_id), 1) FROM category_labels;")
+    return max(1, math.ceil(cur.fetchone()[0] / 64))
+
+
+def export_segment(conn, seg_dir, since, words):
+    """Stream embedded articles (embedded after `since`, if given) into one segment."""
+    where = "a.embedding IS NOT NULL AND a.embedding_model = %(model)s"
+    if since is not None:
+        where += " AND a.embedded_at > %(since)s"
+    params = {"model": EMBED_MODEL, "since": since}
+
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT count(*) FROM articles a WHERE {where};", params)
+        rows = cur.fetchone()[0]
+
+    seg_dir.mkdir(parents=True)
+    # np.memmap cannot map an empty file; an empty segment keeps one unused row
+    matrix = np.memmap(seg_dir / "embeddings.f32", dtype=np.float32, mode="w+",
+                       shape=(max(rows, 1), EMBED_DIM))
+    guids, published = [], np.empty(rows, dtype="datetime64[us]")
+    ids = np.empty(rows, dtype=np.uint32)
+    bitsets = np.zeros((rows, words), dtype=np.uint64)
+
+    with conn.cursor(name="export_embeddings") as cur:  # server-side, streamed
+        cur.itersize = 5000
+        cur.execute(f"""
+            SELECT a.guid, a.published, a.article_id, a.embedding::text,
+                   (SELECT array_agg(c.category_id) FROM categories c
+                    WHERE c.article_guid = a.guid AND c.published = a.published)
+            FROM articles a
+            WHERE {where}
+            ORDER BY a.published, a.guid
+        """, params)
+        for i, (guid, ts, article_id, vec, cat_ids) in enumerate(cur):
+            matrix[i] = np.fromstring(vec[1:-1], dtype=np.float32, sep=",")
+            guids.append(guid.encode("utf-8"))
+            ids[i] = article_id
+            published[i] = np.datetime64(ts.astimezone(timezone.utc).replace(tzinfo=None), "us")
+            for cat_id in cat_ids or []:
+                bitsets[i, (cat_id - 1) // 64] |= np.uint64(1) << np.uint64((cat_id - 1) % 64)
+    matrix.flush()
+    del matrix
+
+    np.save(seg_dir / "guids.npy", np.asarray(guids, dtype="S") if guids else np.empty(0, dtype="S1"))
+    np.save(seg_dir / "ids.npy", ids)
+    np.save(seg_dir / "published.npy", published)
+    np.save(seg_dir / "categories.npy", bitsets)
+    return {
+        "dir": seg_dir.name,
+        "rows": rows,
+        "embeddings": "embeddings.f32",
+        "guids": "guids.npy",
+        "ids": "ids.npy",
+        "published": "published.npy",
+        "categories": "categories.npy",
+    }
+
+
+def remove_stale_segments(out_dir, manifest):
+    keep = {manifest["base"]["dir"]}
+    if manifest.get("delta"):
+        keep.add(manifest["delta"]["dir"])
+    for path in out_dir.iterdir():
+        if path.is_dir() and path.name not in keep and path.name.startswith(("base-", "delta-")):
+            # Unlinking is safe for readers that still have the files mapped
+            shutil.rmtree(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Export article embeddings to a memory-mapped matrix for in-process ranking."
+    )
+    parser.add_argument("--out", type=Path, default=EMBEDDING_MATRIX_DIR)
+    parser.add_argument("--delta", action="store_true",
+                        help="only export articles embedded since the last full export")
+    args = parser.parse_args()
+
+    out_dir = args.out
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest = read_manifest(out_dir)
+    if args.delta and manifest is None:
+        print("No full export yet; run without --delta first.")
+        sys.exit(1)
+
+    conn = connect()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT now();")  # transaction start == snapshot time
+            snapshot = cur.fetchone()[0]
+            words = category_words(cur)
+        stamp = snapshot.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%S")
+
+        if args.delta:
+            if manifest["category_words"] != words:
+                print("Category dictionary outgrew the exported bitsets; run a full export.")
+                sys.exit(1)
+            since = datetime.fromisoformat(manifest["base"]["exported_at"]) - DELTA_OVERLAP
+            segment = export_segment(conn, out_dir / f"delta-{stamp}", since, words)
+            segment["exported_at"] = snapshot.isoformat()
+            manifest["delta"] = segment
+        else:
+            segment = export_segment(conn, out_dir / f"base-{stamp}", None, words)
+            segment["exported_at"] = snapshot.isoformat()
+            manifest = {
+                "dim": EMBED_DIM,
+                "model": EMBED_MODEL,
+                "category_words": words,
+                "base": segment,
+                "delta": None,
+            }
+        conn.rollback()
+    finally:
+        conn.close()
+
+    write_manifest(out_dir, manifest)
+    remove_stale_segments(out_dir, manifest)
+    kind = "delta" if args.delta else "base"
+    print(f"Exported {segment['rows']} embeddings ({kind}) -> {out_dir / segment['dir']}")
+
+
+if __name__ == "__main__":
+    main()
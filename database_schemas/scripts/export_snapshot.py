@@ -0,0 +1,279 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+import numpy as np
+import psycopg2
+import pyarrow as pa
+import pyarrow.parquet as pq
+from dotenv import load_dotenv
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "app"))
+from config import EMBED_DIM, SNAPSHOT_DIR
+
+load_dotenv()
+
+DB_NAME = os.getenv("DB_NAME")
+DB_USER = os.getenv("DB_USER")
+DB_PASSWORD = os.getenv("DB_PASSWORD")
+DB_HOST = os.getenv("DB_HOST")
+DB_PORT = int(os.getenv("DB_PORT"))
+
+# Snapshot layout (hive-partitioned Parquet, read with pyarrow.dataset):
+#   manifest.json                                      current root, watermarks, export history
+#   snapshot-<stamp>/articles/month=YYYY-MM/part-<stamp>.parquet
+#   snapshot-<stamp>/categories/...                    article_id, published, category_id, category, score
+#   snapshot-<stamp>/tags/...                          article_id, published, tag_id, tag
+#   snapshot-<stamp>/llm_content/...                   article_id, published, title, content
+# articles.embedding is fixed_size_list<float32>[EMBED_DIM]: its values are
+# one flat float32 buffer that NumPy reshapes to (rows, dim) without copying.
+#
+# Rows are streamed from a server-side cursor and written CHUNK_ROWS at a time
+# (one Parquet row group each), so memory stays bounded by the chunk, not the
+# table. --incremental appends new part files for articles published after the
+# last export, plus articles inserted since then with an older published date;
+# files already written are never touched. Updates to exported articles
+# (scores, LLM content, re-embeddings) are picked up by the next full export.
+
+MANIFEST = "manifest.json"
+CHUNK_ROWS = int(os.getenv("SNAPSHOT_CHUNK_ROWS", "10000"))
+TIMESTAMP = pa.timestamp("us", tz="UTC")
+EMBEDDING = pa.list_(pa.float32(), EMBED_DIM)
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# dataset -> (schema, query); the query selects the schema's columns in order,
+# restricted to the exported articles by {where} on `a`, ordered by published
+DATASETS = {
+    "articles": (pa.schema([
+        ("article_id", pa.int32()),
+        ("guid", pa.string()),
+        ("published", TIMESTAMP),
+        ("title", pa.string()),
+        ("link", pa.string()),
+        ("image_url", pa.string()),
+        ("author", pa.string()),
+        ("source", pa.string()),
+        ("likes", pa.int32()),
+        ("views", pa.int32()),
+        ("rating", pa.string()),
+        ("difficulty", pa.string()),
+        ("content_hash", pa.string()),
+        ("embedding_model", pa.string()),
+        ("embedded_at", TIMESTAMP),
+        ("embedding", EMBEDDING),
+    ]), """
+        SELECT a.article_id, a.guid, a.published, a.title, a.link, a.image_url, a.author, a.source,
+               a.likes, a.views, a.rating, a.difficulty, a.content_hash, a.embedding_model,
+               a.embedded_at, a.embedding::text
+        FROM articles a
+        WHERE {where}
+        ORDER BY a.published, a.article_id
+    """),
+    "categories": (pa.schema([
+        ("article_id", pa.int32()),
+        ("published", TIMESTAMP),
+        ("category_id", pa.int16()),
+        ("category", pa.string()),
+        ("score", pa.float32()),
+    ]), """
+        SELECT a.article_id, c.published, c.category_id, l.label, c.score
+        FROM categories c
+        JOIN articles a ON a.guid = c.article_guid AND a.published = c.published
+        JOIN category_labels l ON l.category_id = c.category_id
+        WHERE {where}
+        ORDER BY c.published, a.article_id
+    """),
+    "tags": (pa.schema([
+        ("article_id", pa.int32()),
+        ("published", TIMESTAMP),
+        ("tag_id", pa.int32()),
+        ("tag", pa.string()),
+    ]), """
+        SELECT a.article_id, t.published, t.tag_id, l.label
+        FROM tags t
+        JOIN articles a ON a.guid = t.article_guid AND a.published = t.published
+        JOIN tag_labels l ON l.tag_id = t.tag_id
+        WHERE {where}
+        ORDER BY t.published, a.article_id
+    """),
+    "llm_content": (pa.schema([
+        ("article_id", pa.int32()),
+        ("published", TIMESTAMP),
+        ("title", pa.string()),
+        ("content", pa.string()),
+    ]), """
+        SELECT a.article_id, llm.published, llm.title, llm.content
+        FROM llm_content llm
+        JOIN articles a ON a.guid = llm.article_guid AND a.published = llm.published
+        WHERE {where}
+        ORDER BY llm.published, a.article_id
+    """),
+}
+
+
+def connect():
+    conn = psycopg2.connect(
+        dbname=DB_NAME, user=DB_USER, password=DB_PASSWORD, host=DB_HOST, port=DB_PORT
+    )
+    # One consistent snapshot for the watermarks and every dataset
+    conn.set_session(isolation_level="REPEATABLE READ", readonly=True)
+    return conn
+
+
+def read_manifest(out_dir):
+    path = out_dir / MANIFEST
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def write_manifest(out_dir, manifest):
+    fd, tmp = tempfile.mkstemp(dir=out_dir, suffix=".json")
+    with os.fdopen(fd, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, out_dir / MANIFEST)
+
+
+def embedding_array(texts):
+    """pgvector text values (None for articles without one) -> fixed-size float32 lists."""
+    values = np.zeros((len(texts), EMBED_DIM), dtype=np.float32)
+    valid = np.zeros(len(texts), dtype=bool)
+    for i, vec in enumerate(texts):
+        if vec is not None:
+            values[i] = np.fromstring(vec[1:-1], dtype=np.float32, sep=",")
+            valid[i] = True
+    validity = None if valid.all() else pa.array(valid).buffers()[1]
+    return pa.Array.from_buffers(EMBEDDING, len(texts), [validity], children=[pa.array(values.ravel())])
+
+
+def to_batch(schema, rows):
+    columns = list(zip(*rows))
+    arrays = [embedding_array(col) if field.type == EMBEDDING else pa.array(col, type=field.type)
+              for field, col in zip(schema, columns)]
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def export_dataset(conn, root, name, where, params, stamp):
+    """Stream one dataset into month partitions. Returns (rows, files written
+    under a temporary name; see publish)."""
+    schema, query = DATASETS[name]
+    published = schema.get_field_index("published")
+    files, buffer, count = [], [], 0
+    writer = month = None
+
+    def flush():
+        if buffer:
+            writer.write_batch(to_batch(schema, buffer))
+            buffer.clear()
+
+    with conn.cursor(name=f"snapshot_{name}") as cur:  # server-side, streamed
+        cur.itersize = CHUNK_ROWS
+        cur.execute(query.format(where=where), params)
+        for row in cur:
+            row_month = row[published].astimezone(timezone.utc).strftime("%Y-%m")
+            if row_month != month:
+                if writer is not None:
+                    flush()
+                    writer.close()
+                month = row_month
+                path = root / name / f"month={month}" / f"_part-{stamp}.parquet"
+                path.parent.mkdir(parents=True, exist_ok=True)
+                writer = pq.ParquetWriter(path, schema, compression="zstd")
+                files.append(path)
+            elif len(buffer) >= CHUNK_ROWS:
+                flush()
+            buffer.append(row)
+            count += 1
+    if writer is not None:
+        flush()
+        writer.close()
+    return count, files
+
+
+def publish(files):
+    """Drop the leading underscore: pyarrow.dataset skips _-prefixed files, so
+    readers never see a partial export."""
+    for path in files:
+        os.replace(path, path.with_name(path.name[1:]))
+
+
+def remove_stale_snapshots(out_dir, manifest):
+    for path in out_dir.iterdir():
+        if path.is_dir() and path.name.startswith("snapshot-") and path.name != manifest["root"]:
+            shutil.rmtree(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Export articles, categories, tags, LLM content and embeddings as a Parquet snapshot."
+    )
+    parser.add_argument("--out", type=Path, default=SNAPSHOT_DIR)
+    parser.add_argument("--incremental", action="store_true",
+                        help="append articles added since the last export instead of rewriting")
+    args = parser.parse_args()
+
+    out_dir = args.out
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest = read_manifest(out_dir)
+    if args.incremental:
+        if manifest is None:
+            print("No snapshot yet; run without --incremental first.")
+            sys.exit(1)
+        if manifest["dim"] != EMBED_DIM:
+            print("Embedding dimension changed since the snapshot; run a full export.")
+            sys.exit(1)
+
+    conn = connect()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT now();")  # transaction start == snapshot time
+            snapshot = cur.fetchone()[0]
+        stamp = snapshot.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%S")
+
+        if args.incremental:
+            root = out_dir / manifest["root"]
+            where = "(a.published > %(through)s OR a.article_id > %(last_id)s)"
+            params = {"through": datetime.fromisoformat(manifest["through"]) if manifest["through"] else EPOCH,
+                      "last_id": manifest["last_article_id"]}
+        else:
+            root = out_dir / f"snapshot-{stamp}"
+            where, params = "TRUE", {}
+            manifest = {"dim": EMBED_DIM, "root": root.name, "through": None,
+                        "last_article_id": 0, "exports": []}
+
+        with conn.cursor() as cur:
+            cur.execute(f"SELECT max(a.published), max(a.article_id) FROM articles a WHERE {where};", params)
+            through, last_id = cur.fetchone()
+
+        rows, files = {}, []
+        for name in DATASETS:
+            rows[name], written = export_dataset(conn, root, name, where, params, stamp)
+            files.extend(written)
+        conn.rollback()
+    finally:
+        conn.close()
+
+    publish(files)
+    if through is not None:
+        # Late rows (older published, new article_id) never move the watermarks back
+        if manifest["through"] is None or through > datetime.fromisoformat(manifest["through"]):
+            manifest["through"] = through.isoformat()
+        manifest["last_article_id"] = max(last_id, manifest["last_article_id"])
+    manifest["exports"].append({
+        "stamp": stamp,
+        "kind": "incremental" if args.incremental else "full",
+        "exported_at": snapshot.isoformat(),
+        "rows": rows,
+    })
+    write_manifest(out_dir, manifest)
+    remove_stale_snapshots(out_dir, manifest)
+    summary = ", ".join(f"{count} {name}" for name, count in rows.items())
+    print(f"Exported {summary} -> {root}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,8 @@ from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
 from dotenv import load_dotenv
 from pathlib import Path
 
+from migrate import mark_all_applied
+
 load_dotenv()
 
 DB_NAME = os.getenv("DB_NAME")
@@ -15,6 +17,7 @@ DB_PORT = int(os.getenv("DB_PORT"))
 ROOT = Path(__file__).resolve().parents[1]
 schema_path = ROOT / "sql" / "schema.sql"
 indices_path = ROOT / "sql" / "indices.sql"
+categories_path = ROOT.parent / "data_extraction" / "resources" / "categories.txt"
 
 
 def run_sql(cursor, path, split_statements=False):
@@ -30,6 +33,17 @@ def run_sql(cursor, path, split_statements=False):
             cursor.execute(sql)
 
 
+def seed_category_labels(cur):
+    """Give the known categories stable ids 1..N in file order."""
+    with open(categories_path, "r", encoding="utf-8") as f:
+        categories = [line.strip() for line in f if line.strip()]
+    for category in categories:
+        cur.execute(
+            "INSERT INTO category_labels (label) VALUES (%s) ON CONFLICT (label) DO NOTHING;",
+            (category,)
+        )
+
+
 def ensure_database():
     """Check if database exists; create if missing."""
     conn = psycopg2.connect(
@@ -97,9 +111,15 @@ def main():
     print("Applying schema.sql ...")
     run_sql(cur, schema_path, split_statements=False)  # run whole schema at once
 
+    print("Seeding category labels ...")
+    seed_category_labels(cur)
+
     print("Applying indices.sql ...")
     run_sql(cur, indices_path, split_statements=False)
 
+    # Fresh schema already contains every migration
+    mark_all_applied(cur)
+
     cur.close()
     conn.close()
     print("Schema and indices initialized successfully.")
@@ -0,0 +1,68 @@
+import os
+import psycopg2
+from dotenv import load_dotenv
+from pathlib import Path
+
+load_dotenv()
+
+DB_NAME = os.getenv("DB_NAME")
+DB_USER = os.getenv("DB_USER")
+DB_PASSWORD = os.getenv("DB_PASSWORD")
+DB_HOST = os.getenv("DB_HOST")
+DB_PORT = int(os.getenv("DB_PORT"))
+
+ROOT = Path(__file__).resolve().parents[1]
+migrations_dir = ROOT / "sql" / "migrations"
+
+
+def migration_files():
+    """All migration files, in the order they must be applied."""
+    return sorted(migrations_dir.glob("*.sql"))
+
+
+def ensure_migrations_table(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            filename TEXT PRIMARY KEY,
+            applied_at TIMESTAMPTZ DEFAULT now()
+        );
+    """)
+
+
+def mark_all_applied(cur):
+    """Record every migration as applied (schema.sql is already up to date)."""
+    ensure_migrations_table(cur)
+    for path in migration_files():
+        cur.execute(
+            "INSERT INTO schema_migrations (filename) VALUES (%s) ON CONFLICT DO NOTHING;",
+            (path.name,)
+        )
+
+
+def main():
+    conn = psycopg2.connect(
+        dbname=DB_NAME, user=DB_USER, password=DB_PASSWORD, host=DB_HOST, port=DB_PORT
+    )
+    cur = conn.cursor()
+    ensure_migrations_table(cur)
+    conn.commit()
+
+    cur.execute("SELECT filename FROM schema_migrations;")
+    applied = {row[0] for row in cur.fetchall()}
+
+    pending = [p for p in migration_files() if p.name not in applied]
+    if not pending:
+        print("Schema is up to date.")
+    for path in pending:
+        print(f"Applying {path.name} ...")
+        with open(path, "r", encoding="utf-8") as f:
+            cur.execute(f.read())
+        cur.execute("INSERT INTO schema_migrations (filename) VALUES (%s);", (path.name,))
+        conn.commit()  # one transaction per migration
+
+    cur.close()
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
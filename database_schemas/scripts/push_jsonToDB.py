@@ -1,10 +1,15 @@
-import json
 import os
+import sys
 from pathlib import Path
 import psycopg2
-from psycopg2.extras import execute_values
 from dotenv import load_dotenv
 
+sys.path.append(str(Path(__file__).resolve().parents[1] / "app"))
+from article import read_articles
+from article_writer import upsert_articles
+from ranking_index import index_articles
+from cohort_refresh import refresh_cohort_feeds
+
 load_dotenv()
 
 DB_NAME = os.getenv("DB_NAME")
@@ -25,104 +30,14 @@ def push_to_db(data):
         host=DB_HOST,
         port=DB_PORT,
     )
-    conn.autocommit = True
     cur = conn.cursor()
 
-    # ----------------------
-    # 1. Insert articles
-    # ----------------------
-    articles_values = []
-    for item in data:
-        articles_values.append((
-            item["guid"],
-            item.get("title"),
-            item.get("link"),
-            item.get("published"),
-            item.get("summary"),
-            item.get("description"),
-            item.get("image_url"),
-            item.get("author"),
-            item.get("source"),
-            item.get("content"),
-            item.get("likes", 0),
-            item.get("views", 0),
-            item.get("rating"),
-            item.get("difficulty")
-        ))
-
-    article_query = """
-        INSERT INTO articles (
-            guid, title, link, published, summary, description, image_url,
-            author, source, content, likes, views, rating, difficulty
-        ) VALUES %s
-        ON CONFLICT (guid) DO NOTHING;
-    """
-    execute_values(cur, article_query, articles_values)
-
-    # ----------------------
-    # 2. Insert RSS categories
-    # ----------------------
-    rss_values = []
-    for item in data:
-        for cat in item.get("rss_categories", []):
-            rss_values.append((item["guid"], cat))
-
-    rss_query = """
-        INSERT INTO rss_categories (article_guid, category)
-        VALUES %s
-        ON CONFLICT DO NOTHING;
-    """
-    if rss_values:
-        execute_values(cur, rss_query, rss_values)
-
-    # ----------------------
-    # 3. Insert categories (with score)
-    # ----------------------
-    cat_values = []
-    for item in data:
-        for cat_obj in item.get("categories", []):
-            cat_values.append((item["guid"], cat_obj["category"], cat_obj["score"]))
-
-    cat_query = """
-        INSERT INTO categories (article_guid, category, score)
-        VALUES %s
-        ON CONFLICT DO NOTHING;
-    """
-    if cat_values:
-        execute_values(cur, cat_query, cat_values)
-
-    # ----------------------
-    # 4. Insert tags
-    # ----------------------
-    tag_values = []
-    for item in data:
-        for tag in item.get("tags", []):
-            tag_values.append((item["guid"], tag))
-
-    tag_query = """
-        INSERT INTO tags (article_guid, tag)
-        VALUES %s
-        ON CONFLICT DO NOTHING;
-    """
-    if tag_values:
-        execute_values(cur, tag_query, tag_values)
-
-    # ----------------------
-    # 5. Insert LLM_CONTENT
-    # ----------------------
-    llm_values = []
-    for item in data:
-        llm = item.get("LLM_CONTENT")
-        if llm:
-            llm_values.append((item["guid"], llm.get("title"), llm.get("content")))
-
-    llm_query = """
-        INSERT INTO llm_content (article_guid, title, content)
-        VALUES %s
-        ON CONFLICT (article_guid) DO NOTHING;
-    """
-    if llm_values:
-        execute_values(cur, llm_query, llm_values)
+    # Articles + rss_categories, categories, tags, llm_content in one transaction;
+    # safe to re-run on the same file.
+    upsert_articles(cur, data)
+    conn.commit()
+    index_articles(data)  # keep the TF-IDF ranking index current
+    refresh_cohort_feeds()
 
     cur.close()
     conn.close()
@@ -130,10 +45,7 @@ def push_to_db(data):
 
 
 def main():
-    with open(json_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    push_to_db(data)
+    push_to_db(read_articles(json_path))
 
 
 if __name__ == "__main__":
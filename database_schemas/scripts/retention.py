@@ -0,0 +1,124 @@
+import argparse
+import gzip
+import os
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+import psycopg2
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DB_NAME = os.getenv("DB_NAME")
+DB_USER = os.getenv("DB_USER")
+DB_PASSWORD = os.getenv("DB_PASSWORD")
+DB_HOST = os.getenv("DB_HOST")
+DB_PORT = int(os.getenv("DB_PORT"))
+
+ARCHIVE_SCHEMA = "archive"
+# Children first: their foreign keys point at the articles partition
+CHILD_TABLES = ["article_bodies", "rss_categories", "categories", "tags", "llm_content"]
+PARTITION_RE = re.compile(r"^articles_(\d{4})_(\d{2})$")
+
+
+def month_partitions(cur):
+    """(year, month) of every attached articles partition, oldest first."""
+    cur.execute("""
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = 'articles';
+    """)
+    months = []
+    for (name,) in cur.fetchall():
+        match = PARTITION_RE.match(name)
+        if match:
+            months.append((int(match.group(1)), int(match.group(2))))
+    return sorted(months)
+
+
+def cutoff_month(keep_months):
+    now = datetime.now(timezone.utc)
+    index = now.year * 12 + (now.month - 1) - keep_months + 1
+    return divmod(index, 12)[0], divmod(index, 12)[1] + 1
+
+
+def detach(cur, parent, partition):
+    cur.execute(f"ALTER TABLE {parent} DETACH PARTITION {partition};")
+    # The detached table keeps a copy of the parent's foreign key to articles,
+    # which would block detaching the articles partition itself.
+    cur.execute("""
+        SELECT conname FROM pg_constraint
+        WHERE conrelid = %s::regclass AND contype = 'f';
+    """, (partition,))
+    for (conname,) in cur.fetchall():
+        cur.execute(f'ALTER TABLE {partition} DROP CONSTRAINT "{conname}";')
+
+
+def archive(cur, partition):
+    cur.execute(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA};")
+    cur.execute(f"ALTER TABLE {partition} SET SCHEMA {ARCHIVE_SCHEMA};")
+
+
+def export_and_drop(cur, partition, export_dir):
+    path = Path(export_dir) / f"{partition}.csv.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        cur.copy_expert(f"COPY {partition} TO STDOUT WITH (FORMAT csv, HEADER)", f)
+    cur.execute(f"DROP TABLE {partition};")
+    print(f"  exported {partition} -> {path}")
+
+
+def retire_month(conn, year, month, mode, export_dir):
+    suffix = f"{year:04d}_{month:02d}"
+    cur = conn.cursor()
+    partitions = [(child, f"{child}_{suffix}") for child in CHILD_TABLES] + [("articles", f"articles_{suffix}")]
+    for parent, partition in partitions:
+        cur.execute("SELECT to_regclass(%s);", (f"public.{partition}",))
+        if cur.fetchone()[0] is None:
+            continue
+        detach(cur, parent, partition)
+        if mode == "archive":
+            archive(cur, partition)
+        else:
+            export_and_drop(cur, partition, export_dir)
+    conn.commit()  # one month at a time
+    cur.close()
+    print(f"Retired {suffix} ({mode}).")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Move article partitions older than the retention window out of the live tables."
+    )
+    parser.add_argument("--keep-months", type=int, default=12,
+                        help="number of most recent months (including the current one) to keep")
+    parser.add_argument("--mode", choices=["archive", "export"], default="archive",
+                        help="archive: move to the archive schema; export: gzip CSV then drop")
+    parser.add_argument("--export-dir", default="archive_exports")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(
+        dbname=DB_NAME, user=DB_USER, password=DB_PASSWORD, host=DB_HOST, port=DB_PORT
+    )
+    cur = conn.cursor()
+    cutoff = cutoff_month(args.keep_months)
+    old = [m for m in month_partitions(cur) if m < cutoff]
+    cur.close()
+
+    if not old:
+        print(f"Nothing older than {cutoff[0]:04d}-{cutoff[1]:02d}.")
+    if args.mode == "export" and old and not args.dry_run:
+        Path(args.export_dir).mkdir(parents=True, exist_ok=True)
+    for year, month in old:
+        if args.dry_run:
+            print(f"Would retire {year:04d}_{month:02d} ({args.mode}).")
+            continue
+        retire_month(conn, year, month, args.mode, args.export_dir)
+
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Import-time cost of every entry point, measured the way `python -X importtime`
+# reports it: each entry module is imported in a fresh interpreter (its
+# __main__ block does not run), the wall time of the whole process is taken
+# and the heaviest top-level imports are listed from the importtime trace.
+# Heavy models, clients and connections are created on first use, so an entry
+# point that shows torch, transformers, sklearn or google.* here is a regression.
+#
+#   python scripts/startup_benchmark.py            (from database_schemas/)
+#   python scripts/startup_benchmark.py --runs 5 --top 8 --budget 0.5
+
+ROOT = Path(__file__).resolve().parents[2]
+
+# (directory the entry point runs from, module)
+ENTRY_POINTS = [
+    ("app_cli", "app"),
+    ("app_cli", "server"),
+    ("app_cli", "get_posts"),
+    ("app_cli", "popularity"),
+    ("app_cli", "cohorts"),
+    ("app_cli", "precompute_feeds"),
+    ("data_extraction", "main"),
+    ("data_extraction", "pushing_to_db_from_json"),
+    ("database_schemas/app", "load_content"),
+    ("database_schemas/app", "ranking_index"),
+    ("database_schemas/scripts", "migrate"),
+    ("database_schemas/scripts", "export_embeddings"),
+    ("database_schemas/scripts", "build_vector_index"),
+    ("database_schemas/scripts", "retention"),
+]
+
+
+def parse_importtime(stderr):
+    """[(cumulative us, package)] of the top-level imports in a -X importtime trace."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        # Nested imports are indented under their parent; keep the outermost
+        if not name.startswith("  "):
+            imports.append((int(cumulative), name.strip()))
+    return imports
+
+
+def measure(directory, module):
+    """(wall seconds, top-level imports, error line or None) for one import."""
+    cwd = ROOT / directory
+    code = f"import sys; sys.path.insert(0, {str(cwd)!r}); import {module}"
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=cwd, capture_output=True, text=True, env=os.environ.copy(),
+    )
+    elapsed = time.perf_counter() - start
+    error = None
+    if proc.returncode != 0:
+        lines = [l for l in proc.stderr.splitlines() if l and not l.startswith("import time:")]
+        error = lines[-1] if lines else f"exit code {proc.returncode}"
+    return elapsed, parse_importtime(proc.stderr), error
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the import-time startup cost of each entry point.")
+    parser.add_argument("--runs", type=int, default=3, help="imports per entry point; the median is reported")
+    parser.add_argument("--top", type=int, default=5, help="heaviest top-level imports to list")
+    parser.add_argument("--budget", type=float, default=1.0,
+                        help="seconds; exit 1 if an entry point is slower or fails to import")
+    parser.add_argument("only", nargs="*", help="entry modules to measure (default: all)")
+    args = parser.parse_args()
+
+    over_budget, failed = [], []
+    for directory, module in ENTRY_POINTS:
+        if args.only and module not in args.only:
+            continue
+        runs = [measure(directory, module) for _ in range(max(args.runs, 1))]
+        elapsed = statistics.median(r[0] for r in runs)
+        _, imports, error = runs[-1]
+        label = f"{directory}/{module}.py"
+        if error:
+            print(f"{label:<50} failed: {error}")
+            failed.append(label)
+            continue
+        flag = "  OVER BUDGET" if elapsed > args.budget else ""
+        print(f"{label:<50} {elapsed * 1000:8.0f} ms{flag}")
+        for cumulative, name in sorted(imports, reverse=True)[:args.top]:
+            print(f"    {cumulative / 1000:8.1f} ms  {name}")
+        if flag:
+            over_budget.append(label)
+
+    if failed:
+        print(f"\n{len(failed)} entry point(s) failed to import")
+    if over_budget:
+        print(f"\n{len(over_budget)} entry point(s) over the {args.budget:.2f}s budget")
+    if failed or over_budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
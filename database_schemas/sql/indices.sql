@@ -10,41 +10,49 @@ CREATE INDEX IF NOT EXISTS idx_views_user_id ON views(user_id);
 
 -- =========================
 -- VIEW CATEGORIES INDICES
+-- (lookups by view_id use the (view_id, category_id) primary key)
 -- =========================
-CREATE INDEX IF NOT EXISTS idx_view_categories_view_id ON view_categories(view_id);
-CREATE INDEX IF NOT EXISTS idx_view_categories_category ON view_categories(category);
+CREATE INDEX IF NOT EXISTS idx_view_categories_category ON view_categories(category_id);
 
 -- =========================
 -- ARTICLES INDICES
 -- =========================
 CREATE INDEX IF NOT EXISTS idx_articles_published ON articles(published);
+CREATE INDEX IF NOT EXISTS idx_articles_embedded_at ON articles(embedded_at);
 CREATE INDEX IF NOT EXISTS idx_articles_title ON articles(title);
-CREATE INDEX IF NOT EXISTS idx_articles_content ON articles USING gin(to_tsvector('english', content));
+CREATE INDEX IF NOT EXISTS idx_article_bodies_search_tsv ON article_bodies USING gin(search_tsv);
 
 -- =========================
--- RSS CATEGORIES INDICES
+-- RSS CATEGORIES / CATEGORIES / TAGS INDICES
+-- (lookups by article_guid use the (article_guid, label id) primary keys)
 -- =========================
-CREATE INDEX IF NOT EXISTS idx_rss_categories_article_guid ON rss_categories(article_guid);
-CREATE INDEX IF NOT EXISTS idx_rss_categories_category ON rss_categories(category);
+CREATE INDEX IF NOT EXISTS idx_rss_categories_category ON rss_categories(rss_category_id);
+CREATE INDEX IF NOT EXISTS idx_categories_category_score ON categories(category_id, score DESC);
+CREATE INDEX IF NOT EXISTS idx_tags_tag ON tags(tag_id);
 
 -- =========================
--- CATEGORIES INDICES
+-- LLM CONTENT INDICES
 -- =========================
-CREATE INDEX IF NOT EXISTS idx_categories_article_guid ON categories(article_guid);
-CREATE INDEX IF NOT EXISTS idx_categories_category ON categories(category);
+CREATE INDEX IF NOT EXISTS idx_llm_content_article_guid ON llm_content(article_guid);
 
 -- =========================
--- TAGS INDICES
+-- INTERACTION INDICES
 -- =========================
-CREATE INDEX IF NOT EXISTS idx_tags_article_guid ON tags(article_guid);
-CREATE INDEX IF NOT EXISTS idx_tags_tag ON tags(tag);
+CREATE INDEX IF NOT EXISTS idx_interaction_events_view ON interaction_events(view_id, created_at);
 
 -- =========================
--- LLM CONTENT INDICES
+-- POPULARITY INDICES (cold-start feed: most popular first)
 -- =========================
-CREATE INDEX IF NOT EXISTS idx_llm_content_article_guid ON llm_content(article_guid);
+CREATE INDEX IF NOT EXISTS idx_article_popularity_score ON article_popularity(log_score, article_id);
+
+-- =========================
+-- FEED CACHE INDICES (LRU eviction)
+-- =========================
+CREATE INDEX IF NOT EXISTS idx_feed_cache_last_used ON feed_cache(last_used_at);
 
 -- =========================
 -- EMBEDDING VECTOR INDEX (for similarity search)
+-- Not created here: an IVFFlat index built on an empty table has untrained
+-- centroids. Build it after loading data with
+--   python scripts/build_vector_index.py
 -- =========================
-CREATE INDEX IF NOT EXISTS idx_articles_embedding ON articles USING ivfflat (embedding vector_l2_ops) WITH (lists = 100);
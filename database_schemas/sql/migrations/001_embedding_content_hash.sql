@@ -0,0 +1,4 @@
+-- Record which text and model produced each embedding so loaders can skip
+-- re-embedding articles whose title/content did not change.
+ALTER TABLE articles ADD COLUMN IF NOT EXISTS content_hash TEXT;
+ALTER TABLE articles ADD COLUMN IF NOT EXISTS embedding_model TEXT;
@@ -0,0 +1,37 @@
+-- Composite keys for the child tables so ON CONFLICT upserts actually fire.
+-- Existing duplicates are collapsed first, keeping the most recently inserted
+-- row (highest id) so categories keep their latest score.
+
+DELETE FROM rss_categories a USING rss_categories b
+WHERE a.article_guid = b.article_guid AND a.category = b.category AND a.id < b.id;
+DELETE FROM rss_categories WHERE article_guid IS NULL OR category IS NULL;
+ALTER TABLE rss_categories DROP CONSTRAINT rss_categories_pkey;
+ALTER TABLE rss_categories DROP COLUMN id;
+ALTER TABLE rss_categories ADD PRIMARY KEY (article_guid, category);
+
+DELETE FROM categories a USING categories b
+WHERE a.article_guid = b.article_guid AND a.category = b.category AND a.id < b.id;
+DELETE FROM categories WHERE article_guid IS NULL OR category IS NULL;
+ALTER TABLE categories DROP CONSTRAINT categories_pkey;
+ALTER TABLE categories DROP COLUMN id;
+ALTER TABLE categories ADD PRIMARY KEY (article_guid, category);
+
+DELETE FROM tags a USING tags b
+WHERE a.article_guid = b.article_guid AND a.tag = b.tag AND a.id < b.id;
+DELETE FROM tags WHERE article_guid IS NULL OR tag IS NULL;
+ALTER TABLE tags DROP CONSTRAINT tags_pkey;
+ALTER TABLE tags DROP COLUMN id;
+ALTER TABLE tags ADD PRIMARY KEY (article_guid, tag);
+
+DELETE FROM view_categories a USING view_categories b
+WHERE a.view_id = b.view_id AND a.category = b.category AND a.id < b.id;
+DELETE FROM view_categories WHERE view_id IS NULL;
+ALTER TABLE view_categories DROP CONSTRAINT view_categories_pkey;
+ALTER TABLE view_categories DROP COLUMN id;
+ALTER TABLE view_categories ADD PRIMARY KEY (view_id, category);
+
+-- Covered by the new primary keys
+DROP INDEX IF EXISTS idx_rss_categories_article_guid;
+DROP INDEX IF EXISTS idx_categories_article_guid;
+DROP INDEX IF EXISTS idx_tags_article_guid;
+DROP INDEX IF EXISTS idx_view_categories_view_id;
@@ -0,0 +1,58 @@
+-- Move category / RSS category / tag strings into dictionary tables and
+-- replace the TEXT columns of the link tables with integer ids.
+
+CREATE TABLE category_labels (
+    category_id SMALLSERIAL PRIMARY KEY,
+    label TEXT UNIQUE NOT NULL
+);
+CREATE TABLE rss_category_labels (
+    rss_category_id SERIAL PRIMARY KEY,
+    label TEXT UNIQUE NOT NULL
+);
+CREATE TABLE tag_labels (
+    tag_id SERIAL PRIMARY KEY,
+    label TEXT UNIQUE NOT NULL
+);
+
+INSERT INTO category_labels (label)
+SELECT category FROM categories
+UNION
+SELECT category FROM view_categories
+ORDER BY 1;
+INSERT INTO rss_category_labels (label) SELECT DISTINCT category FROM rss_categories ORDER BY 1;
+INSERT INTO tag_labels (label) SELECT DISTINCT tag FROM tags ORDER BY 1;
+
+-- categories
+ALTER TABLE categories ADD COLUMN category_id SMALLINT REFERENCES category_labels(category_id);
+UPDATE categories c SET category_id = l.category_id FROM category_labels l WHERE l.label = c.category;
+ALTER TABLE categories DROP CONSTRAINT categories_pkey;
+ALTER TABLE categories DROP COLUMN category;
+ALTER TABLE categories ALTER COLUMN score TYPE REAL;
+ALTER TABLE categories ADD PRIMARY KEY (article_guid, category_id);
+
+-- view_categories
+ALTER TABLE view_categories ADD COLUMN category_id SMALLINT REFERENCES category_labels(category_id);
+UPDATE view_categories v SET category_id = l.category_id FROM category_labels l WHERE l.label = v.category;
+ALTER TABLE view_categories DROP CONSTRAINT view_categories_pkey;
+ALTER TABLE view_categories DROP COLUMN category;
+ALTER TABLE view_categories ADD PRIMARY KEY (view_id, category_id);
+
+-- rss_categories
+ALTER TABLE rss_categories ADD COLUMN rss_category_id INT REFERENCES rss_category_labels(rss_category_id);
+UPDATE rss_categories r SET rss_category_id = l.rss_category_id FROM rss_category_labels l WHERE l.label = r.category;
+ALTER TABLE rss_categories DROP CONSTRAINT rss_categories_pkey;
+ALTER TABLE rss_categories DROP COLUMN category;
+ALTER TABLE rss_categories ADD PRIMARY KEY (article_guid, rss_category_id);
+
+-- tags
+ALTER TABLE tags ADD COLUMN tag_id INT REFERENCES tag_labels(tag_id);
+UPDATE tags t SET tag_id = l.tag_id FROM tag_labels l WHERE l.label = t.tag;
+ALTER TABLE tags DROP CONSTRAINT tags_pkey;
+ALTER TABLE tags DROP COLUMN tag;
+ALTER TABLE tags ADD PRIMARY KEY (article_guid, tag_id);
+
+-- Label indexes were dropped with their columns
+CREATE INDEX IF NOT EXISTS idx_view_categories_category ON view_categories(category_id);
+CREATE INDEX IF NOT EXISTS idx_rss_categories_category ON rss_categories(rss_category_id);
+CREATE INDEX IF NOT EXISTS idx_categories_category ON categories(category_id);
+CREATE INDEX IF NOT EXISTS idx_tags_tag ON tags(tag_id);
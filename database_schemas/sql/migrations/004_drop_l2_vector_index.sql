@@ -0,0 +1,4 @@
+-- The old index was IVFFlat with L2 ops, trained on an empty table, while
+-- embeddings are normalized for cosine similarity. Rebuild it afterwards with
+--   python scripts/build_vector_index.py
+DROP INDEX IF EXISTS idx_articles_embedding;
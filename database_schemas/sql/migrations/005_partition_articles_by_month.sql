@@ -0,0 +1,122 @@
+-- Rebuild articles and its child tables as tables partitioned by published
+-- month. The old tables are parked in a scratch schema, copied over and dropped.
+-- Rows without a published date get the migration time. Afterwards rebuild
+-- the vector index with scripts/build_vector_index.py.
+
+CREATE SCHEMA migrate_old;
+ALTER TABLE articles SET SCHEMA migrate_old;
+ALTER TABLE rss_categories SET SCHEMA migrate_old;
+ALTER TABLE categories SET SCHEMA migrate_old;
+ALTER TABLE tags SET SCHEMA migrate_old;
+ALTER TABLE llm_content SET SCHEMA migrate_old;
+
+CREATE TABLE articles (
+    guid TEXT NOT NULL,
+    title TEXT,
+    link TEXT,
+    published TIMESTAMPTZ NOT NULL,
+    summary TEXT,
+    description TEXT,
+    image_url TEXT,
+    author TEXT,
+    source TEXT,
+    content TEXT,
+    likes INT DEFAULT 0,
+    views INT DEFAULT 0,
+    rating TEXT,
+    difficulty TEXT,
+    embedding vector(384),
+    content_hash TEXT,
+    embedding_model TEXT,
+    PRIMARY KEY (guid, published)
+) PARTITION BY RANGE (published);
+
+CREATE TABLE rss_categories (
+    article_guid TEXT NOT NULL,
+    published TIMESTAMPTZ NOT NULL,
+    rss_category_id INT REFERENCES rss_category_labels(rss_category_id),
+    PRIMARY KEY (article_guid, rss_category_id, published),
+    FOREIGN KEY (article_guid, published) REFERENCES articles(guid, published) ON DELETE CASCADE
+) PARTITION BY RANGE (published);
+
+CREATE TABLE categories (
+    article_guid TEXT NOT NULL,
+    published TIMESTAMPTZ NOT NULL,
+    category_id SMALLINT REFERENCES category_labels(category_id),
+    score REAL,
+    PRIMARY KEY (article_guid, category_id, published),
+    FOREIGN KEY (article_guid, published) REFERENCES articles(guid, published) ON DELETE CASCADE
+) PARTITION BY RANGE (published);
+
+CREATE TABLE tags (
+    article_guid TEXT NOT NULL,
+    published TIMESTAMPTZ NOT NULL,
+    tag_id INT REFERENCES tag_labels(tag_id),
+    PRIMARY KEY (article_guid, tag_id, published),
+    FOREIGN KEY (article_guid, published) REFERENCES articles(guid, published) ON DELETE CASCADE
+) PARTITION BY RANGE (published);
+
+CREATE TABLE llm_content (
+    article_guid TEXT NOT NULL,
+    published TIMESTAMPTZ NOT NULL,
+    title TEXT,
+    content TEXT,
+    PRIMARY KEY (article_guid, published),
+    FOREIGN KEY (article_guid, published) REFERENCES articles(guid, published) ON DELETE CASCADE
+) PARTITION BY RANGE (published);
+
+CREATE OR REPLACE FUNCTION ensure_month_partition(ts TIMESTAMPTZ) RETURNS VOID AS $$
+DECLARE
+    month_start TIMESTAMPTZ := date_trunc('month', ts AT TIME ZONE 'UTC') AT TIME ZONE 'UTC';
+    month_end TIMESTAMPTZ := (date_trunc('month', ts AT TIME ZONE 'UTC') + INTERVAL '1 month') AT TIME ZONE 'UTC';
+    suffix TEXT := to_char(ts AT TIME ZONE 'UTC', 'YYYY_MM');
+    parent TEXT;
+BEGIN
+    FOREACH parent IN ARRAY ARRAY['articles', 'rss_categories', 'categories', 'tags', 'llm_content'] LOOP
+        IF to_regclass(format('public.%I', parent || '_' || suffix)) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                parent || '_' || suffix, parent, month_start, month_end
+            );
+        END IF;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+UPDATE migrate_old.articles SET published = now() WHERE published IS NULL;
+SELECT ensure_month_partition(m)
+-- Truncate in UTC, like ensure_month_partition's bounds (not the session time zone)
+FROM (SELECT DISTINCT date_trunc('month', published AT TIME ZONE 'UTC') AT TIME ZONE 'UTC' AS m
+      FROM migrate_old.articles) months;
+
+INSERT INTO articles (guid, title, link, published, summary, description, image_url, author, source,
+                      content, likes, views, rating, difficulty, embedding, content_hash, embedding_model)
+SELECT guid, title, link, published, summary, description, image_url, author, source,
+       content, likes, views, rating, difficulty, embedding, content_hash, embedding_model
+FROM migrate_old.articles;
+
+INSERT INTO rss_categories (article_guid, published, rss_category_id)
+SELECT r.article_guid, a.published, r.rss_category_id
+FROM migrate_old.rss_categories r JOIN migrate_old.articles a ON a.guid = r.article_guid;
+
+INSERT INTO categories (article_guid, published, category_id, score)
+SELECT c.article_guid, a.published, c.category_id, c.score
+FROM migrate_old.categories c JOIN migrate_old.articles a ON a.guid = c.article_guid;
+
+INSERT INTO tags (article_guid, published, tag_id)
+SELECT t.article_guid, a.published, t.tag_id
+FROM migrate_old.tags t JOIN migrate_old.articles a ON a.guid = t.article_guid;
+
+INSERT INTO llm_content (article_guid, published, title, content)
+SELECT l.article_guid, a.published, l.title, l.content
+FROM migrate_old.llm_content l JOIN migrate_old.articles a ON a.guid = l.article_guid;
+
+DROP SCHEMA migrate_old CASCADE;
+
+CREATE INDEX IF NOT EXISTS idx_articles_published ON articles(published);
+CREATE INDEX IF NOT EXISTS idx_articles_title ON articles(title);
+CREATE INDEX IF NOT EXISTS idx_articles_content ON articles USING gin(to_tsvector('english', content));
+CREATE INDEX IF NOT EXISTS idx_rss_categories_category ON rss_categories(rss_category_id);
+CREATE INDEX IF NOT EXISTS idx_categories_category ON categories(category_id);
+CREATE INDEX IF NOT EXISTS idx_tags_tag ON tags(tag_id);
+CREATE INDEX IF NOT EXISTS idx_llm_content_article_guid ON llm_content(article_guid);
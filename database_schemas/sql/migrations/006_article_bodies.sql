@@ -0,0 +1,48 @@
+-- Hot/cold split: move summary/description/content out of articles into
+-- article_bodies so scans and joins on articles touch far fewer pages.
+-- Dropped columns keep their space until the partitions are rewritten
+-- (VACUUM FULL per partition, at a quiet time).
+
+CREATE TABLE article_bodies (
+    article_guid TEXT NOT NULL,
+    published TIMESTAMPTZ NOT NULL,
+    summary TEXT,
+    description TEXT,
+    content TEXT,
+    PRIMARY KEY (article_guid, published),
+    FOREIGN KEY (article_guid, published) REFERENCES articles(guid, published) ON DELETE CASCADE
+) PARTITION BY RANGE (published);
+
+CREATE OR REPLACE FUNCTION ensure_month_partition(ts TIMESTAMPTZ) RETURNS VOID AS $$
+DECLARE
+    month_start TIMESTAMPTZ := date_trunc('month', ts AT TIME ZONE 'UTC') AT TIME ZONE 'UTC';
+    month_end TIMESTAMPTZ := (date_trunc('month', ts AT TIME ZONE 'UTC') + INTERVAL '1 month') AT TIME ZONE 'UTC';
+    suffix TEXT := to_char(ts AT TIME ZONE 'UTC', 'YYYY_MM');
+    parent TEXT;
+BEGIN
+    FOREACH parent IN ARRAY ARRAY['articles', 'article_bodies', 'rss_categories', 'categories', 'tags', 'llm_content'] LOOP
+        IF to_regclass(format('public.%I', parent || '_' || suffix)) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                parent || '_' || suffix, parent, month_start, month_end
+            );
+        END IF;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Existing months: create their article_bodies partitions
+SELECT ensure_month_partition(m)
+-- Truncate in UTC, like ensure_month_partition's bounds (not the session time zone)
+FROM (SELECT DISTINCT date_trunc('month', published AT TIME ZONE 'UTC') AT TIME ZONE 'UTC' AS m
+      FROM articles) months;
+
+INSERT INTO article_bodies (article_guid, published, summary, description, content)
+SELECT guid, published, summary, description, content FROM articles;
+
+DROP INDEX IF EXISTS idx_articles_content;
+ALTER TABLE articles DROP COLUMN summary;
+ALTER TABLE articles DROP COLUMN description;
+ALTER TABLE articles DROP COLUMN content;
+
+CREATE INDEX IF NOT EXISTS idx_article_bodies_content ON article_bodies USING gin(to_tsvector('english', content));
@@ -0,0 +1,6 @@
+-- Each view's description is embedded once and stored on the view, so feeds
+-- are a single ANN query (ORDER BY articles.embedding <=> views.embedding).
+-- Existing views are embedded lazily the first time they are shown
+-- (app_cli/recommender.py get_view_vector).
+ALTER TABLE views ADD COLUMN IF NOT EXISTS embedding vector(384);
+ALTER TABLE views ADD COLUMN IF NOT EXISTS embedding_model TEXT;
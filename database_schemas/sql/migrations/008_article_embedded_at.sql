@@ -0,0 +1,5 @@
+-- When each embedding was (re)written, so scripts/export_embeddings.py --delta
+-- can pick up only articles embedded since the last full export.
+ALTER TABLE articles ADD COLUMN IF NOT EXISTS embedded_at TIMESTAMPTZ;
+UPDATE articles SET embedded_at = now() WHERE embedding IS NOT NULL AND embedded_at IS NULL;
+CREATE INDEX IF NOT EXISTS idx_articles_embedded_at ON articles(embedded_at);
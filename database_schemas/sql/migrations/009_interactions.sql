@@ -0,0 +1,22 @@
+-- Interaction log and per-(view, tag) counters filled by the CLI's
+-- write-behind InteractionRecorder (app_cli/interactions.py).
+CREATE TABLE IF NOT EXISTS interaction_events (
+    event_id BIGSERIAL PRIMARY KEY,
+    view_id INT REFERENCES views(view_id) ON DELETE CASCADE,
+    article_guid TEXT NOT NULL,
+    published TIMESTAMPTZ NOT NULL,
+    seconds_viewed INT NOT NULL DEFAULT 0,
+    liked BOOLEAN NOT NULL DEFAULT FALSE,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS view_tag_interactions (
+    view_id INT REFERENCES views(view_id) ON DELETE CASCADE,
+    tag_id INT NOT NULL REFERENCES tag_labels(tag_id),
+    impressions INT NOT NULL DEFAULT 0,
+    seconds_viewed BIGINT NOT NULL DEFAULT 0,
+    liked INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (view_id, tag_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_interaction_events_view ON interaction_events(view_id, created_at);
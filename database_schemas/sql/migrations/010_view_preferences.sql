@@ -0,0 +1,14 @@
+-- Online view personalization: a decayed preference vector on each view and
+-- decayed per-category weights, both updated in O(1) per interaction by
+-- app_cli/preferences.py when the InteractionRecorder flushes.
+ALTER TABLE views ADD COLUMN IF NOT EXISTS pref_vector vector(384);
+ALTER TABLE views ADD COLUMN IF NOT EXISTS pref_weight REAL NOT NULL DEFAULT 0;
+ALTER TABLE views ADD COLUMN IF NOT EXISTS pref_updated_at TIMESTAMPTZ;
+
+CREATE TABLE IF NOT EXISTS view_category_weights (
+    view_id INT REFERENCES views(view_id) ON DELETE CASCADE,
+    category_id SMALLINT NOT NULL REFERENCES category_labels(category_id),
+    weight REAL NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL,
+    PRIMARY KEY (view_id, category_id)
+);
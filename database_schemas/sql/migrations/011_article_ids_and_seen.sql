@@ -0,0 +1,13 @@
+-- Dense integer ids for articles, and per-view seen sets stored as roaring
+-- bitmaps over those ids (app_cli/seen.py).
+CREATE SEQUENCE IF NOT EXISTS articles_article_id_seq AS INT;
+ALTER TABLE articles ADD COLUMN IF NOT EXISTS article_id INT;
+ALTER TABLE articles ALTER COLUMN article_id SET DEFAULT nextval('articles_article_id_seq');
+UPDATE articles SET article_id = nextval('articles_article_id_seq') WHERE article_id IS NULL;
+ALTER TABLE articles ALTER COLUMN article_id SET NOT NULL;
+
+CREATE TABLE IF NOT EXISTS view_seen (
+    view_id INT PRIMARY KEY REFERENCES views(view_id) ON DELETE CASCADE,
+    bitmap BYTEA NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
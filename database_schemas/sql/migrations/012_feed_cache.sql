@@ -0,0 +1,22 @@
+-- Per-view ranked result cache, invalidated by views.version and by
+-- per-category content epochs that upsert_articles bumps on ingestion.
+ALTER TABLE views ADD COLUMN IF NOT EXISTS version INT NOT NULL DEFAULT 0;
+
+CREATE TABLE IF NOT EXISTS category_epochs (
+    category_id SMALLINT PRIMARY KEY REFERENCES category_labels(category_id),
+    epoch BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS feed_cache (
+    view_id INT PRIMARY KEY REFERENCES views(view_id) ON DELETE CASCADE,
+    view_version INT NOT NULL,
+    content_epoch BIGINT NOT NULL,
+    guids TEXT[] NOT NULL,
+    published TIMESTAMPTZ[] NOT NULL,
+    article_ids INT[] NOT NULL,
+    scores REAL[] NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    last_used_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_feed_cache_last_used ON feed_cache(last_used_at);
@@ -0,0 +1,100 @@
+-- Hybrid candidate generation: full-text rank, vector similarity and
+-- classifier category score fused in one query (hybrid_candidates).
+-- The tsvector is stored so ranking doesn't re-parse content per row; adding
+-- it rewrites every article_bodies partition.
+ALTER TABLE article_bodies
+    ADD COLUMN IF NOT EXISTS content_tsv tsvector
+    GENERATED ALWAYS AS (to_tsvector('english', coalesce(content, ''))) STORED;
+
+DROP INDEX IF EXISTS idx_article_bodies_content;
+CREATE INDEX IF NOT EXISTS idx_article_bodies_content_tsv ON article_bodies USING gin(content_tsv);
+
+-- Top categories rows by score, per category (the category-score list)
+DROP INDEX IF EXISTS idx_categories_category;
+CREATE INDEX IF NOT EXISTS idx_categories_category_score ON categories(category_id, score DESC);
+
+CREATE OR REPLACE FUNCTION hybrid_candidates(
+    for_view INT,
+    query_vec vector,
+    query_text TEXT,
+    since TIMESTAMPTZ,
+    k INT,
+    pool INT DEFAULT 100,
+    vector_weight REAL DEFAULT 1.0,
+    text_weight REAL DEFAULT 1.0,
+    category_weight REAL DEFAULT 0.5,
+    rrf_k INT DEFAULT 60
+) RETURNS TABLE (guid TEXT, published TIMESTAMPTZ, article_id INT, score DOUBLE PRECISION) AS $$
+    WITH by_vector AS (
+        SELECT a.guid, a.published,
+               row_number() OVER (ORDER BY a.embedding <=> query_vec, a.guid) AS rnk
+        FROM (
+            SELECT a.guid, a.published, a.embedding
+            FROM articles a
+            WHERE a.published >= since
+              AND a.embedding IS NOT NULL
+              AND EXISTS (
+                  SELECT 1
+                  FROM categories c
+                  JOIN view_categories vc ON vc.category_id = c.category_id
+                  WHERE vc.view_id = for_view
+                    AND c.article_guid = a.guid AND c.published = a.published
+                    AND c.published >= since
+              )
+            ORDER BY a.embedding <=> query_vec
+            LIMIT pool
+        ) a
+    ),
+    by_text AS (
+        -- Any term of the description may match (OR); ts_rank_cd rewards more and closer matches
+        SELECT b.article_guid AS guid, b.published,
+               row_number() OVER (ORDER BY ts_rank_cd(b.content_tsv, q.query) DESC, b.article_guid) AS rnk
+        FROM article_bodies b,
+             (SELECT replace(plainto_tsquery('english', query_text)::text, '&', '|')::tsquery AS query) q
+        WHERE b.published >= since
+          AND b.content_tsv @@ q.query
+          AND EXISTS (
+              SELECT 1
+              FROM categories c
+              JOIN view_categories vc ON vc.category_id = c.category_id
+              WHERE vc.view_id = for_view
+                AND c.article_guid = b.article_guid AND c.published = b.published
+                AND c.published >= since
+          )
+        ORDER BY rnk
+        LIMIT pool
+    ),
+    by_category AS (
+        SELECT t.article_guid AS guid, t.published,
+               row_number() OVER (ORDER BY max(t.score) DESC, t.article_guid) AS rnk
+        FROM view_categories vc
+        CROSS JOIN LATERAL (
+            SELECT c.article_guid, c.published, c.score
+            FROM categories c
+            WHERE c.category_id = vc.category_id AND c.published >= since AND c.score IS NOT NULL
+            ORDER BY c.score DESC
+            LIMIT pool
+        ) t
+        WHERE vc.view_id = for_view
+        GROUP BY t.article_guid, t.published
+        ORDER BY rnk
+        LIMIT pool
+    ),
+    fused AS (
+        SELECT r.guid, r.published, sum(r.weight / (rrf_k + r.rnk)) AS score
+        FROM (
+            SELECT guid, published, rnk, vector_weight AS weight FROM by_vector
+            UNION ALL
+            SELECT guid, published, rnk, text_weight FROM by_text
+            UNION ALL
+            SELECT guid, published, rnk, category_weight FROM by_category
+        ) r
+        GROUP BY r.guid, r.published
+    )
+    SELECT f.guid, f.published, a.article_id, f.score
+    FROM fused f
+    JOIN articles a ON a.guid = f.guid AND a.published = f.published
+    WHERE a.published >= since
+    ORDER BY f.score DESC, f.guid
+    LIMIT k;
+$$ LANGUAGE sql STABLE;
@@ -0,0 +1,109 @@
+-- Weighted full-text search document (title A, LLM title B, content C) in
+-- place of 013's content-only generated column. Titles live in articles and
+-- llm_content, so the column is written by upsert_articles rather than
+-- generated. The backfill rewrites every article_bodies row.
+CREATE OR REPLACE FUNCTION article_search_tsv(title TEXT, llm_title TEXT, content TEXT) RETURNS tsvector AS $$
+    SELECT setweight(to_tsvector('english', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(llm_title, '')), 'B')
+        || setweight(to_tsvector('english', coalesce(content, '')), 'C');
+$$ LANGUAGE sql IMMUTABLE;
+
+ALTER TABLE article_bodies ADD COLUMN IF NOT EXISTS search_tsv tsvector;
+
+UPDATE article_bodies b
+SET search_tsv = article_search_tsv(a.title, llm.title, b.content)
+FROM articles a
+LEFT JOIN llm_content llm ON llm.article_guid = a.guid AND llm.published = a.published
+WHERE a.guid = b.article_guid AND a.published = b.published;
+
+CREATE INDEX IF NOT EXISTS idx_article_bodies_search_tsv ON article_bodies USING gin(search_tsv);
+
+-- hybrid_candidates' full-text list now ranks the weighted document
+CREATE OR REPLACE FUNCTION hybrid_candidates(
+    for_view INT,
+    query_vec vector,
+    query_text TEXT,
+    since TIMESTAMPTZ,
+    k INT,
+    pool INT DEFAULT 100,
+    vector_weight REAL DEFAULT 1.0,
+    text_weight REAL DEFAULT 1.0,
+    category_weight REAL DEFAULT 0.5,
+    rrf_k INT DEFAULT 60
+) RETURNS TABLE (guid TEXT, published TIMESTAMPTZ, article_id INT, score DOUBLE PRECISION) AS $$
+    WITH by_vector AS (
+        SELECT a.guid, a.published,
+               row_number() OVER (ORDER BY a.embedding <=> query_vec, a.guid) AS rnk
+        FROM (
+            SELECT a.guid, a.published, a.embedding
+            FROM articles a
+            WHERE a.published >= since
+              AND a.embedding IS NOT NULL
+              AND EXISTS (
+                  SELECT 1
+                  FROM categories c
+                  JOIN view_categories vc ON vc.category_id = c.category_id
+                  WHERE vc.view_id = for_view
+                    AND c.article_guid = a.guid AND c.published = a.published
+                    AND c.published >= since
+              )
+            ORDER BY a.embedding <=> query_vec
+            LIMIT pool
+        ) a
+    ),
+    by_text AS (
+        -- Any term of the description may match (OR); ts_rank_cd rewards more and closer matches
+        SELECT b.article_guid AS guid, b.published,
+               row_number() OVER (ORDER BY ts_rank_cd(b.search_tsv, q.query) DESC, b.article_guid) AS rnk
+        FROM article_bodies b,
+             (SELECT replace(plainto_tsquery('english', query_text)::text, '&', '|')::tsquery AS query) q
+        WHERE b.published >= since
+          AND b.search_tsv @@ q.query
+          AND EXISTS (
+              SELECT 1
+              FROM categories c
+              JOIN view_categories vc ON vc.category_id = c.category_id
+              WHERE vc.view_id = for_view
+                AND c.article_guid = b.article_guid AND c.published = b.published
+                AND c.published >= since
+          )
+        ORDER BY rnk
+        LIMIT pool
+    ),
+    by_category AS (
+        SELECT t.article_guid AS guid, t.published,
+               row_number() OVER (ORDER BY max(t.score) DESC, t.article_guid) AS rnk
+        FROM view_categories vc
+        CROSS JOIN LATERAL (
+            SELECT c.article_guid, c.published, c.score
+            FROM categories c
+            WHERE c.category_id = vc.category_id AND c.published >= since AND c.score IS NOT NULL
+            ORDER BY c.score DESC
+            LIMIT pool
+        ) t
+        WHERE vc.view_id = for_view
+        GROUP BY t.article_guid, t.published
+        ORDER BY rnk
+        LIMIT pool
+    ),
+    fused AS (
+        SELECT r.guid, r.published, sum(r.weight / (rrf_k + r.rnk)) AS score
+        FROM (
+            SELECT guid, published, rnk, vector_weight AS weight FROM by_vector
+            UNION ALL
+            SELECT guid, published, rnk, text_weight FROM by_text
+            UNION ALL
+            SELECT guid, published, rnk, category_weight FROM by_category
+        ) r
+        GROUP BY r.guid, r.published
+    )
+    SELECT f.guid, f.published, a.article_id, f.score
+    FROM fused f
+    JOIN articles a ON a.guid = f.guid AND a.published = f.published
+    WHERE a.published >= since
+    ORDER BY f.score DESC, f.guid
+    LIMIT k;
+$$ LANGUAGE sql STABLE;
+
+DROP INDEX IF EXISTS idx_article_bodies_content_tsv;
+ALTER TABLE article_bodies DROP COLUMN IF EXISTS content_tsv;
@@ -0,0 +1,25 @@
+-- Time-decayed popularity per article and per category, maintained
+-- incrementally from interaction_events by app_cli/popularity.py.
+-- recorded_at is the server insert time, so the aggregator can leave a margin
+-- for transactions that are still open; existing rows get the migration time.
+ALTER TABLE interaction_events ADD COLUMN IF NOT EXISTS recorded_at TIMESTAMPTZ NOT NULL DEFAULT now();
+
+CREATE TABLE IF NOT EXISTS article_popularity (
+    article_id INT PRIMARY KEY,
+    article_guid TEXT NOT NULL,
+    published TIMESTAMPTZ NOT NULL,
+    log_score DOUBLE PRECISION NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS category_popularity (
+    category_id SMALLINT PRIMARY KEY REFERENCES category_labels(category_id),
+    log_score DOUBLE PRECISION NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS popularity_watermark (
+    singleton BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (singleton),
+    last_event_id BIGINT NOT NULL DEFAULT 0
+);
+INSERT INTO popularity_watermark (singleton) VALUES (TRUE) ON CONFLICT DO NOTHING;
+
+CREATE INDEX IF NOT EXISTS idx_article_popularity_score ON article_popularity(log_score, article_id);
@@ -0,0 +1,15 @@
+-- Precomputed feeds per user cohort (normalized occupation, industry and
+-- category set), served as a new view's first page while its own ranking is
+-- computed (app_cli/cohorts.py).
+CREATE TABLE IF NOT EXISTS cohort_feeds (
+    occupation TEXT NOT NULL,
+    industry TEXT NOT NULL,
+    category_ids SMALLINT[] NOT NULL,
+    content_epoch BIGINT NOT NULL,
+    guids TEXT[] NOT NULL,
+    published TIMESTAMPTZ[] NOT NULL,
+    article_ids INT[] NOT NULL,
+    scores REAL[] NOT NULL,
+    refreshed_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (occupation, industry, category_ids)
+);
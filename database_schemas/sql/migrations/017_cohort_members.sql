@@ -0,0 +1,4 @@
+-- Fingerprint of a cohort's member views and their mean embedding, so
+-- app_cli/cohorts.py re-ranks cohorts whose members changed even when the
+-- categories' content epoch did not. Existing rows are refreshed on the next run.
+ALTER TABLE cohort_feeds ADD COLUMN IF NOT EXISTS members_hash TEXT NOT NULL DEFAULT '';
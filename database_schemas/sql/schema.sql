@@ -5,6 +5,14 @@
 -- This is a destructive operation and should be used with caution.
 --CREATE SCHEMA public;
 
+-- =========================
+-- SCHEMA MIGRATIONS (applied by scripts/migrate.py)
+-- =========================
+CREATE TABLE schema_migrations (
+    filename TEXT PRIMARY KEY,
+    applied_at TIMESTAMPTZ DEFAULT now()
+);
+
 -- =========================
 -- USERS TABLE
 -- =========================
@@ -24,72 +32,383 @@ CREATE TABLE views (
     view_id SERIAL PRIMARY KEY,
     user_id INT REFERENCES users(user_id) ON DELETE CASCADE,
     name TEXT NOT NULL,
-    description TEXT
+    description TEXT,
+    embedding vector(384),  -- description embedding, ranked against articles.embedding
+    embedding_model TEXT,
+    -- Exponentially decayed average of liked / long-dwell article embeddings,
+    -- updated per interaction batch (app_cli/preferences.py)
+    pref_vector vector(384),
+    pref_weight REAL NOT NULL DEFAULT 0,
+    pref_updated_at TIMESTAMPTZ,
+    version INT NOT NULL DEFAULT 0  -- bumped on any change that affects ranking
+);
+
+-- =========================
+-- LABEL DICTIONARIES
+-- Each label string is stored once; link tables reference the integer id.
+-- =========================
+CREATE TABLE category_labels (
+    category_id SMALLSERIAL PRIMARY KEY,
+    label TEXT UNIQUE NOT NULL
+);
+
+CREATE TABLE rss_category_labels (
+    rss_category_id SERIAL PRIMARY KEY,
+    label TEXT UNIQUE NOT NULL
+);
+
+CREATE TABLE tag_labels (
+    tag_id SERIAL PRIMARY KEY,
+    label TEXT UNIQUE NOT NULL
 );
 
 -- =========================
 -- VIEW CATEGORIES (1-to-many)
 -- =========================
 CREATE TABLE view_categories (
-    id SERIAL PRIMARY KEY,
     view_id INT REFERENCES views(view_id) ON DELETE CASCADE,
-    category TEXT NOT NULL
+    category_id SMALLINT NOT NULL REFERENCES category_labels(category_id),
+    PRIMARY KEY (view_id, category_id)
 );
 
 -- =========================
 -- MAIN ARTICLES TABLE
+-- Partitioned by published month (see ensure_month_partition below); the
+-- child tables carry published too and are partitioned the same way, so
+-- queries restricted to a recent window only touch recent partitions and
+-- old months can be detached as a unit (scripts/retention.py).
+-- Only small, frequently filtered columns live here; the large text bodies
+-- are in article_bodies and are read only for articles actually shown.
 -- =========================
+-- Dense integer article ids (seen-post bitmaps, exported id index)
+CREATE SEQUENCE articles_article_id_seq AS INT;
+
 CREATE TABLE articles (
-    guid TEXT PRIMARY KEY,
+    guid TEXT NOT NULL,
+    article_id INT NOT NULL DEFAULT nextval('articles_article_id_seq'),
     title TEXT,
     link TEXT,
-    published TIMESTAMPTZ,
-    summary TEXT,
-    description TEXT,
+    published TIMESTAMPTZ NOT NULL,
     image_url TEXT,
     author TEXT,
     source TEXT,
-    content TEXT,
     likes INT DEFAULT 0,
     views INT DEFAULT 0,
     rating TEXT,
     difficulty TEXT,
-    embedding vector(384)  -- Add embedding for recommendation
-);
+    embedding vector(384),  -- Add embedding for recommendation
+    content_hash TEXT,      -- sha256 of the text the embedding was computed from
+    embedding_model TEXT,   -- model that produced the embedding
+    embedded_at TIMESTAMPTZ,  -- when the embedding was last written (delta exports)
+    PRIMARY KEY (guid, published)
+) PARTITION BY RANGE (published);
+
+-- =========================
+-- ARTICLE BODIES (1-to-1, cold side of articles)
+-- =========================
+CREATE TABLE article_bodies (
+    article_guid TEXT NOT NULL,
+    published TIMESTAMPTZ NOT NULL,
+    summary TEXT,
+    description TEXT,
+    content TEXT,
+    -- Weighted full-text document: article title (A), LLM title (B), content (C).
+    -- Written by upsert_articles with article_search_tsv (titles live in other tables).
+    search_tsv tsvector,
+    PRIMARY KEY (article_guid, published),
+    FOREIGN KEY (article_guid, published) REFERENCES articles(guid, published) ON DELETE CASCADE
+) PARTITION BY RANGE (published);
 
 -- =========================
 -- RSS CATEGORIES (1-to-many)
 -- =========================
 CREATE TABLE rss_categories (
-    id SERIAL PRIMARY KEY,
-    article_guid TEXT REFERENCES articles(guid) ON DELETE CASCADE,
-    category TEXT
-);
+    article_guid TEXT NOT NULL,
+    published TIMESTAMPTZ NOT NULL,
+    rss_category_id INT REFERENCES rss_category_labels(rss_category_id),
+    PRIMARY KEY (article_guid, rss_category_id, published),
+    FOREIGN KEY (article_guid, published) REFERENCES articles(guid, published) ON DELETE CASCADE
+) PARTITION BY RANGE (published);
 
 -- =========================
 -- CATEGORIES (1-to-many, with score)
 -- =========================
 CREATE TABLE categories (
-    id SERIAL PRIMARY KEY,
-    article_guid TEXT REFERENCES articles(guid) ON DELETE CASCADE,
-    category TEXT,
-    score FLOAT
-);
+    article_guid TEXT NOT NULL,
+    published TIMESTAMPTZ NOT NULL,
+    category_id SMALLINT REFERENCES category_labels(category_id),
+    score REAL,
+    PRIMARY KEY (article_guid, category_id, published),
+    FOREIGN KEY (article_guid, published) REFERENCES articles(guid, published) ON DELETE CASCADE
+) PARTITION BY RANGE (published);
 
 -- =========================
 -- TAGS (1-to-many, flat list)
 -- =========================
 CREATE TABLE tags (
-    id SERIAL PRIMARY KEY,
-    article_guid TEXT REFERENCES articles(guid) ON DELETE CASCADE,
-    tag TEXT
-);
+    article_guid TEXT NOT NULL,
+    published TIMESTAMPTZ NOT NULL,
+    tag_id INT REFERENCES tag_labels(tag_id),
+    PRIMARY KEY (article_guid, tag_id, published),
+    FOREIGN KEY (article_guid, published) REFERENCES articles(guid, published) ON DELETE CASCADE
+) PARTITION BY RANGE (published);
 
 -- =========================
 -- LLM CONTENT (1-to-1)
 -- =========================
 CREATE TABLE llm_content (
-    article_guid TEXT PRIMARY KEY REFERENCES articles(guid) ON DELETE CASCADE,
+    article_guid TEXT NOT NULL,
+    published TIMESTAMPTZ NOT NULL,
     title TEXT,
-    content TEXT
+    content TEXT,
+    PRIMARY KEY (article_guid, published),
+    FOREIGN KEY (article_guid, published) REFERENCES articles(guid, published) ON DELETE CASCADE
+) PARTITION BY RANGE (published);
+
+-- =========================
+-- INTERACTIONS
+-- Written in batches by app_cli/interactions.py (InteractionRecorder).
+-- interaction_events is the append-only log of what was shown; the counters
+-- below (and articles.likes / articles.views) are aggregated from each batch.
+-- Articles are referenced without a foreign key so retention can detach old
+-- partitions independently of the log.
+-- =========================
+CREATE TABLE interaction_events (
+    event_id BIGSERIAL PRIMARY KEY,
+    view_id INT REFERENCES views(view_id) ON DELETE CASCADE,
+    article_guid TEXT NOT NULL,
+    published TIMESTAMPTZ NOT NULL,
+    seconds_viewed INT NOT NULL DEFAULT 0,
+    liked BOOLEAN NOT NULL DEFAULT FALSE,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    recorded_at TIMESTAMPTZ NOT NULL DEFAULT now()  -- server insert time (popularity watermark)
 );
+
+CREATE TABLE view_tag_interactions (
+    view_id INT REFERENCES views(view_id) ON DELETE CASCADE,
+    tag_id INT NOT NULL REFERENCES tag_labels(tag_id),
+    impressions INT NOT NULL DEFAULT 0,
+    seconds_viewed BIGINT NOT NULL DEFAULT 0,
+    liked INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (view_id, tag_id)
+);
+
+-- Articles each view has been shown: a serialized roaring bitmap of
+-- articles.article_id (app_cli/seen.py), so exclusion cost doesn't grow
+-- with a join table's row count.
+CREATE TABLE view_seen (
+    view_id INT PRIMARY KEY REFERENCES views(view_id) ON DELETE CASCADE,
+    bitmap BYTEA NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Decayed per-category interest, same update rule as views.pref_vector
+CREATE TABLE view_category_weights (
+    view_id INT REFERENCES views(view_id) ON DELETE CASCADE,
+    category_id SMALLINT NOT NULL REFERENCES category_labels(category_id),
+    weight REAL NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL,
+    PRIMARY KEY (view_id, category_id)
+);
+
+-- =========================
+-- POPULARITY
+-- Forward-decayed interaction scores (app_cli/popularity.py). log_score is
+-- the log of sum(weight * 2^((t - reference) / half-life)) over an item's
+-- interactions, so ordering by it is ordering by decayed popularity at any
+-- moment and an update only adds the new events in. Folded in from
+-- interaction_events past popularity_watermark.last_event_id.
+-- =========================
+CREATE TABLE article_popularity (
+    article_id INT PRIMARY KEY,
+    article_guid TEXT NOT NULL,
+    published TIMESTAMPTZ NOT NULL,
+    log_score DOUBLE PRECISION NOT NULL
+);
+
+CREATE TABLE category_popularity (
+    category_id SMALLINT PRIMARY KEY REFERENCES category_labels(category_id),
+    log_score DOUBLE PRECISION NOT NULL
+);
+
+CREATE TABLE popularity_watermark (
+    singleton BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (singleton),
+    last_event_id BIGINT NOT NULL DEFAULT 0
+);
+INSERT INTO popularity_watermark (singleton) VALUES (TRUE);
+
+-- =========================
+-- FEED CACHE
+-- Ranked top-N ids per view (app_cli/feed_cache.py). An entry is valid while
+-- views.version and the sum of category_epochs over the view's categories
+-- are unchanged; upsert_articles bumps the epoch of every category it writes,
+-- so ingestion only invalidates views that use those categories.
+-- =========================
+CREATE TABLE category_epochs (
+    category_id SMALLINT PRIMARY KEY REFERENCES category_labels(category_id),
+    epoch BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE feed_cache (
+    view_id INT PRIMARY KEY REFERENCES views(view_id) ON DELETE CASCADE,
+    view_version INT NOT NULL,
+    content_epoch BIGINT NOT NULL,
+    guids TEXT[] NOT NULL,
+    published TIMESTAMPTZ[] NOT NULL,
+    article_ids INT[] NOT NULL,
+    scores REAL[] NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    last_used_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- =========================
+-- COHORT FEEDS
+-- Ranked top-N per cohort of users: normalized occupation and industry plus
+-- the sorted category set of their view ('' / '' is every user with that
+-- category set). Refreshed after ingestion by app_cli/cohorts.py when the
+-- categories' content epoch moves or members_hash (the member views and their
+-- mean embedding) changes; a new view's first page is read from here while its
+-- own feed is ranked.
+-- =========================
+CREATE TABLE cohort_feeds (
+    occupation TEXT NOT NULL,
+    industry TEXT NOT NULL,
+    category_ids SMALLINT[] NOT NULL,
+    content_epoch BIGINT NOT NULL,
+    members_hash TEXT NOT NULL DEFAULT '',
+    guids TEXT[] NOT NULL,
+    published TIMESTAMPTZ[] NOT NULL,
+    article_ids INT[] NOT NULL,
+    scores REAL[] NOT NULL,
+    refreshed_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (occupation, industry, category_ids)
+);
+
+-- =========================
+-- MONTHLY PARTITIONS
+-- Loaders call ensure_month_partition for every month in a batch before
+-- inserting; it creates <table>_YYYY_MM for articles and each child table.
+-- =========================
+CREATE OR REPLACE FUNCTION ensure_month_partition(ts TIMESTAMPTZ) RETURNS VOID AS $$
+DECLARE
+    month_start TIMESTAMPTZ := date_trunc('month', ts AT TIME ZONE 'UTC') AT TIME ZONE 'UTC';
+    month_end TIMESTAMPTZ := (date_trunc('month', ts AT TIME ZONE 'UTC') + INTERVAL '1 month') AT TIME ZONE 'UTC';
+    suffix TEXT := to_char(ts AT TIME ZONE 'UTC', 'YYYY_MM');
+    parent TEXT;
+BEGIN
+    FOREACH parent IN ARRAY ARRAY['articles', 'article_bodies', 'rss_categories', 'categories', 'tags', 'llm_content'] LOOP
+        IF to_regclass(format('public.%I', parent || '_' || suffix)) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                parent || '_' || suffix, parent, month_start, month_end
+            );
+        END IF;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- =========================
+-- FULL-TEXT DOCUMENT
+-- article_bodies.search_tsv for an article (app/article_writer.py); search
+-- ranks title matches above LLM title matches above content matches.
+-- =========================
+CREATE OR REPLACE FUNCTION article_search_tsv(title TEXT, llm_title TEXT, content TEXT) RETURNS tsvector AS $$
+    SELECT setweight(to_tsvector('english', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(llm_title, '')), 'B')
+        || setweight(to_tsvector('english', coalesce(content, '')), 'C');
+$$ LANGUAGE sql IMMUTABLE;
+
+-- =========================
+-- HYBRID CANDIDATES
+-- Top k articles for a view by weighted reciprocal-rank fusion of three
+-- ranked lists, each restricted to the view's categories and window:
+-- vector distance to query_vec (ANN index), full-text rank of query_text
+-- (search_tsv GIN index) and classifier category score. An article's score
+-- is sum(weight / (rrf_k + rank)) over the lists it appears in; each list
+-- contributes its top `pool` rows. Used by app_cli/recommender.py.
+-- =========================
+CREATE OR REPLACE FUNCTION hybrid_candidates(
+    for_view INT,
+    query_vec vector,
+    query_text TEXT,
+    since TIMESTAMPTZ,
+    k INT,
+    pool INT DEFAULT 100,
+    vector_weight REAL DEFAULT 1.0,
+    text_weight REAL DEFAULT 1.0,
+    category_weight REAL DEFAULT 0.5,
+    rrf_k INT DEFAULT 60
+) RETURNS TABLE (guid TEXT, published TIMESTAMPTZ, article_id INT, score DOUBLE PRECISION) AS $$
+    WITH by_vector AS (
+        SELECT a.guid, a.published,
+               row_number() OVER (ORDER BY a.embedding <=> query_vec, a.guid) AS rnk
+        FROM (
+            SELECT a.guid, a.published, a.embedding
+            FROM articles a
+            WHERE a.published >= since
+              AND a.embedding IS NOT NULL
+              AND EXISTS (
+                  SELECT 1
+                  FROM categories c
+                  JOIN view_categories vc ON vc.category_id = c.category_id
+                  WHERE vc.view_id = for_view
+                    AND c.article_guid = a.guid AND c.published = a.published
+                    AND c.published >= since
+              )
+            ORDER BY a.embedding <=> query_vec
+            LIMIT pool
+        ) a
+    ),
+    by_text AS (
+        -- Any term of the description may match (OR); ts_rank_cd rewards more and closer matches
+        SELECT b.article_guid AS guid, b.published,
+               row_number() OVER (ORDER BY ts_rank_cd(b.search_tsv, q.query) DESC, b.article_guid) AS rnk
+        FROM article_bodies b,
+             (SELECT replace(plainto_tsquery('english', query_text)::text, '&', '|')::tsquery AS query) q
+        WHERE b.published >= since
+          AND b.search_tsv @@ q.query
+          AND EXISTS (
+              SELECT 1
+              FROM categories c
+              JOIN view_categories vc ON vc.category_id = c.category_id
+              WHERE vc.view_id = for_view
+                AND c.article_guid = b.article_guid AND c.published = b.published
+                AND c.published >= since
+          )
+        ORDER BY rnk
+        LIMIT pool
+    ),
+    by_category AS (
+        SELECT t.article_guid AS guid, t.published,
+               row_number() OVER (ORDER BY max(t.score) DESC, t.article_guid) AS rnk
+        FROM view_categories vc
+        CROSS JOIN LATERAL (
+            SELECT c.article_guid, c.published, c.score
+            FROM categories c
+            WHERE c.category_id = vc.category_id AND c.published >= since AND c.score IS NOT NULL
+            ORDER BY c.score DESC
+            LIMIT pool
+        ) t
+        WHERE vc.view_id = for_view
+        GROUP BY t.article_guid, t.published
+        ORDER BY rnk
+        LIMIT pool
+    ),
+    fused AS (
+        SELECT r.guid, r.published, sum(r.weight / (rrf_k + r.rnk)) AS score
+        FROM (
+            SELECT guid, published, rnk, vector_weight AS weight FROM by_vector
+            UNION ALL
+            SELECT guid, published, rnk, text_weight FROM by_text
+            UNION ALL
+            SELECT guid, published, rnk, category_weight FROM by_category
+        ) r
+        GROUP BY r.guid, r.published
+    )
+    SELECT f.guid, f.published, a.article_id, f.score
+    FROM fused f
+    JOIN articles a ON a.guid = f.guid AND a.published = f.published
+    WHERE a.published >= since
+    ORDER BY f.score DESC, f.guid
+    LIMIT k;
+$$ LANGUAGE sql STABLE;